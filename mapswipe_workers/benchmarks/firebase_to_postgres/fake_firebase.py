@@ -0,0 +1,158 @@
+"""In-memory stand-in for references of firebase_admin.db.
+
+Supports the subset of the API used by firebase_to_postgres:
+get (also shallow), set, update (multi-location, None deletes),
+delete and key ordered queries (order_by_key, start_at, end_at).
+Concurrent fetching of children via REST (see firebase.fetch) is replaced
+by get_children.
+
+Data returned by get is serialized and parsed as JSON
+to account for the parsing of the response by the Firebase SDK.
+"""
+
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from mapswipe_workers.firebase_to_postgres.transfer_results import firebase_key_order
+
+
+def split_path(path: str) -> List[str]:
+    return [part for part in path.split("/") if part]
+
+
+class FakeFirebaseDB:
+    """Drop-in replacement for the module returned by auth.firebaseDB()."""
+
+    def __init__(self, data: Optional[dict] = None):
+        self.data = data if data is not None else {}
+        self.lock = threading.Lock()
+
+    def reference(self, path: str = "") -> "FakeReference":
+        return FakeReference(self, split_path(path))
+
+    def get_children(self, path: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """Stand-in for mapswipe_workers.firebase.fetch.get_children."""
+        ref = self.reference(path)
+        return {key: ref.child(key).get() for key in keys}
+
+    def get_node(self, parts: List[str]) -> Any:
+        node = self.data
+        for part in parts:
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        return node
+
+    def set_node(self, parts: List[str], value: Any) -> None:
+        if not parts:
+            self.data = value if value is not None else {}
+            return
+        if value is None:
+            self.delete_node(parts)
+            return
+        node = self.data
+        for part in parts[:-1]:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            node = node[part]
+        node[parts[-1]] = value
+
+    def delete_node(self, parts: List[str]) -> None:
+        """Delete a node and its parents if they are empty afterwards."""
+        nodes = [self.data]
+        for part in parts[:-1]:
+            node = nodes[-1].get(part)
+            if not isinstance(node, dict):
+                return
+            nodes.append(node)
+        nodes[-1].pop(parts[-1], None)
+        # Firebase does not keep empty nodes.
+        for i in range(len(nodes) - 1, 0, -1):
+            if nodes[i]:
+                break
+            nodes[i - 1].pop(parts[i - 1], None)
+
+
+class FakeReference:
+    def __init__(self, db: FakeFirebaseDB, parts: List[str]):
+        self.db = db
+        self.parts = parts
+
+    @property
+    def path(self) -> str:
+        return "/" + "/".join(self.parts)
+
+    @property
+    def key(self) -> Optional[str]:
+        return self.parts[-1] if self.parts else None
+
+    def child(self, path: str) -> "FakeReference":
+        return FakeReference(self.db, self.parts + split_path(path))
+
+    def get(self, shallow: bool = False) -> Any:
+        with self.db.lock:
+            node = self.db.get_node(self.parts)
+            if node is None:
+                return None
+            if shallow:
+                if isinstance(node, dict):
+                    return {key: True for key in node.keys()}
+                return node
+            data = json.dumps(node)
+        return json.loads(data)
+
+    def set(self, value: Any) -> None:
+        with self.db.lock:
+            self.db.set_node(self.parts, json.loads(json.dumps(value)))
+
+    def update(self, value: dict) -> None:
+        if not value or not isinstance(value, dict):
+            raise ValueError("Value argument must be a non-empty dictionary.")
+        with self.db.lock:
+            for path, child_value in value.items():
+                self.db.set_node(
+                    self.parts + split_path(path), json.loads(json.dumps(child_value))
+                )
+
+    def delete(self) -> None:
+        with self.db.lock:
+            self.db.set_node(self.parts, None)
+
+    def order_by_key(self) -> "FakeQuery":
+        return FakeQuery(self)
+
+
+class FakeQuery:
+    def __init__(self, ref: FakeReference):
+        self.ref = ref
+        self.start = None
+        self.end = None
+        self.limit = None
+
+    def start_at(self, start: str) -> "FakeQuery":
+        self.start = start
+        return self
+
+    def end_at(self, end: str) -> "FakeQuery":
+        self.end = end
+        return self
+
+    def limit_to_first(self, limit: int) -> "FakeQuery":
+        self.limit = limit
+        return self
+
+    def get(self) -> Optional[dict]:
+        node = self.ref.get()
+        if not isinstance(node, dict):
+            return node
+        keys = sorted(node.keys(), key=firebase_key_order)
+        if self.start is not None:
+            start = firebase_key_order(self.start)
+            keys = [key for key in keys if firebase_key_order(key) >= start]
+        if self.end is not None:
+            end = firebase_key_order(self.end)
+            keys = [key for key in keys if firebase_key_order(key) <= end]
+        if self.limit is not None:
+            keys = keys[: self.limit]
+        return {key: node[key] for key in keys}
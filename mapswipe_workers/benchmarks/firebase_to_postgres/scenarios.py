@@ -0,0 +1,197 @@
+"""Benchmark the transfer of results from Firebase to a local Postgres.
+
+Firebase is replaced by an in-memory stand-in (see fake_firebase).
+A synthetic project is created in postgres and its results in Firebase.
+Then the stages of transfer_results_for_project are run one after the other.
+For each stage throughput (task results per second)
+and peak RSS of the process are reported.
+
+Scenarios: 10k, 1m and 10m results.
+With --end-to-end transfer_results is run as a single stage instead,
+e.g. to compare --stream, --page-size and --batch-size.
+
+Use this command to run in docker container:
+docker-compose run --rm mapswipe_workers_creation python3 -m benchmarks.firebase_to_postgres.scenarios --scenario 1m  # noqa
+"""
+
+import argparse
+import resource
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+from unittest.mock import patch
+
+from mapswipe_workers import auth
+from mapswipe_workers.firebase_to_postgres import transfer_results, update_data
+from mapswipe_workers.firebase_to_postgres.task_index import (
+    filter_invalid_results,
+    task_index_cache,
+)
+
+from .fake_firebase import FakeFirebaseDB
+from .synthetic_results import SyntheticProject
+
+SCENARIOS = {
+    "10k": 10_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+
+
+def get_peak_rss() -> float:
+    """Get the peak resident set size of the process in MB."""
+    # ru_maxrss is given in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageTimer:
+    def __init__(self, number_of_results: int):
+        self.number_of_results = number_of_results
+        self.stages: List[Dict] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        rss_before = get_peak_rss()
+        start = time.perf_counter()
+        yield
+        duration = time.perf_counter() - start
+        peak_rss = get_peak_rss()
+        self.stages.append(
+            {
+                "stage": name,
+                "duration": duration,
+                "throughput": self.number_of_results / duration if duration else 0,
+                "peak_rss": peak_rss,
+                "rss_increase": peak_rss - rss_before,
+            }
+        )
+        print(self.format_stage(self.stages[-1]), flush=True)
+
+    @staticmethod
+    def format_stage(stage: dict) -> str:
+        return (
+            f"{stage['stage']:>12}: {stage['duration']:8.2f}s "
+            f"{stage['throughput']:>14,.0f} results/s "
+            f"peak RSS {stage['peak_rss']:8.1f} MB "
+            f"(+{stage['rss_increase']:.1f} MB)"
+        )
+
+
+def run_stages(project_id: str, timer: StageTimer) -> None:
+    """Run the stages of transfer_results_for_project."""
+    with timer.stage("fetch"):
+        fb_db = auth.firebaseDB()
+        results = fb_db.reference(f"v2/results/{project_id}").get()
+
+    with timer.stage("users"):
+        user_ids, user_group_ids = transfer_results.update_users_from_results([results])
+
+    with timer.stage("filter"):
+        valid_results, _ = filter_invalid_results(
+            project_id, results, user_ids=user_ids, user_group_ids=user_group_ids
+        )
+
+    with timer.stage("write"):
+        results_file, user_group_results_file = transfer_results.results_to_file(
+            valid_results, project_id
+        )
+
+    with timer.stage("copy"):
+        p_con = auth.postgresDB()
+        transfer_results.truncate_temp_user_groups_results(p_con=p_con)
+        transfer_results.truncate_temp_results(p_con=p_con)
+        transfer_results.save_results_to_postgres(results_file, project_id, p_con=p_con)
+        transfer_results.save_user_group_results_to_postgres(
+            user_group_results_file, project_id, p_con=p_con
+        )
+        del p_con
+
+    with timer.stage("delete"):
+        transfer_results.delete_transferred_results(project_id, results)
+
+
+def run_scenario(
+    number_of_results: int,
+    end_to_end: bool = False,
+    stream: bool = False,
+    page_size: int = 500,
+    batch_size: int = 0,
+    keep: bool = False,
+) -> List[Dict]:
+    project_id = f"benchmark-{number_of_results}"
+    synthetic_project = SyntheticProject(project_id, number_of_results)
+    timer = StageTimer(synthetic_project.number_of_results)
+    print(
+        f"{project_id}: {synthetic_project.number_of_results:,} results "
+        f"in {synthetic_project.number_of_groups:,} groups",
+        flush=True,
+    )
+
+    with timer.stage("generate"):
+        fake_db = FakeFirebaseDB(
+            {
+                "v2": {
+                    "results": {project_id: synthetic_project.create_results()},
+                    "users": synthetic_project.create_users(),
+                }
+            }
+        )
+
+    synthetic_project.delete_from_postgres()
+    task_index_cache.clear()
+    with timer.stage("setup"):
+        synthetic_project.save_to_postgres()
+
+    try:
+        with patch.object(auth, "firebaseDB", return_value=fake_db), patch.object(
+            update_data, "get_children", fake_db.get_children
+        ):
+            if end_to_end:
+                with timer.stage("transfer"):
+                    transfer_results.transfer_results(
+                        [project_id],
+                        stream=stream,
+                        page_size=page_size,
+                        batch_size=batch_size,
+                    )
+            else:
+                run_stages(project_id, timer)
+        assert fake_db.reference(f"v2/results/{project_id}").get() is None
+    finally:
+        if not keep:
+            synthetic_project.delete_from_postgres()
+    return timer.stages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--scenario",
+        choices=list(SCENARIOS.keys()),
+        action="append",
+        help="Can be given several times. Defaults to all scenarios.",
+    )
+    parser.add_argument("--results", type=int, help="Custom number of results.")
+    parser.add_argument("--end-to-end", action="store_true")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=0)
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the results in postgres."
+    )
+    args = parser.parse_args()
+
+    if args.results:
+        numbers_of_results = [args.results]
+    else:
+        numbers_of_results = [SCENARIOS[s] for s in args.scenario or SCENARIOS]
+
+    for number_of_results in numbers_of_results:
+        run_scenario(
+            number_of_results,
+            end_to_end=args.end_to_end,
+            stream=args.stream,
+            page_size=args.page_size,
+            batch_size=args.batch_size,
+            keep=args.keep,
+        )
@@ -0,0 +1,171 @@
+"""Synthetic projects, users and results for benchmarks.
+
+Results are modelled on the results created by
+create_mock_result in locust_files/load_testing.py:
+each group covers a block of tiles (task id 18-x-y)
+and each user maps all tasks of a group.
+"""
+
+import csv
+import datetime
+import io
+import random
+from typing import Dict, List
+
+from mapswipe_workers import auth
+
+TILE_ZOOM = 18
+
+
+class SyntheticProject:
+    def __init__(
+        self,
+        project_id: str,
+        number_of_results: int,
+        tasks_per_group: int = 120,
+        users_per_group: int = 10,
+        seed: int = 0,
+    ):
+        """Create a project with about number_of_results task results.
+
+        Groups are 3 tiles high like groups of tile map service projects.
+        """
+        self.project_id = project_id
+        self.random = random.Random(seed)
+        self.users_per_group = users_per_group
+        self.group_height = 3
+        self.group_width = max(1, tasks_per_group // self.group_height)
+        self.tasks_per_group = self.group_width * self.group_height
+        results_per_group = self.tasks_per_group * users_per_group
+        self.number_of_groups = max(
+            1, -(-number_of_results // results_per_group)  # ceil
+        )
+        self.user_ids = [
+            f"{project_id}-user-{i}"
+            for i in range(users_per_group * min(self.number_of_groups, 100))
+        ]
+        self.groups = {
+            f"g{group_number:06d}": self.get_group(group_number)
+            for group_number in range(self.number_of_groups)
+        }
+
+    @property
+    def number_of_results(self) -> int:
+        return self.number_of_groups * self.tasks_per_group * self.users_per_group
+
+    def get_group(self, group_number: int) -> dict:
+        x_min = 100000 + group_number * self.group_width
+        y_min = 100000
+        return {
+            "xMin": x_min,
+            "xMax": x_min + self.group_width,
+            "yMin": y_min,
+            "yMax": y_min + self.group_height,
+        }
+
+    def get_task_ids(self, group: dict) -> List[str]:
+        return [
+            f"{TILE_ZOOM}-{x}-{y}"
+            for x in range(group["xMin"], group["xMax"])
+            for y in range(group["yMin"], group["yMax"])
+        ]
+
+    def create_mock_result(self, group: dict, start_time: datetime.datetime) -> dict:
+        """Create a result object with random results for all tasks of a group."""
+        end_time = start_time + datetime.timedelta(seconds=self.random.randint(30, 120))
+        return {
+            "results": {
+                task_id: self.random.choice([0, 1, 2, 3])
+                for task_id in self.get_task_ids(group)
+            },
+            "startTime": start_time.isoformat(timespec="milliseconds") + "Z",
+            "endTime": end_time.isoformat(timespec="milliseconds") + "Z",
+        }
+
+    def create_results(self) -> Dict[str, Dict[str, dict]]:
+        """Create the results of the project as returned by Firebase."""
+        start = datetime.datetime(2023, 1, 1)
+        results: Dict[str, Dict[str, dict]] = {}
+        for group_number, (group_id, group) in enumerate(self.groups.items()):
+            user_ids = self.random.sample(self.user_ids, self.users_per_group)
+            results[group_id] = {
+                user_id: self.create_mock_result(
+                    group, start + datetime.timedelta(seconds=group_number)
+                )
+                for user_id in user_ids
+            }
+        return results
+
+    def create_users(self) -> Dict[str, dict]:
+        """Create the users as stored in v2/users in Firebase."""
+        return {
+            user_id: {
+                "username": user_id,
+                "created": "2023-01-01T00:00:00.000Z",
+            }
+            for user_id in self.user_ids
+        }
+
+    def save_to_postgres(self) -> None:
+        """Insert project, groups and tasks into postgres.
+
+        Users are inserted by the transfer of results.
+        """
+        p_con = auth.postgresDB()
+        p_con.query(
+            """
+            INSERT INTO projects (project_id, project_type, name, status, created)
+            VALUES (%(project_id)s, 1, %(project_id)s, 'active', now())
+            """,
+            {"project_id": self.project_id},
+        )
+
+        groups_file = io.StringIO()
+        tasks_file = io.StringIO()
+        groups_writer = csv.writer(groups_file, delimiter="\t")
+        tasks_writer = csv.writer(tasks_file, delimiter="\t")
+        for group_id, group in self.groups.items():
+            groups_writer.writerow(
+                [self.project_id, group_id, self.tasks_per_group, 0, 0, 0]
+            )
+            tasks_writer.writerows(
+                [self.project_id, group_id, task_id]
+                for task_id in self.get_task_ids(group)
+            )
+        groups_file.seek(0)
+        tasks_file.seek(0)
+        p_con.copy_from(
+            groups_file,
+            "groups",
+            columns=[
+                "project_id",
+                "group_id",
+                "number_of_tasks",
+                "finished_count",
+                "required_count",
+                "progress",
+            ],
+        )
+        p_con.copy_from(
+            tasks_file, "tasks", columns=["project_id", "group_id", "task_id"]
+        )
+        del p_con
+
+    def delete_from_postgres(self) -> None:
+        """Delete the project with all results and its users from postgres."""
+        p_con = auth.postgresDB()
+        p_con.query(
+            """
+            DELETE FROM mapping_sessions_results msr
+            USING mapping_sessions ms
+            WHERE ms.mapping_session_id = msr.mapping_session_id
+                AND ms.project_id = %(project_id)s;
+            DELETE FROM mapping_sessions WHERE project_id = %(project_id)s;
+            DELETE FROM tasks WHERE project_id = %(project_id)s;
+            DELETE FROM groups WHERE project_id = %(project_id)s;
+            DELETE FROM projects WHERE project_id = %(project_id)s;
+            DELETE FROM users WHERE user_id = ANY(%(user_ids)s);
+            """,
+            {"project_id": self.project_id, "user_ids": self.user_ids},
+        )
+        del p_con
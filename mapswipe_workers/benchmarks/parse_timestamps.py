@@ -0,0 +1,46 @@
+"""Compare parse_timestamp with dateutil.parser.parse.
+
+Timestamps are generated in the format set by the app: YYYY-MM-DDTHH:MM:SS.fffZ
+
+Use this command to run in docker container:
+docker-compose run --rm mapswipe_workers_creation python3 benchmarks/parse_timestamps.py --timestamps 1000000  # noqa
+"""
+
+import argparse
+import datetime
+import time
+
+import dateutil.parser
+
+from mapswipe_workers.firebase_to_postgres.transfer_results import parse_timestamp
+
+
+def create_timestamps(number_of_timestamps: int) -> list:
+    start = datetime.datetime(2023, 1, 1)
+    return [
+        (start + datetime.timedelta(milliseconds=7 * i)).isoformat(
+            timespec="milliseconds"
+        )
+        + "Z"
+        for i in range(number_of_timestamps)
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--timestamps", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    timestamps = create_timestamps(args.timestamps)
+    for name, parse in [
+        ("dateutil", dateutil.parser.parse),
+        ("parse_timestamp", parse_timestamp),
+    ]:
+        start = time.perf_counter()
+        for timestamp in timestamps:
+            parse(timestamp)
+        duration = time.perf_counter() - start
+        print(
+            f"{name:>15}: {duration:.2f}s "
+            f"({args.timestamps / duration:,.0f} timestamps/s)"
+        )
@@ -0,0 +1,106 @@
+"""Compare the text and binary COPY format for results.
+
+A synthetic project is created in memory with results modelled on
+the results uploaded by the app (see locust_files/load_testing.py).
+For each format the results are written with results_to_file and
+(optionally) copied into session temp tables in postgres.
+Throughput is reported as rows per second.
+
+Use this command to run in docker container:
+docker-compose run --rm mapswipe_workers_creation python3 benchmarks/results_copy_format.py --results 5000000 --copy  # noqa
+"""
+
+import argparse
+import datetime
+import random
+import time
+
+from mapswipe_workers import auth
+from mapswipe_workers.firebase_to_postgres.transfer_results import (
+    copy_results_file,
+    create_session_temp_tables,
+    results_to_file,
+)
+
+COLUMNS = [
+    "project_id",
+    "group_id",
+    "user_id",
+    "task_id",
+    "timestamp",
+    "start_time",
+    "end_time",
+    "result",
+]
+
+
+def create_synthetic_results(
+    number_of_results: int, tasks_per_group: int = 100, users_per_group: int = 10
+) -> dict:
+    """Create results for a project as returned by Firebase."""
+    results = {}
+    start = datetime.datetime(2023, 1, 1)
+    result_count = 0
+    group_number = 0
+    while result_count < number_of_results:
+        group_number += 1
+        group_id = f"g{group_number}"
+        results[group_id] = {}
+        for user_number in range(users_per_group):
+            start_time = start + datetime.timedelta(seconds=group_number + user_number)
+            end_time = start_time + datetime.timedelta(seconds=random.randint(30, 120))
+            results[group_id][f"user{user_number}"] = {
+                "startTime": start_time.isoformat(timespec="milliseconds") + "Z",
+                "endTime": end_time.isoformat(timespec="milliseconds") + "Z",
+                "results": {
+                    f"18-{group_number}-{task_number}": random.choice([0, 1, 2, 3])
+                    for task_number in range(tasks_per_group)
+                },
+            }
+            result_count += tasks_per_group
+            if result_count >= number_of_results:
+                break
+    return results
+
+
+def run_benchmark(results: dict, number_of_results: int, copy: bool) -> None:
+    if copy:
+        p_con = auth.postgresDB()
+        create_session_temp_tables(p_con)
+
+    for copy_format in ["text", "binary"]:
+        start = time.perf_counter()
+        results_file, _ = results_to_file(results, "benchmark", copy_format=copy_format)
+        encode_duration = time.perf_counter() - start
+        size = len(results_file.getvalue())
+        print(
+            f"{copy_format:>6} - write: {encode_duration:.2f}s "
+            f"({number_of_results / encode_duration:,.0f} rows/s, "
+            f"{size / 1024 / 1024:.1f} MB)"
+        )
+
+        if copy:
+            start = time.perf_counter()
+            copy_results_file(p_con, results_file, "results_temp", COLUMNS)
+            copy_duration = time.perf_counter() - start
+            print(
+                f"{copy_format:>6} - copy:  {copy_duration:.2f}s "
+                f"({number_of_results / copy_duration:,.0f} rows/s)"
+            )
+            p_con.query("TRUNCATE results_temp")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--results", type=int, default=5_000_000)
+    parser.add_argument("--tasks-per-group", type=int, default=100)
+    parser.add_argument("--users-per-group", type=int, default=10)
+    parser.add_argument(
+        "--copy", action="store_true", help="Also COPY results into postgres."
+    )
+    args = parser.parse_args()
+
+    results = create_synthetic_results(
+        args.results, args.tasks_per_group, args.users_per_group
+    )
+    run_benchmark(results, args.results, args.copy)
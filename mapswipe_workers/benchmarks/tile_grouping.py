@@ -0,0 +1,159 @@
+"""Benchmark the creation of groups for tile map service projects.
+
+A synthetic AOI of overlapping polygons at country scale is written
+to a GeoJSON file. The polygons are spread along a diagonal
+and each polygon overlaps its neighbours. Groups are created as in
+extent_to_groups and the duration of each step is reported:
+horizontal slices, vertical slices and the resolution of overlapping groups.
+
+With --pairwise overlaps are also resolved with the former
+pairwise comparison of all groups for the first --pairwise-groups groups.
+
+Use this command to run in docker container:
+docker-compose run --rm mapswipe_workers_creation python3 benchmarks/tile_grouping.py --polygons 10 --zoom 18  # noqa
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from mapswipe_workers.utils import tile_grouping_functions as t
+
+
+def create_synthetic_aoi(
+    outfile: str,
+    number_of_polygons: int,
+    radius: float,
+    vertices: int = 32,
+    seed: int = 0,
+) -> None:
+    """Write irregular polygons of about radius degrees to a GeoJSON file."""
+    rnd = random.Random(seed)
+    features = []
+    for i in range(number_of_polygons):
+        # Neighbouring polygons overlap by about half of their radius.
+        center_x = 30 + i * 1.5 * radius
+        center_y = -10 - i * 1.5 * radius
+        ring = []
+        for k in range(vertices):
+            angle = 2 * math.pi * k / vertices
+            r = radius * rnd.uniform(0.8, 1.2)
+            ring.append(
+                [center_x + r * math.cos(angle), center_y + r * math.sin(angle)]
+            )
+        ring.append(ring[0])
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {"id": i},
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+            }
+        )
+    with open(outfile, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+
+def adjust_overlapping_groups_pairwise(groups: Dict, zoom: int):
+    """Former implementation which compares each group with all other groups."""
+    groups_without_overlap = {}
+    overlaps_total = 0
+    for group_id in list(groups.keys()):
+        if group_id not in groups.keys():
+            continue
+        overlap_count = 0
+        for group_id_b in list(groups.keys()):
+            if group_id_b == group_id:
+                continue
+            if t.groups_intersect(groups[group_id], groups[group_id_b]):
+                overlap_count += 1
+                new_group = t.merge_groups(groups[group_id], groups[group_id_b], zoom)
+                del groups[group_id_b]
+                groups_without_overlap[group_id] = new_group
+        if overlap_count == 0:
+            groups_without_overlap[group_id] = groups[group_id]
+        del groups[group_id]
+        overlaps_total += overlap_count
+    return groups_without_overlap, overlaps_total
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    print(f"{name:>20}: {time.perf_counter() - start:8.2f}s", flush=True)
+
+
+def count_overlaps(groups: Dict) -> int:
+    """Count overlapping groups of the same row."""
+    rows: Dict = {}
+    for group in groups.values():
+        rows.setdefault((group["yMin"], group["yMax"]), []).append(group)
+    overlaps = 0
+    for row in rows.values():
+        row.sort(key=lambda group: group["xMin"])
+        overlaps += sum(1 for a, b in zip(row, row[1:]) if b["xMin"] <= a["xMax"])
+    return overlaps
+
+
+def run_benchmark(
+    number_of_polygons: int,
+    zoom: int,
+    radius: float,
+    group_size: int,
+    pairwise: bool,
+    pairwise_groups: int,
+) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        infile = os.path.join(tmp_dir, "aoi.geojson")
+        create_synthetic_aoi(infile, number_of_polygons, radius)
+        with timed("read"):
+            extent, geomcol = t.get_geometry_from_file(infile)
+
+    with timed("horizontal slices"):
+        slice_infos = t.get_horizontal_slice(extent, geomcol, zoom)
+    with timed("vertical slices"):
+        raw_groups = t.get_vertical_slice(slice_infos, zoom, group_size)
+    print(f"{len(raw_groups):,} groups with {count_overlaps(raw_groups):,} overlaps")
+
+    with timed("adjust overlaps"):
+        groups, overlaps_total = t.adjust_overlapping_groups(dict(raw_groups), zoom)
+    print(
+        f"{len(groups):,} groups after {overlaps_total:,} merges, "
+        f"{count_overlaps(groups):,} overlaps remaining"
+    )
+
+    if pairwise:
+        subset = dict(list(raw_groups.items())[:pairwise_groups])
+        with timed("sweep (subset)"):
+            t.adjust_overlapping_groups(dict(subset), zoom)
+        with timed("pairwise (subset)"):
+            adjust_overlapping_groups_pairwise(dict(subset), zoom)
+        print(f"subset of {len(subset):,} groups")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--polygons", type=int, default=10)
+    parser.add_argument("--zoom", type=int, default=18)
+    parser.add_argument(
+        "--radius", type=float, default=1.0, help="Radius of polygons in degrees."
+    )
+    parser.add_argument("--group-size", type=int, default=120)
+    parser.add_argument("--pairwise", action="store_true")
+    parser.add_argument("--pairwise-groups", type=int, default=5000)
+    args = parser.parse_args()
+
+    run_benchmark(
+        args.polygons,
+        args.zoom,
+        args.radius,
+        args.group_size,
+        args.pairwise,
+        args.pairwise_groups,
+    )
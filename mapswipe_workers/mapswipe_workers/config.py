@@ -10,6 +10,22 @@ POSTGRES_PASSWORD = os.environ["POSTGRES_PASSWORD"]
 POSTGRES_PORT = os.getenv("POSTGRES_PORT", 5432)
 POSTGRES_USER = os.getenv("POSTGRES_USER", default="mapswipe_workers")
 
+# Format used to COPY results into postgres: "text" or "binary"
+RESULTS_COPY_FORMAT = os.getenv("RESULTS_COPY_FORMAT", default="text")
+
+# Prometheus text file with metrics of the results transfer.
+# Defaults to DATA_PATH/metrics/transfer_results.prom
+TRANSFER_METRICS_FILE = os.getenv("TRANSFER_METRICS_FILE")
+
+# Maximum number of task ids per worker in the cache of valid group and task ids.
+# About 100 bytes of memory are used per task id.
+TASK_INDEX_MAX_TASKS = int(os.getenv("TASK_INDEX_MAX_TASKS", default=200_000))
+
+# gzip level (1-9) and number of processes to compress tasks of footprint projects.
+# Defaults to the number of CPUs.
+TASKS_COMPRESSION_LEVEL = int(os.getenv("TASKS_COMPRESSION_LEVEL", default=9))
+TASKS_COMPRESSION_WORKERS = os.getenv("TASKS_COMPRESSION_WORKERS")
+
 IMAGE_BING_API_KEY = os.getenv("IMAGE_BING_API_KEY")
 IMAGE_DIGITAL_GLOBE_API_KEY = os.getenv("IMAGE_DIGITAL_GLOBE_API_KEY")
 IMAGE_ESRI_API_KEY = os.getenv("IMAGE_ESRI_API_KEY")
@@ -0,0 +1,151 @@
+"""Delete many children of a Firebase Realtime Database reference.
+
+A multi-location update with None for every key deletes all keys at once.
+Firebase rejects such an update with an InvalidArgumentError if
+the payload or the data to delete exceeds the maximum write size.
+Hence, keys are split into chunks by estimated payload size and key count.
+Chunks are sent concurrently and retried independently.
+Chunks which are still too large are split in halves.
+"""
+
+import concurrent.futures
+import time
+from typing import Iterable, Iterator, List
+
+from firebase_admin import db, exceptions
+
+from mapswipe_workers.definitions import logger
+
+MAX_CHUNK_BYTES = 1_000_000
+MAX_CHUNK_KEYS = 500
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+RETRY_DELAY = 1  # seconds, doubled for each retry
+
+# Overhead of a key in the JSON payload: "key":null,
+KEY_OVERHEAD_BYTES = len('"":null,')
+
+TRANSIENT_ERRORS = (
+    exceptions.UnavailableError,
+    exceptions.DeadlineExceededError,
+    exceptions.InternalError,
+    exceptions.UnknownError,
+    exceptions.AbortedError,
+    exceptions.ResourceExhaustedError,
+)
+
+
+def estimate_payload_size(key: str) -> int:
+    return len(key.encode()) + KEY_OVERHEAD_BYTES
+
+
+def split_keys(
+    keys: Iterable[str],
+    max_chunk_bytes: int = MAX_CHUNK_BYTES,
+    max_chunk_keys: int = MAX_CHUNK_KEYS,
+) -> Iterator[List[str]]:
+    """Yield chunks of keys within the limits of payload size and key count."""
+    chunk: List[str] = []
+    chunk_bytes = 0
+    for key in keys:
+        key_bytes = estimate_payload_size(key)
+        if chunk and (
+            chunk_bytes + key_bytes > max_chunk_bytes or len(chunk) >= max_chunk_keys
+        ):
+            yield chunk
+            chunk = []
+            chunk_bytes = 0
+        chunk.append(key)
+        chunk_bytes += key_bytes
+    if chunk:
+        yield chunk
+
+
+def delete_chunk(
+    ref: db.Reference,
+    chunk: List[str],
+    max_retries: int = MAX_RETRIES,
+    retry_delay: float = RETRY_DELAY,
+) -> None:
+    """Delete a chunk of keys using a multi-location update.
+
+    Transient errors are retried with exponential backoff.
+    If the chunk exceeds the maximum write size it is split in halves.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            ref.update({key: None for key in chunk})
+            return
+        except exceptions.InvalidArgumentError:
+            if len(chunk) == 1:
+                raise
+            # Data to write exceeds the maximum size that can be modified
+            # with a single request.
+            middle = len(chunk) // 2
+            logger.info(f"{ref.path}: split chunk of {len(chunk)} keys to delete")
+            delete_chunk(ref, chunk[:middle], max_retries, retry_delay)
+            delete_chunk(ref, chunk[middle:], max_retries, retry_delay)
+            return
+        except TRANSIENT_ERRORS:
+            if attempt == max_retries:
+                raise
+            logger.warning(
+                f"{ref.path}: failed to delete chunk of {len(chunk)} keys. "
+                f"Retry {attempt + 1}/{max_retries}"
+            )
+            time.sleep(retry_delay * 2**attempt)
+
+
+def delete_keys(
+    ref: db.Reference,
+    keys: Iterable[str],
+    max_workers: int = MAX_WORKERS,
+    max_chunk_bytes: int = MAX_CHUNK_BYTES,
+    max_chunk_keys: int = MAX_CHUNK_KEYS,
+) -> None:
+    """Delete keys (child paths) of a reference in concurrent chunks.
+
+    All chunks are attempted. If any chunk could not be deleted
+    the first error is raised afterwards.
+    Keys of successfully deleted chunks stay deleted.
+    """
+    chunks = list(split_keys(keys, max_chunk_bytes, max_chunk_keys))
+    if not chunks:
+        return
+    max_workers = max(1, min(max_workers, len(chunks)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(delete_chunk, ref, chunk) for chunk in chunks]
+        errors = [
+            future.exception() for future in futures if future.exception() is not None
+        ]
+    if errors:
+        logger.warning(
+            f"{ref.path}: failed to delete {len(errors)} of {len(chunks)} chunks"
+        )
+        raise errors[0]
+
+
+def delete_reference(
+    ref: db.Reference, max_workers: int = MAX_WORKERS, max_chunk_keys: int = 250
+) -> None:
+    """Delete a reference with all its children.
+
+    If the reference is too large to be deleted with a single request
+    its children are deleted in chunks first.
+    Children (e.g. groups) can hold a lot of data,
+    hence chunks contain fewer keys by default.
+    """
+    try:
+        ref.delete()
+    except exceptions.InvalidArgumentError:
+        # Data to write exceeds the maximum size that can be modified
+        # with a single request. Delete chunks of data instead.
+        children = ref.get(shallow=True) or {}
+        logger.info(f"{ref.path}: delete {len(children)} children in chunks")
+        delete_keys(
+            ref,
+            list(children.keys()),
+            max_workers=max_workers,
+            max_chunk_keys=max_chunk_keys,
+        )
+        ref.delete()
@@ -0,0 +1,139 @@
+"""Fetch many children of a Firebase Realtime Database reference.
+
+Each child is fetched with a single GET request to the REST API
+of the Realtime Database, e.g. v2/users/{user_id} with all attributes
+of a user. Requests are sent concurrently from an asyncio event loop.
+Connections are reused and the number of concurrent requests is bounded.
+Transient errors are retried with exponential backoff.
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, List, NamedTuple
+from urllib.parse import quote
+
+import aiohttp
+import firebase_admin
+from firebase_admin import db
+from google.auth.transport.requests import Request
+
+from mapswipe_workers import auth
+from mapswipe_workers.definitions import logger
+
+MAX_CONCURRENCY = 50
+MAX_RETRIES = 3
+RETRY_DELAY = 1  # seconds, doubled for each retry
+TIMEOUT = 60  # seconds per request
+
+TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+
+
+class RestClient(NamedTuple):
+    """Everything needed to send requests to the REST API of the database."""
+
+    base_url: str
+    params: Dict[str, str]
+    credential: Any
+
+
+def get_rest_client(ref: db.Reference) -> RestClient:
+    """Get the database URL, query parameters and credential of a reference.
+
+    The parameters hold e.g. the namespace of the emulator.
+    firebase_admin has no public API for these. They are read from private
+    attributes of the client of the reference, as in firebase_admin 6.0.0
+    (see requirements.txt). This is the only place where this is done.
+    Raises a RuntimeError if the attributes do not exist.
+    """
+    try:
+        client = ref._client
+        return RestClient(
+            base_url=client.base_url,
+            params=dict(client.params),
+            credential=client.credential,
+        )
+    except AttributeError as e:
+        raise RuntimeError(
+            "Can not get database URL and credential from firebase_admin "
+            f"{firebase_admin.__version__}. Internals of firebase_admin.db "
+            "have changed. Update firebase.fetch.get_rest_client "
+            "or pin firebase-admin to the version in requirements.txt."
+        ) from e
+
+
+def get_auth_headers(client: RestClient) -> Dict[str, str]:
+    """Get headers which authorize requests with the credential of the client.
+
+    The access token is refreshed if it is expired.
+    """
+    headers: Dict[str, str] = {}
+    client.credential.before_request(Request(), "GET", client.base_url, headers)
+    return headers
+
+
+async def fetch_child(
+    session: aiohttp.ClientSession,
+    url: str,
+    params: Dict[str, str],
+    max_retries: int = MAX_RETRIES,
+    retry_delay: float = RETRY_DELAY,
+) -> Any:
+    for attempt in range(max_retries + 1):
+        try:
+            async with session.get(url, params=params) as response:
+                if response.status not in TRANSIENT_STATUS or attempt == max_retries:
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == max_retries:
+                raise
+        logger.warning(f"{url}: failed to fetch. Retry {attempt + 1}/{max_retries}")
+        await asyncio.sleep(retry_delay * 2**attempt)
+
+
+async def fetch_children(
+    client: RestClient,
+    path: str,
+    keys: List[str],
+    max_concurrency: int = MAX_CONCURRENCY,
+    max_retries: int = MAX_RETRIES,
+    retry_delay: float = RETRY_DELAY,
+) -> Dict[str, Any]:
+    """Fetch children of a path concurrently using a shared session."""
+    connector = aiohttp.TCPConnector(limit=max_concurrency)
+    async with aiohttp.ClientSession(
+        headers=get_auth_headers(client),
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=TIMEOUT),
+    ) as session:
+        values = await asyncio.gather(
+            *(
+                fetch_child(
+                    session,
+                    f"{client.base_url}{path}/{quote(key, safe='')}.json",
+                    client.params,
+                    max_retries,
+                    retry_delay,
+                )
+                for key in keys
+            )
+        )
+    return dict(zip(keys, values))
+
+
+def get_children(
+    path: str, keys: Iterable[str], max_concurrency: int = MAX_CONCURRENCY
+) -> Dict[str, Any]:
+    """Get several children of a reference with one request per child.
+
+    Returns a dict of key and value of the child.
+    The value is None if the child does not exist.
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+    fb_db = auth.firebaseDB()
+    ref = fb_db.reference(path)
+    client = get_rest_client(ref)
+    children = asyncio.run(fetch_children(client, ref.path, keys, max_concurrency))
+    logger.info(f"Got {len(children)} children of {ref.path} from firebase.")
+    return children
@@ -2,6 +2,7 @@ from dataclasses import asdict
 
 from mapswipe_workers import auth
 from mapswipe_workers.definitions import CustomError, logger
+from mapswipe_workers.firebase import upload
 from mapswipe_workers.utils import gzip_str
 
 
@@ -23,41 +24,49 @@ class Firebase:
 
     def save_groups_to_firebase(self, projectId, groups):
 
-        # save groups
-        self.ref.update({f"v2/groups/{projectId}": groups})
+        # delete groups of an earlier run first,
+        # since groups are uploaded as children and merged with existing ones
+        self.ref.update({f"v2/groups/{projectId}": {}})
+        # save groups in batches which fit the maximum write size
+        upload.upload_children(
+            self.ref,
+            {
+                f"v2/groups/{projectId}/{group_id}": group
+                for group_id, group in groups.items()
+            },
+        )
         logger.info(f"{projectId} -" f" uploaded groups to firebase realtime database")
 
     def save_tasks_to_firebase(self, projectId, groupsOfTasks, useCompression: bool):
-        task_upload_dict = {}
-        for group_counter, group_id in enumerate(groupsOfTasks.keys()):
+        for group_id in groupsOfTasks.keys():
             for i in range(0, len(groupsOfTasks[group_id])):
                 groupsOfTasks[group_id][i].pop("geometry", None)
 
-            tasks_list = groupsOfTasks[group_id]
-            # for tasks of a building footprint project
-            # we use compression to reduce storage size in firebase
-            # since the tasks hold geometries their storage size
-            # can get quite big otherwise
-            if useCompression:
-                # removing properties from each task and compress
+        # for tasks of a building footprint project
+        # we use compression to reduce storage size in firebase
+        # since the tasks hold geometries their storage size
+        # can get quite big otherwise
+        if useCompression:
+            # removing properties from each task and compress
+            for tasks_list in groupsOfTasks.values():
                 for task in tasks_list:
                     task.pop("properties", None)
 
-                tasks_list = gzip_str.compress_tasks(tasks_list)
-
-            task_upload_dict[f"v2/tasks/{projectId}/{group_id}"] = tasks_list
-
-            # we upload tasks in batches of maximum 150 groups
-            # this is to avoid the maximum write size limit in firebase
-            if len(task_upload_dict) % 150 == 0 or (group_counter + 1) == len(
-                groupsOfTasks
-            ):
-                self.ref.update(task_upload_dict)
-                logger.info(
-                    f"{projectId} -"
-                    f" uploaded 150 groups with tasks to firebase realtime database"
-                )
-                task_upload_dict = {}
+            groupsOfTasks = gzip_str.compress_tasks_of_groups(groupsOfTasks)
+
+        task_upload_dict = {
+            f"v2/tasks/{projectId}/{group_id}": tasks_list
+            for group_id, tasks_list in groupsOfTasks.items()
+        }
+
+        # we upload tasks in batches sized by their payload
+        # this is to avoid the maximum write size limit in firebase
+        upload.upload_children(self.ref, task_upload_dict)
+        logger.info(
+            f"{projectId} -"
+            f" uploaded {len(task_upload_dict)} groups with tasks"
+            f" to firebase realtime database"
+        )
 
     def delete_project_draft_from_firebase(self, projectId):
         self.ref.update({f"v2/projectDrafts/{projectId}": {}})
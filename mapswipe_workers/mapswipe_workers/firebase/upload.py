@@ -0,0 +1,125 @@
+"""Upload many children to a Firebase Realtime Database reference.
+
+A multi-location update writes all children at once.
+Firebase rejects such an update with an InvalidArgumentError if
+the payload exceeds the maximum write size.
+Hence, children are split into batches by serialized payload size
+and key count. Batches are sent concurrently and retried independently.
+Batches which are still too large are split in halves.
+"""
+
+import concurrent.futures
+import json
+import time
+from typing import Any, Dict, Iterator
+
+from firebase_admin import db, exceptions
+
+from mapswipe_workers.definitions import logger
+from mapswipe_workers.firebase.delete import TRANSIENT_ERRORS
+
+MAX_BATCH_BYTES = 4_000_000
+MAX_BATCH_KEYS = 1000
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+RETRY_DELAY = 1  # seconds, doubled for each retry
+
+# Overhead of a key in the JSON payload: "key":,
+KEY_OVERHEAD_BYTES = len('"":,')
+
+
+def estimate_payload_size(key: str, value: Any) -> int:
+    value_bytes = len(json.dumps(value, separators=(",", ":")).encode())
+    return len(key.encode()) + KEY_OVERHEAD_BYTES + value_bytes
+
+
+def split_updates(
+    updates: Dict[str, Any],
+    max_batch_bytes: int = MAX_BATCH_BYTES,
+    max_batch_keys: int = MAX_BATCH_KEYS,
+) -> Iterator[Dict[str, Any]]:
+    """Yield batches of updates within the limits of payload size and key count."""
+    batch: Dict[str, Any] = {}
+    batch_bytes = 0
+    for key, value in updates.items():
+        value_bytes = estimate_payload_size(key, value)
+        if batch and (
+            batch_bytes + value_bytes > max_batch_bytes or len(batch) >= max_batch_keys
+        ):
+            yield batch
+            batch = {}
+            batch_bytes = 0
+        batch[key] = value
+        batch_bytes += value_bytes
+    if batch:
+        yield batch
+
+
+def upload_batch(
+    ref: db.Reference,
+    batch: Dict[str, Any],
+    max_retries: int = MAX_RETRIES,
+    retry_delay: float = RETRY_DELAY,
+) -> None:
+    """Write a batch of children using a multi-location update.
+
+    Transient errors are retried with exponential backoff.
+    If the batch exceeds the maximum write size it is split in halves.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            ref.update(batch)
+            return
+        except exceptions.InvalidArgumentError:
+            if len(batch) == 1:
+                raise
+            # Data to write exceeds the maximum size that can be modified
+            # with a single request.
+            keys = list(batch.keys())
+            middle = len(keys) // 2
+            logger.info(f"{ref.path}: split batch of {len(keys)} keys to upload")
+            for half in (keys[:middle], keys[middle:]):
+                upload_batch(
+                    ref, {key: batch[key] for key in half}, max_retries, retry_delay
+                )
+            return
+        except TRANSIENT_ERRORS:
+            if attempt == max_retries:
+                raise
+            logger.warning(
+                f"{ref.path}: failed to upload batch of {len(batch)} keys. "
+                f"Retry {attempt + 1}/{max_retries}"
+            )
+            time.sleep(retry_delay * 2**attempt)
+
+
+def upload_children(
+    ref: db.Reference,
+    updates: Dict[str, Any],
+    max_workers: int = MAX_WORKERS,
+    max_batch_bytes: int = MAX_BATCH_BYTES,
+    max_batch_keys: int = MAX_BATCH_KEYS,
+) -> None:
+    """Write children (child paths and values) of a reference in concurrent batches.
+
+    All batches are attempted. If any batch could not be uploaded
+    the first error is raised afterwards.
+    Children of successfully uploaded batches stay written.
+    """
+    batches = list(split_updates(updates, max_batch_bytes, max_batch_keys))
+    if not batches:
+        return
+    max_workers = max(1, min(max_workers, len(batches)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(upload_batch, ref, batch) for batch in batches]
+        errors = [
+            future.exception() for future in futures if future.exception() is not None
+        ]
+    if errors:
+        logger.warning(
+            f"{ref.path}: failed to upload {len(errors)} of {len(batches)} batches"
+        )
+        raise errors[0]
+    logger.info(
+        f"{ref.path}: uploaded {len(updates)} children in {len(batches)} batches"
+    )
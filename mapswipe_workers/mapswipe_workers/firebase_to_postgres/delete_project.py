@@ -4,18 +4,10 @@ Delete projects.
 
 import re
 import time
-from typing import Iterable
-
-from firebase_admin import exceptions
 
 from mapswipe_workers import auth
 from mapswipe_workers.definitions import CustomError, ProjectType, logger
-
-
-def chunks(data: list, size: int = 250) -> Iterable[list]:
-    """Yield successive n-sized chunks from list."""
-    for i in range(0, len(data), size):
-        yield data[i : i + size]  # noqa E203
+from mapswipe_workers.firebase.delete import delete_reference
 
 
 def delete_project(project_ids: list) -> bool:
@@ -39,15 +31,7 @@ def delete_project(project_ids: list) -> bool:
                 "Firebase Realtime Database reference. "
                 f"{ref.path}"
             )
-        try:
-            ref.delete()
-        except exceptions.InvalidArgumentError:
-            # Data to write exceeds the maximum size that can be modified
-            # with a single request. Delete chunks of data instead.
-            childs = ref.get(shallow=True)
-            for chunk in chunks(list(childs.keys())):
-                ref.update({key: None for key in chunk})
-            ref.delete()
+        delete_reference(ref)
 
         ref = fb_db.reference(f"v2/tasks/{project_id}")
         if not re.match(r"/v2/\w+/[-a-zA-Z0-9]+", ref.path):
@@ -56,15 +40,7 @@ def delete_project(project_ids: list) -> bool:
                 "Firebase Realtime Database reference. "
                 f"{ref.path}"
             )
-        try:
-            ref.delete()
-        except exceptions.InvalidArgumentError:
-            # Data to write exceeds the maximum size that can be modified
-            # with a single request. Delete chunks of data instead.
-            childs = ref.get(shallow=True)
-            for chunk in chunks(list(childs.keys())):
-                ref.update({key: None for key in chunk})
-            ref.delete()
+        delete_reference(ref)
 
         ref = fb_db.reference(f"v2/groupsUsers/{project_id}")
         if not re.match(r"/v2/\w+/[-a-zA-Z0-9]+", ref.path):
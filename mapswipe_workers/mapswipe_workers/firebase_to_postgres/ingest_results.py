@@ -0,0 +1,269 @@
+"""Continuous ingestion of results from Firebase to Postgres.
+
+Instead of polling v2/results every few minutes, listeners receive
+new results from the Realtime Database as they are written by the app.
+Every active project has its own listener on v2/results/{project_id}.
+Results are buffered in memory and transferred as micro-batches
+once the buffer holds max_rows task results or the oldest result
+is older than max_age seconds.
+
+When a listener (re)connects, Firebase sends all results of the project
+which are in Firebase already. This snapshot is downloaded, but not buffered.
+Results should be transferred page by page (see transfer_results with stream)
+before listeners are started, so that these snapshots stay small.
+Together with results of a failed micro-batch and of projects which are
+not active they are picked up by the regular transfer,
+which should still run from time to time.
+"""
+
+import threading
+import time
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from firebase_admin import db
+
+from mapswipe_workers import auth
+from mapswipe_workers.definitions import ProjectType, logger, sentry
+from mapswipe_workers.firebase_to_postgres.transfer_metrics import transfer_metrics
+from mapswipe_workers.firebase_to_postgres.transfer_results import (
+    filter_projects_for_transfer,
+    get_projects_from_postgres,
+    transfer_results_batch,
+    transfer_results_for_project,
+)
+
+
+def count_rows(result_data: dict) -> int:
+    """Get the number of task results of a group submission."""
+    results = result_data.get("results")
+    if isinstance(results, (dict, list)):
+        return len(results)
+    return 1
+
+
+def iter_event_results(
+    parts: List[str], data
+) -> Iterator[Tuple[Tuple[str, ...], Optional[dict]]]:
+    """Yield project/group/user paths and the written data of an event.
+
+    Data is None if a path has been deleted. Deleted paths can be
+    shorter than project/group/user (e.g. a whole group has been deleted).
+    Writes below the level of a single group submission are ignored.
+    The app writes a group submission at once.
+    """
+    if len(parts) > 3:
+        return
+    elif data is None:
+        yield tuple(parts), None
+    elif len(parts) == 3:
+        yield tuple(parts), data
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            yield from iter_event_results(parts + [key], value)
+
+
+class ResultsBuffer:
+    """Thread-safe buffer of results per project, group and user."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.results: Dict[str, Dict[str, Dict[str, dict]]] = {}
+        self.row_count = 0
+        self.oldest: Optional[float] = None
+
+    def add(self, project_id: str, group_id: str, user_id: str, result_data: dict):
+        with self.lock:
+            users = self.results.setdefault(project_id, {}).setdefault(group_id, {})
+            if user_id in users:
+                self.row_count -= count_rows(users[user_id])
+            users[user_id] = result_data
+            self.row_count += count_rows(result_data)
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+
+    def remove(self, path: Tuple[str, ...]) -> None:
+        """Remove results which have been deleted in Firebase.
+
+        E.g. if results have been transferred by another worker.
+        """
+        with self.lock:
+            if len(path) == 0:
+                removed = [
+                    result_data
+                    for groups in self.results.values()
+                    for users in groups.values()
+                    for result_data in users.values()
+                ]
+                self.results = {}
+            elif len(path) == 1:
+                groups = self.results.pop(path[0], {})
+                removed = [
+                    result_data
+                    for users in groups.values()
+                    for result_data in users.values()
+                ]
+            elif len(path) == 2:
+                users = self.results.get(path[0], {}).pop(path[1], {})
+                removed = list(users.values())
+            else:
+                users = self.results.get(path[0], {}).get(path[1], {})
+                removed = [users.pop(path[2])] if path[2] in users else []
+            self.row_count -= sum(count_rows(result_data) for result_data in removed)
+
+    def take(self) -> Tuple[Dict[str, Dict[str, Dict[str, dict]]], int]:
+        """Get all buffered results and empty the buffer."""
+        with self.lock:
+            # Groups and projects can be empty after results have been removed.
+            results = {
+                project_id: {
+                    group_id: users for group_id, users in groups.items() if users
+                }
+                for project_id, groups in self.results.items()
+                if any(groups.values())
+            }
+            row_count = self.row_count
+            self.results = {}
+            self.row_count = 0
+            self.oldest = None
+        return results, row_count
+
+    def is_due(self, max_rows: int, max_age: float) -> bool:
+        with self.lock:
+            if self.oldest is None:
+                return False
+            return (
+                self.row_count >= max_rows or time.monotonic() - self.oldest >= max_age
+            )
+
+
+def get_active_project_ids() -> List[str]:
+    """Get the ids of projects for which users can submit results."""
+    pg_db = auth.postgresDB()
+    query = """
+        SELECT project_id FROM projects
+        WHERE status IN ('active', 'private_active');
+    """
+    result = pg_db.retr_query(query)
+    del pg_db
+    return [project_id for project_id, in result]
+
+
+class ResultsIngestor:
+    """Listen to new results in Firebase and transfer them in micro-batches."""
+
+    def __init__(self, max_rows: int = 5000, max_age: float = 30):
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.buffer = ResultsBuffer()
+        self.registrations: Dict[str, db.ListenerRegistration] = {}
+        self.flushed_project_ids: Set[str] = set()
+
+    def start(self) -> None:
+        """Start listening to results of active projects."""
+        self.sync_listeners()
+
+    def sync_listeners(self) -> None:
+        """Listen to results of active projects only.
+
+        Listeners are started for projects which have become active
+        and stopped for projects which are not active anymore.
+        """
+        project_ids = set(get_active_project_ids())
+        fb_db = auth.firebaseDB()
+        for project_id in sorted(project_ids.difference(self.registrations)):
+            self.registrations[project_id] = fb_db.reference(
+                f"v2/results/{project_id}"
+            ).listen(partial(self.on_event, project_id))
+        for project_id in set(self.registrations).difference(project_ids):
+            self.registrations.pop(project_id).close()
+        logger.info(
+            f"Listening to results of {len(self.registrations)} projects in Firebase"
+        )
+
+    def stop(self) -> None:
+        for registration in self.registrations.values():
+            registration.close()
+        if self.registrations:
+            self.registrations = {}
+            logger.info("Stopped listening to results in Firebase")
+
+    def on_event(self, project_id: str, event: db.Event) -> None:
+        """Add results of a put or patch event of a project to the buffer.
+
+        Exceptions are reported instead of raised
+        to keep the listener thread alive.
+        """
+        try:
+            if event.event_type not in ("put", "patch"):
+                return
+            parts = [project_id] + [part for part in event.path.split("/") if part]
+            if event.event_type == "put" and len(parts) == 1 and event.data is not None:
+                # The first event after (re)connecting holds all results
+                # of the project which are in Firebase already.
+                # They are transferred page by page by the regular transfer.
+                logger.info(f"{project_id}: Skipped initial snapshot of results")
+                return
+            if event.event_type == "put":
+                items = list(iter_event_results(parts, event.data))
+            else:
+                # Keys of a patch event are paths relative to the event path.
+                items = [
+                    item
+                    for key, value in event.data.items()
+                    for item in iter_event_results(
+                        parts + [part for part in key.split("/") if part], value
+                    )
+                ]
+            for path, result_data in items:
+                if result_data is None:
+                    self.buffer.remove(path)
+                elif isinstance(result_data, dict):
+                    self.buffer.add(*path, result_data)
+        except Exception as e:
+            sentry.capture_exception(e)
+            logger.exception("Could not process results event from Firebase")
+
+    def flush_if_due(self) -> List[str]:
+        if self.buffer.is_due(self.max_rows, self.max_age):
+            return self.flush()
+        return []
+
+    def flush(self) -> List[str]:
+        """Transfer all buffered results to postgres.
+
+        Returns the ids of the projects for which results were transferred.
+        """
+        results, row_count = self.buffer.take()
+        if not results:
+            return []
+
+        transfer_metrics.start_cycle()
+        project_type_per_id = get_projects_from_postgres()
+        project_ids = filter_projects_for_transfer(
+            list(results.keys()), project_type_per_id
+        )
+        # Results of projects with integer results are copied at once.
+        batch = {}
+        for project_id in project_ids:
+            project = ProjectType(project_type_per_id[project_id]).constructor
+            if project.result_type == "integer":
+                batch[project_id] = results[project_id]
+            else:
+                transfer_results_for_project(project_id, results[project_id], project)
+        if batch:
+            transfer_results_batch(batch, project_type_per_id)
+
+        transfer_metrics.end_cycle()
+        self.flushed_project_ids.update(project_ids)
+        logger.info(
+            f"Ingested micro-batch of {row_count} results "
+            f"for {len(project_ids)} projects"
+        )
+        return project_ids
+
+    def take_flushed_project_ids(self) -> List[str]:
+        """Get the projects with results flushed since the last call."""
+        project_ids = list(self.flushed_project_ids)
+        self.flushed_project_ids = set()
+        return project_ids
@@ -0,0 +1,210 @@
+"""Index of valid group and task ids per project.
+
+The app sometimes sets a wrong groupId for results.
+Such results violate the foreign key constraints of mapping_sessions
+and mapping_sessions_results. Results are validated against this index
+(and against the users and user groups in postgres)
+before they are copied to postgres.
+Only the groups referenced by the results are loaded into the index.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import AbstractSet, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from mapswipe_workers import auth
+from mapswipe_workers.config import TASK_INDEX_MAX_TASKS
+from mapswipe_workers.definitions import logger
+
+
+def get_task_index_from_postgres(
+    project_id: str, group_ids: Iterable[str]
+) -> Dict[str, FrozenSet[str]]:
+    """Get the ids of all tasks per group for some groups of a project.
+
+    Groups which do not exist in postgres are not included.
+    """
+    pg_db = auth.postgresDB()
+    query = """
+        SELECT
+            g.group_id,
+            array_remove(array_agg(t.task_id), NULL)
+        FROM groups g
+            LEFT JOIN tasks t USING (project_id, group_id)
+        WHERE g.project_id = %(project_id)s
+            AND g.group_id = ANY(%(group_ids)s)
+        GROUP BY g.group_id
+    """
+    result = pg_db.retr_query(
+        query, {"project_id": project_id, "group_ids": list(group_ids)}
+    )
+    del pg_db
+    return {group_id: frozenset(task_ids) for group_id, task_ids in result}
+
+
+class TaskIndexCache:
+    """Least recently used cache of task indexes.
+
+    Only the groups referenced by results are loaded and cached per project.
+    Projects are evicted once the total number of cached tasks exceeds max_tasks.
+    Groups and tasks of a project do not change after the project was created.
+    Groups which do not exist in postgres are not cached.
+    """
+
+    def __init__(self, max_tasks: int = TASK_INDEX_MAX_TASKS):
+        self.max_tasks = max_tasks
+        self.task_count = 0
+        self.indexes: "OrderedDict[str, Tuple[Dict[str, FrozenSet[str]], int]]" = (
+            OrderedDict()
+        )
+        self.lock = threading.Lock()
+
+    def get(
+        self, project_id: str, group_ids: Iterable[str]
+    ) -> Dict[str, FrozenSet[str]]:
+        """Get the task ids of some groups of a project.
+
+        Groups which are not cached are loaded with a single query.
+        Groups which do not exist in postgres are not included.
+        """
+        group_ids = set(group_ids)
+        with self.lock:
+            cached = self.indexes.get(project_id, ({}, 0))[0]
+            if project_id in self.indexes:
+                self.indexes.move_to_end(project_id)
+            index = {
+                group_id: cached[group_id]
+                for group_id in group_ids
+                if group_id in cached
+            }
+
+        missing_group_ids = group_ids.difference(index)
+        if not missing_group_ids:
+            return index
+
+        loaded = get_task_index_from_postgres(project_id, sorted(missing_group_ids))
+        task_count = sum(len(task_ids) for task_ids in loaded.values())
+        logger.info(
+            f"{project_id}: Loaded index of {len(loaded)} groups "
+            f"and {task_count} tasks"
+        )
+        index.update(loaded)
+        if not loaded:
+            return index
+
+        with self.lock:
+            cached, cached_task_count = self.indexes.get(project_id, ({}, 0))
+            for group_id, task_ids in loaded.items():
+                if group_id not in cached:
+                    cached[group_id] = task_ids
+                    cached_task_count += len(task_ids)
+                    self.task_count += len(task_ids)
+            self.indexes[project_id] = (cached, cached_task_count)
+            self.indexes.move_to_end(project_id)
+            # A project with more than max_tasks cached tasks is not kept either.
+            while self.task_count > self.max_tasks:
+                _, (_, evicted_task_count) = self.indexes.popitem(last=False)
+                self.task_count -= evicted_task_count
+        return index
+
+    def clear(self) -> None:
+        with self.lock:
+            self.indexes.clear()
+            self.task_count = 0
+
+
+task_index_cache = TaskIndexCache()
+
+
+def filter_invalid_results(
+    project_id: str,
+    results: dict,
+    task_index: Optional[dict] = None,
+    user_ids: Optional[AbstractSet[str]] = None,
+    user_group_ids: Optional[AbstractSet[str]] = None,
+) -> Tuple[dict, int]:
+    """Remove results for groups, tasks or users which do not exist in postgres.
+
+    Returns the valid results and the number of removed task results.
+    The given results are not modified.
+    Results for groups which do not exist in postgres are removed,
+    since they can never be copied to postgres.
+    This also applies if the project has no groups in postgres at all.
+    If user_ids are given, results of all other users are removed.
+    If user_group_ids are given, all other user groups are removed
+    from the results. The task results are kept in this case.
+    """
+    if not results:
+        return results, 0
+    if task_index is None:
+        task_index = task_index_cache.get(project_id, results.keys())
+
+    valid_results = {}
+    invalid_count = 0
+    invalid_user_group_count = 0
+    for group_id, users in results.items():
+        task_ids = task_index.get(group_id)
+        if task_ids is None:
+            for result_data in users.values():
+                invalid_count += len(result_data.get("results") or [])
+            continue
+
+        valid_results[group_id] = {}
+        for user_id, result_data in users.items():
+            _results = result_data.get("results")
+            if user_ids is not None and user_id not in user_ids:
+                invalid_count += len(_results or [])
+                continue
+
+            if user_group_ids is not None and result_data.get("userGroups"):
+                valid_user_groups = {
+                    user_group_id: is_selected
+                    for user_group_id, is_selected in result_data["userGroups"].items()
+                    if user_group_id in user_group_ids
+                }
+                invalid_user_group_count += len(result_data["userGroups"]) - len(
+                    valid_user_groups
+                )
+                result_data = {**result_data, "userGroups": valid_user_groups}
+
+            if _results is None:
+                # Incomplete results are handled in results_to_file.
+                valid_results[group_id][user_id] = result_data
+                continue
+            elif isinstance(_results, dict):
+                valid_task_results = {
+                    task_id: result
+                    for task_id, result in _results.items()
+                    if task_id in task_ids
+                }
+                invalid_count += len(_results) - len(valid_task_results)
+            elif isinstance(_results, list):
+                # Results with integer keys are returned as list by Firebase.
+                # Invalid tasks are set to None like missing list indices.
+                valid_task_results = [
+                    result if str(task_id) in task_ids else None
+                    for task_id, result in enumerate(_results)
+                ]
+                invalid_count += sum(
+                    1
+                    for result, valid_result in zip(_results, valid_task_results)
+                    if result is not None and valid_result is None
+                )
+            else:
+                valid_task_results = _results
+            valid_results[group_id][user_id] = {
+                **result_data,
+                "results": valid_task_results,
+            }
+
+    if invalid_count > 0:
+        logger.warning(
+            f"{project_id}: removed {invalid_count} results "
+            "for groups, tasks or users which do not exist in postgres."
+        )
+    if invalid_user_group_count > 0:
+        logger.warning(
+            f"{project_id}: removed {invalid_user_group_count} user groups "
+            "which do not exist in postgres from results."
+        )
+    return valid_results, invalid_count
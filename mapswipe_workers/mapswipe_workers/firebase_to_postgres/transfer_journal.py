@@ -0,0 +1,107 @@
+"""Journal of results which are committed to postgres.
+
+Results are deleted from Firebase only after they have been committed
+to postgres. If the worker dies in between, the results would be
+downloaded and copied to postgres again in the next run.
+To avoid this, the group/user keys of results are written to a journal file
+per project before the results are committed to postgres.
+On restart the journaled keys for which a mapping session exists in postgres
+are deleted from Firebase right away. The results of all other keys
+have not been committed and are transferred again.
+
+The journal is stored in DATA_PATH which is persisted between container runs.
+"""
+
+import os
+from typing import Dict, Iterable, List
+
+from mapswipe_workers import auth
+from mapswipe_workers.definitions import DATA_PATH
+
+JOURNAL_PATH = os.path.join(DATA_PATH, "transfer_journal")
+
+
+def get_journal_file(project_id: str) -> str:
+    return os.path.join(JOURNAL_PATH, f"{project_id}.txt")
+
+
+def get_result_keys(results: dict) -> List[str]:
+    """Get the group/user keys of results as used for multi-location updates."""
+    return [
+        f"{group_id}/{user_id}"
+        for group_id, users in results.items()
+        for user_id in users.keys()
+    ]
+
+
+def record_result_keys(project_id: str, keys: Iterable[str]) -> None:
+    """Append keys of results to the journal of the project before COMMIT.
+
+    The file is synced to disk before returning,
+    so that the keys are not lost if the worker dies after the COMMIT.
+    """
+    os.makedirs(JOURNAL_PATH, exist_ok=True)
+    with open(get_journal_file(project_id), "a") as f:
+        f.writelines(f"{key}\n" for key in keys)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def get_journaled_keys(project_id: str) -> List[str]:
+    """Get the journaled keys of a project.
+
+    An incomplete last line (worker died while writing)
+    is ignored. These results will be transferred again.
+    """
+    try:
+        with open(get_journal_file(project_id)) as f:
+            lines = f.read().split("\n")
+    except FileNotFoundError:
+        return []
+    # The last element is either empty or an incomplete line.
+    return [key for key in lines[:-1] if key]
+
+
+def get_pending_journals() -> Dict[str, List[str]]:
+    """Get the journaled keys of all projects with a journal file."""
+    if not os.path.isdir(JOURNAL_PATH):
+        return {}
+    pending = {}
+    for file_name in sorted(os.listdir(JOURNAL_PATH)):
+        project_id, extension = os.path.splitext(file_name)
+        if extension != ".txt":
+            continue
+        pending[project_id] = get_journaled_keys(project_id)
+    return pending
+
+
+def clear_journal(project_id: str) -> None:
+    """Remove the journal of a project after results were deleted from Firebase."""
+    try:
+        os.remove(get_journal_file(project_id))
+    except FileNotFoundError:
+        pass
+
+
+def filter_committed_keys(project_id: str, keys: List[str]) -> List[str]:
+    """Get the keys for which a mapping session has been committed to postgres."""
+    if not keys:
+        return []
+    pg_db = auth.postgresDB()
+    query = """
+        SELECT k.key
+        FROM unnest(%(keys)s::varchar[]) AS k(key)
+        WHERE EXISTS (
+            SELECT 1
+            FROM mapping_sessions ms
+            WHERE ms.project_id = %(project_id)s
+                AND ms.group_id = split_part(k.key, '/', 1)
+                AND ms.user_id = split_part(k.key, '/', 2)
+        )
+    """
+    committed_keys = {
+        key
+        for key, in pg_db.retr_query(query, {"project_id": project_id, "keys": keys})
+    }
+    del pg_db
+    return [key for key in keys if key in committed_keys]
@@ -0,0 +1,168 @@
+"""Timing metrics for the stages of the results transfer.
+
+For each project durations, row counts and bytes are recorded per stage:
+fetch, users, filter, write, copy, insert, user_groups_copy,
+user_groups_insert and delete.
+At the end of a transfer cycle a summary line is logged
+and the metrics are written to a Prometheus text file.
+The file can be picked up by the textfile collector of the node exporter.
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from mapswipe_workers.config import TRANSFER_METRICS_FILE
+from mapswipe_workers.definitions import DATA_PATH, logger
+
+METRICS_FILE = TRANSFER_METRICS_FILE or os.path.join(
+    DATA_PATH, "metrics", "transfer_results.prom"
+)
+
+STAGES = [
+    "fetch",
+    "users",
+    "filter",
+    "write",
+    "copy",
+    "insert",
+    "user_groups_copy",
+    "user_groups_insert",
+    "delete",
+]
+
+METRICS = {
+    "duration": (
+        "mapswipe_transfer_stage_duration_seconds",
+        "Duration of a stage of the results transfer.",
+    ),
+    "rows": (
+        "mapswipe_transfer_stage_rows",
+        "Number of rows (task results, users or keys) handled by a stage.",
+    ),
+    "bytes": (
+        "mapswipe_transfer_stage_bytes",
+        "Number of bytes handled by a stage.",
+    ),
+}
+
+
+class StageMetrics:
+    def __init__(self):
+        self.duration = 0.0
+        self.rows = 0
+        self.bytes = 0
+
+    def add(self, other: "StageMetrics") -> None:
+        self.duration += other.duration
+        self.rows += other.rows
+        self.bytes += other.bytes
+
+
+class TransferMetrics:
+    """Thread-safe collection of stage metrics per project and cycle."""
+
+    def __init__(self, metrics_file: Optional[str] = METRICS_FILE):
+        self.metrics_file = metrics_file
+        self.lock = threading.Lock()
+        self.cycle: Dict[Tuple[str, str], StageMetrics] = defaultdict(StageMetrics)
+        self.totals: Dict[str, StageMetrics] = defaultdict(StageMetrics)
+        self.cycle_start: Optional[float] = None
+        self.cycle_count = 0
+
+    @contextmanager
+    def stage(self, project_id: Optional[str], name: str) -> Iterator[StageMetrics]:
+        """Measure the duration of a stage.
+
+        Rows and bytes can be set on the yielded StageMetrics.
+        Results of several projects which are transferred at once
+        are recorded for the project "batch".
+        """
+        metrics = StageMetrics()
+        start = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            metrics.duration = time.perf_counter() - start
+            with self.lock:
+                self.cycle[(project_id or "batch", name)].add(metrics)
+                self.totals[name].add(metrics)
+
+    def start_cycle(self) -> None:
+        with self.lock:
+            self.cycle = defaultdict(StageMetrics)
+            self.cycle_start = time.perf_counter()
+
+    def end_cycle(self) -> None:
+        """Log a summary of the cycle and write the metrics file."""
+        with self.lock:
+            if self.cycle_start is None:
+                return
+            duration = time.perf_counter() - self.cycle_start
+            self.cycle_start = None
+            self.cycle_count += 1
+            stages: Dict[str, StageMetrics] = defaultdict(StageMetrics)
+            for (_, name), metrics in self.cycle.items():
+                stages[name].add(metrics)
+            project_count = len(set(project_id for project_id, _ in self.cycle.keys()))
+            text = self.to_prometheus(duration)
+
+        summary = ", ".join(
+            f"{name} {stages[name].duration:.1f}s" for name in STAGES if name in stages
+        )
+        logger.info(
+            f"Transfer cycle: {project_count} projects, "
+            f"{stages['write'].rows if 'write' in stages else 0} results "
+            f"in {duration:.1f}s ({summary})"
+        )
+        if self.metrics_file:
+            self.write(text)
+
+    def to_prometheus(self, cycle_duration: float) -> str:
+        """Format the metrics of the last cycle in the Prometheus text format."""
+        lines = []
+        for attribute, (metric, help_text) in METRICS.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for (project_id, name), metrics in sorted(self.cycle.items()):
+                lines.append(
+                    f'{metric}{{project_id="{project_id}",stage="{name}"}} '
+                    f"{getattr(metrics, attribute)}"
+                )
+            lines.append(f"# HELP {metric}_total {help_text} Summed over cycles.")
+            lines.append(f"# TYPE {metric}_total counter")
+            for name, metrics in sorted(self.totals.items()):
+                lines.append(
+                    f'{metric}_total{{stage="{name}"}} {getattr(metrics, attribute)}'
+                )
+        lines += [
+            "# HELP mapswipe_transfer_cycle_duration_seconds "
+            "Duration of the last transfer cycle.",
+            "# TYPE mapswipe_transfer_cycle_duration_seconds gauge",
+            f"mapswipe_transfer_cycle_duration_seconds {cycle_duration}",
+            "# HELP mapswipe_transfer_cycles_total Number of transfer cycles.",
+            "# TYPE mapswipe_transfer_cycles_total counter",
+            f"mapswipe_transfer_cycles_total {self.cycle_count}",
+            "# HELP mapswipe_transfer_cycle_timestamp_seconds "
+            "End of the last transfer cycle.",
+            "# TYPE mapswipe_transfer_cycle_timestamp_seconds gauge",
+            f"mapswipe_transfer_cycle_timestamp_seconds {time.time()}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, text: str) -> None:
+        """Replace the metrics file atomically."""
+        try:
+            os.makedirs(os.path.dirname(self.metrics_file), exist_ok=True)
+            tmp_file = f"{self.metrics_file}.tmp"
+            with open(tmp_file, "w") as f:
+                f.write(text)
+            os.replace(tmp_file, self.metrics_file)
+        except OSError:
+            logger.exception(f"Could not write metrics to {self.metrics_file}")
+
+
+transfer_metrics = TransferMetrics()
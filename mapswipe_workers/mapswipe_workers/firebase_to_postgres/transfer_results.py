@@ -1,23 +1,59 @@
+import concurrent.futures
 import csv
+import datetime as dt
 import io
-from typing import List, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
 
 import dateutil.parser
 import geojson
 import psycopg2
+from firebase_admin import exceptions
 
 from mapswipe_workers import auth
+from mapswipe_workers.config import RESULTS_COPY_FORMAT
 from mapswipe_workers.definitions import ProjectType, logger, sentry
-from mapswipe_workers.firebase_to_postgres import update_data
+from mapswipe_workers.firebase.delete import delete_keys
+from mapswipe_workers.firebase_to_postgres import transfer_journal, update_data
+from mapswipe_workers.firebase_to_postgres.task_index import filter_invalid_results
+from mapswipe_workers.firebase_to_postgres.transfer_metrics import transfer_metrics
+from mapswipe_workers.utils.pg_binary_copy import BinaryCopyWriter
 
+FILE_SIZE_CHUNK = 1_048_576
 
-def transfer_results(project_id_list: List[str] = None) -> List[str]:
+
+def transfer_results(
+    project_id_list: List[str] = None,
+    stream: bool = False,
+    page_size: int = 500,
+    max_workers: int = 1,
+    batch_size: int = 0,
+) -> List[str]:
     """Transfer results for one project after the other.
     Will only trigger the transfer of results for projects
     that are defined in the postgres database.
     Will not transfer results for tutorials and
     for projects which are not set up in postgres.
+
+    If stream is set, results of a project are not downloaded at once
+    but in pages of at most page_size groups (see transfer_results_in_pages).
+
+    If max_workers is larger than 1, projects are transferred in parallel threads.
+    Each worker uses its own postgres connection
+    and session temp tables (see transfer_results_worker).
+
+    If batch_size is larger than 0, results of projects with only a few
+    results are copied to postgres together (see transfer_results_in_batches).
+    Batches can not be combined with stream or max_workers.
+
+    Results which have been committed to postgres in a previous run
+    but not deleted from Firebase are deleted first (see transfer_journal).
     """
+    if batch_size > 0 and (stream or max_workers > 1):
+        raise ValueError("batch_size can not be combined with stream or max_workers")
+
+    transfer_metrics.start_cycle()
+    resume_journaled_deletes()
+
     if project_id_list is None:
         # get project_ids from existing results if no project ids specified
         fb_db = auth.firebaseDB()
@@ -29,7 +65,57 @@ def transfer_results(project_id_list: List[str] = None) -> List[str]:
     # Get all project ids from postgres.
     # We will only transfer results for projects we have in postgres.
     project_type_per_id = get_projects_from_postgres()
+    project_id_list_transfered = filter_projects_for_transfer(
+        project_id_list, project_type_per_id
+    )
+
+    if max_workers > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    transfer_results_worker,
+                    project_id,
+                    ProjectType(project_type_per_id[project_id]).constructor,
+                    stream,
+                    page_size,
+                ): project_id
+                for project_id in project_id_list_transfered
+            }
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    sentry.capture_exception(e)
+                    logger.exception(
+                        f"{futures[future]}: transfer results worker failed"
+                    )
+    elif batch_size > 0:
+        transfer_results_in_batches(
+            project_id_list_transfered, project_type_per_id, batch_size
+        )
+    else:
+        for project_id in project_id_list_transfered:
+            logger.info(f"{project_id}: Start transfer results")
+            project = ProjectType(project_type_per_id[project_id]).constructor
 
+            if stream:
+                transfer_results_in_pages(project_id, project, page_size)
+            else:
+                results = get_results_from_firebase(project_id)
+                transfer_results_for_project(project_id, results, project)
+
+    transfer_metrics.end_cycle()
+    return project_id_list_transfered
+
+
+def filter_projects_for_transfer(
+    project_id_list: List[str], project_type_per_id: dict
+) -> List[str]:
+    """Get the projects for which results can be transferred.
+
+    Results are only transferred for projects which are in postgres
+    and which are not tutorials.
+    """
     project_id_list_transfered = []
     for project_id in project_id_list:
         if project_id not in project_type_per_id.keys():
@@ -45,21 +131,225 @@ def transfer_results(project_id_list: List[str] = None) -> List[str]:
             )
             continue
         else:
-            logger.info(f"{project_id}: Start transfer results")
-            fb_db = auth.firebaseDB()
-            results_ref = fb_db.reference(f"v2/results/{project_id}")
-            results = results_ref.get()
-            del fb_db
-            project = ProjectType(project_type_per_id[project_id]).constructor
+            project_id_list_transfered.append(project_id)
+    return project_id_list_transfered
+
+
+def transfer_results_in_batches(
+    project_id_list: List[str], project_type_per_id: dict, batch_size: int
+) -> None:
+    """Transfer results of many small projects at once.
+
+    Results of projects with less than batch_size task results are collected
+    until the batch holds batch_size task results. The batch is then
+    copied to postgres using a single connection, COPY and INSERT
+    (see transfer_results_batch). Projects with more task results
+    or with results which are not integers are transferred on their own.
+    """
+    batch: Dict[str, dict] = {}
+    batch_task_count = 0
+    for project_id in project_id_list:
+        logger.info(f"{project_id}: Start transfer results")
+        project = ProjectType(project_type_per_id[project_id]).constructor
 
+        results = get_results_from_firebase(project_id)
+        if results is None:
+            logger.info(f"{project_id}: No results in Firebase")
+            continue
+
+        task_count = count_task_results(results)
+        if project.result_type != "integer" or task_count >= batch_size:
             transfer_results_for_project(project_id, results, project)
-            project_id_list_transfered.append(project_id)
+            continue
 
-    return project_id_list_transfered
+        batch[project_id] = results
+        batch_task_count += task_count
+        if batch_task_count >= batch_size:
+            transfer_results_batch(batch, project_type_per_id)
+            batch = {}
+            batch_task_count = 0
+
+    if batch:
+        transfer_results_batch(batch, project_type_per_id)
+
+
+def transfer_results_batch(
+    results_per_project: Dict[str, dict], project_type_per_id: dict
+) -> None:
+    """Transfer the results of several projects with integer results at once.
+
+    Firebase deletes are still done (and journaled) per project.
+    If the batch can not be copied to postgres,
+    the results are transferred project by project.
+    """
+    logger.info(f"Transfer results of {len(results_per_project)} projects at once")
+    user_ids, user_group_ids = update_users_from_results(
+        list(results_per_project.values())
+    )
+
+    p_con = auth.postgresDB()
+    try:
+        with transfer_metrics.stage(None, "filter"):
+            valid_results_per_project = {
+                project_id: filter_invalid_results(
+                    project_id,
+                    results,
+                    user_ids=user_ids,
+                    user_group_ids=user_group_ids,
+                )[0]
+                for project_id, results in results_per_project.items()
+            }
+        results_file, user_group_results_file = results_of_projects_to_file(
+            valid_results_per_project
+        )
+        truncate_temp_user_groups_results(p_con=p_con)
+        truncate_temp_results(p_con=p_con)
+        for project_id, results in results_per_project.items():
+            record_result_keys(project_id, results)
+        save_results_to_postgres(results_file, None, p_con=p_con)
+        save_user_group_results_to_postgres(user_group_results_file, None, p_con=p_con)
+    except Exception as e:
+        p_con.query("ROLLBACK")
+        sentry.capture_exception(e)
+        logger.exception(e)
+        logger.warning(
+            "could not transfer results batch to postgres. "
+            "Transfer results project by project instead."
+        )
+        for project_id, results in results_per_project.items():
+            project = ProjectType(project_type_per_id[project_id]).constructor
+            transfer_results_for_project(project_id, results, project)
+    else:
+        for project_id, results in results_per_project.items():
+            delete_transferred_results(project_id, results)
+            logger.info(f"{project_id}: Transferred results to postgres")
+
+
+def transfer_results_worker(
+    project_id: str, project, stream: bool = False, page_size: int = 500
+) -> None:
+    """Transfer the results for a specific project using a dedicated connection.
+
+    The shared temp tables (results_temp, results_geometry_temp
+    and results_user_groups_temp) are shadowed by session temp tables
+    with the same name. Hence, several workers (or containers)
+    can transfer results at the same time without clobbering each other.
+    The session temp tables are dropped when the connection is closed.
+    """
+    logger.info(f"{project_id}: Start transfer results")
+    p_con = auth.postgresDB()
+    create_session_temp_tables(p_con)
+
+    if stream:
+        transfer_results_in_pages(project_id, project, page_size, p_con=p_con)
+    else:
+        results = get_results_from_firebase(project_id)
+        transfer_results_for_project(project_id, results, project, p_con=p_con)
+    del p_con
+
+
+def create_session_temp_tables(p_con: auth.postgresDB) -> None:
+    """Create session temp tables which shadow the shared results temp tables.
+
+    Temp tables live in the pg_temp schema which comes first in the search path.
+    All queries using this connection will use these tables instead.
+    """
+    query = """
+        CREATE TEMP TABLE IF NOT EXISTS results_temp
+            (LIKE public.results_temp);
+        CREATE TEMP TABLE IF NOT EXISTS results_geometry_temp
+            (LIKE public.results_geometry_temp);
+        CREATE TEMP TABLE IF NOT EXISTS results_user_groups_temp
+            (LIKE public.results_user_groups_temp);
+    """
+    p_con.query(query)
+
+
+def firebase_key_order(key: str) -> Tuple[int, int, str]:
+    """Sort key which mimics the key ordering of the Firebase Realtime Database.
+
+    Keys that can be parsed as 32-bit integers come first (sorted numerically),
+    all other keys follow sorted lexicographically.
+    """
+    try:
+        number = int(key)
+    except ValueError:
+        return 1, 0, key
+    if str(number) == key and -(2**31) <= number < 2**31:
+        return 0, number, ""
+    return 1, 0, key
+
+
+def get_results_from_firebase(project_id: str) -> Optional[dict]:
+    """Get all results of a project from Firebase."""
+    with transfer_metrics.stage(project_id, "fetch") as metrics:
+        fb_db = auth.firebaseDB()
+        results_ref = fb_db.reference(f"v2/results/{project_id}")
+        results = results_ref.get()
+        del fb_db
+        if results:
+            metrics.rows = count_task_results(results)
+    return results
+
+
+def get_results_pages(project_id: str, page_size: int = 500) -> Iterator[dict]:
+    """Yield the results of a project in pages of at most page_size groups.
+
+    The group ids are retrieved with a shallow read first.
+    Then results are queried in key order for one range of group ids at a time.
+    Only the results of a single page are held in memory.
+    """
+    fb_db = auth.firebaseDB()
+    results_ref = fb_db.reference(f"v2/results/{project_id}")
+    group_ids = results_ref.get(shallow=True)
+    if not group_ids:
+        return
+
+    group_ids = sorted(group_ids.keys(), key=firebase_key_order)
+    logger.info(f"{project_id}: Got {len(group_ids)} groups with results")
+    for i in range(0, len(group_ids), page_size):
+        page_group_ids = group_ids[i : i + page_size]  # noqa E203
+        with transfer_metrics.stage(project_id, "fetch") as metrics:
+            page = (
+                results_ref.order_by_key()
+                .start_at(page_group_ids[0])
+                .end_at(page_group_ids[-1])
+                .get()
+            )
+            if page:
+                metrics.rows = count_task_results(page)
+        if page:
+            yield dict(page)
+
+
+def transfer_results_in_pages(
+    project_id: str,
+    project,
+    page_size: int = 500,
+    p_con: Optional[auth.postgresDB] = None,
+) -> None:
+    """Transfer the results for a specific project page by page.
+
+    Each page is copied to postgres and then deleted from Firebase
+    before the next page is downloaded. Hence, peak memory usage
+    depends on page_size and not on the number of results in Firebase.
+    If the transfer of a page fails, only this page remains in Firebase.
+    """
+    page_count = 0
+    for results in get_results_pages(project_id, page_size):
+        page_count += 1
+        logger.info(f"{project_id}: Transfer results page {page_count}")
+        transfer_results_for_project(project_id, results, project, p_con=p_con)
+
+    if page_count == 0:
+        logger.info(f"{project_id}: No results in Firebase")
 
 
 def transfer_results_for_project(
-    project_id: str, results: dict, project, filter_mode: bool = False
+    project_id: str,
+    results: dict,
+    project,
+    p_con: Optional[auth.postgresDB] = None,
 ) -> None:
     """Transfer the results for a specific project.
     Save results into an in-memory file.
@@ -79,72 +369,77 @@ def transfer_results_for_project(
     e.g. without using threading. Threading should be avoided here
     as well to not run into unforeseen errors.
     For more details see issue #478.
+
+    Results for groups, tasks or users which do not exist in postgres
+    and user groups which do not exist in postgres are removed
+    before the results are copied (see task_index.filter_invalid_results).
+    They are deleted from Firebase together with the valid results.
+
+    If a postgres connection (p_con) is given, it is used for all
+    queries on the results temp tables. Otherwise a new connection is used.
+    If the transfer fails, the transaction of this connection is rolled back,
+    so that the connection can be used for the next transfer.
     """
 
+    if p_con is None:
+        p_con = auth.postgresDB()
+    user_ids = user_group_ids = None
     if results is None:
         logger.info(f"{project_id}: No results in Firebase")
     else:
         # First we check for new users in Firebase.
         # The user_id is used as a key in the postgres database for the results
         # and thus users need to be inserted before results get inserted.
-        results_user_id_list = get_user_ids_from_results(results)
-        results_user_group_id_list = list(
-            set(
-                [
-                    user_group_id
-                    for _, users in results.items()
-                    for _, _results in users.items()
-                    for user_group_id, is_selected in _results.get(
-                        "userGroups", {}
-                    ).items()
-                    if is_selected
-                ]
-            )
-        )
-        update_data.update_user_data(results_user_id_list)
-        if results_user_group_id_list:
-            update_data.update_user_group_data(results_user_group_id_list)
+        user_ids, user_group_ids = update_users_from_results([results], project_id)
 
     try:
+        # Results for which the app has set a group or task id
+        # or for users or user groups which are not in postgres
+        # would violate foreign key constraints.
+        with transfer_metrics.stage(project_id, "filter"):
+            valid_results, _ = filter_invalid_results(
+                project_id,
+                results,
+                user_ids=user_ids,
+                user_group_ids=user_group_ids,
+            )
+
         # Results are dumped into an in-memory file.
         # This allows us to use the COPY statement to insert many
         # results at relatively high speed.
 
-        truncate_temp_user_groups_results()
+        truncate_temp_user_groups_results(p_con=p_con)
 
+        record_result_keys(project_id, results)
         user_group_results_file = project.results_to_postgres(
-            results, project_id, filter_mode=filter_mode
+            valid_results, project_id, p_con=p_con
         )
 
         save_user_group_results_to_postgres(
-            user_group_results_file, project_id, filter_mode=filter_mode
+            user_group_results_file, project_id, p_con=p_con
         )
     except psycopg2.errors.ForeignKeyViolation as e:
         # if we get here, we were in the middle of a transaction block
         # that failed because of a constraint trigger. To allow new commands
         # to be issued to postgres, we need to ROLLBACK first.
-        p_con = auth.postgresDB()
         p_con.query("ROLLBACK")
 
         sentry.capture_exception(e)
         sentry.capture_message(
             "could not transfer results to postgres due to ForeignKeyViolation: "
-            f"{project_id}; filter_mode={filter_mode}"
+            f"{project_id}"
         )
         logger.exception(e)
         logger.warning(
             "could not transfer results to postgres due to ForeignKeyViolation: "
-            f"{project_id}; filter_mode={filter_mode}"
+            f"{project_id}"
         )
 
-        # There is an exception where additional invalid tasks are in a group.
-        # If that happens we arrive here and add the flag filtermode=true
-        # to this function, which could solve the issue in save_results_to_postgres.
-        # If it does not solve the issue we arrive again but
-        # since filtermode is already true, we will not try to transfer results again.
-        if not filter_mode:
-            transfer_results_for_project(project_id, results, project, filter_mode=True)
+        # Invalid group, task, user and user group ids have been removed already.
+        # The results will remain in Firebase and are transferred in the next run.
     except Exception as e:
+        # A failed query (e.g. COPY) leaves the transaction aborted.
+        p_con.query("ROLLBACK")
         sentry.capture_exception(e)
         sentry.capture_message(f"could not transfer results to postgres: {project_id}")
         logger.exception(e)
@@ -154,29 +449,139 @@ def transfer_results_for_project(
         # and then delete these results from Firebase.
         # In case something goes wrong during the insert, results in Firebase
         # will not get deleted.
-        delete_results_from_firebase(project_id, results)
+        delete_transferred_results(project_id, results)
         logger.info(f"{project_id}: Transferred results to postgres")
 
 
+def update_users_from_results(
+    results_of_projects: List[dict], project_id: Optional[str] = None
+) -> Tuple[Set[str], Set[str]]:
+    """Insert new users and user groups of the results into postgres.
+
+    Returns the ids of the users and of the user groups of the results
+    which exist in postgres afterwards.
+    The project_id is only used for metrics.
+    """
+    results_user_id_list = list(
+        set(
+            user_id
+            for results in results_of_projects
+            for user_id in get_user_ids_from_results(results)
+        )
+    )
+    results_user_group_id_list = list(
+        set(
+            [
+                user_group_id
+                for results in results_of_projects
+                for _, users in results.items()
+                for _, _results in users.items()
+                for user_group_id, is_selected in _results.get("userGroups", {}).items()
+                if is_selected
+            ]
+        )
+    )
+    with transfer_metrics.stage(project_id, "users") as metrics:
+        metrics.rows = len(results_user_id_list)
+        update_data.update_user_data(results_user_id_list)
+        if results_user_group_id_list:
+            update_data.update_user_group_data(results_user_group_id_list)
+
+        pg_db = auth.postgresDB()
+        missing_user_ids = update_data.get_new_ids(
+            pg_db, results_user_id_list, "users", "user_id"
+        )
+        missing_user_group_ids = update_data.get_new_ids(
+            pg_db, results_user_group_id_list, "user_groups", "user_group_id"
+        )
+        del pg_db
+    return (
+        set(results_user_id_list).difference(missing_user_ids),
+        set(results_user_group_id_list).difference(missing_user_group_ids),
+    )
+
+
+def record_result_keys(project_id: str, results: dict) -> None:
+    """Journal the keys of results before they are committed to postgres.
+
+    If the worker dies after the COMMIT but before the delete in Firebase,
+    the results are deleted in the next run (see resume_journaled_deletes).
+    """
+    transfer_journal.record_result_keys(
+        project_id, transfer_journal.get_result_keys(results)
+    )
+
+
+def delete_transferred_results(project_id: str, results: dict) -> None:
+    """Delete results which have been committed to postgres from Firebase.
+
+    The keys have been journaled before the COMMIT (see record_result_keys).
+    """
+    keys = transfer_journal.get_result_keys(results)
+    try:
+        delete_result_keys_from_firebase(project_id, keys)
+    except exceptions.FirebaseError as e:
+        # Results are in postgres already. Keys which could not be deleted
+        # stay in the journal and are deleted in the next run.
+        sentry.capture_exception(e)
+        logger.exception(e)
+        logger.warning(f"{project_id}: could not delete results from firebase")
+    else:
+        transfer_journal.clear_journal(project_id)
+
+
+def resume_journaled_deletes() -> None:
+    """Delete results from Firebase which are already committed to postgres.
+
+    These results have been journaled in a previous run
+    which did not finish the delete in Firebase.
+    They are not downloaded or copied to postgres again.
+    Journaled results without a mapping session in postgres
+    have not been committed and are transferred again.
+    If the delete fails, the journal is kept for the next run.
+    """
+    for project_id, keys in transfer_journal.get_pending_journals().items():
+        try:
+            keys = transfer_journal.filter_committed_keys(project_id, keys)
+            if keys:
+                logger.info(
+                    f"{project_id}: Delete {len(keys)} journaled results "
+                    "from Firebase"
+                )
+                delete_result_keys_from_firebase(project_id, keys)
+        except (exceptions.FirebaseError, psycopg2.Error) as e:
+            sentry.capture_exception(e)
+            logger.exception(e)
+            logger.warning(
+                f"{project_id}: could not delete journaled results from firebase"
+            )
+            continue
+        transfer_journal.clear_journal(project_id)
+
+
 def delete_results_from_firebase(project_id: str, results: dict) -> None:
-    """Delete results from Firebase using update function.
+    """Delete results from Firebase using update function."""
+    delete_result_keys_from_firebase(
+        project_id, transfer_journal.get_result_keys(results)
+    )
+
+
+def delete_result_keys_from_firebase(project_id: str, keys: List[str]) -> None:
+    """Delete results given as group/user keys from Firebase.
     We use the update method of firebase instead of delete.
     Update allows to delete items at multiple locations at the same time
     and is much faster.
+    Keys are split into chunks to stay below the maximum write size
+    of Firebase and chunks are deleted concurrently (see firebase.delete).
+    If a chunk fails the keys remain in the transfer journal
+    and are deleted in the next run.
     """
 
-    fb_db = auth.firebaseDB()
-
-    # we will use a multi-location update to delete the entries
-    # therefore we create a dict with the items we want to delete
-    data = {}
-    for group_id, users in results.items():
-        for user_id, result in users.items():
-            key = f"{group_id}/{user_id}"
-            data[key] = None
-
-    results_ref = fb_db.reference(f"v2/results/{project_id}/")
-    results_ref.update(data)
+    with transfer_metrics.stage(project_id, "delete") as metrics:
+        metrics.rows = len(keys)
+        fb_db = auth.firebaseDB()
+        results_ref = fb_db.reference(f"v2/results/{project_id}/")
+        delete_keys(results_ref, keys)
 
     logger.info(f"removed results for project {project_id}")
 
@@ -210,9 +615,28 @@ def results_complete(
     return complete
 
 
+def parse_timestamp(timestamp: str) -> dt.datetime:
+    """Parse a timestamp in the format set by the app: YYYY-MM-DDTHH:MM:SS.fffZ
+
+    This is much faster than dateutil.parser.parse.
+    Raises a ValueError for timestamps in any other format.
+    """
+    if (
+        len(timestamp) != 24
+        or timestamp[10] != "T"
+        or timestamp[19] != "."
+        or timestamp[23] != "Z"
+    ):
+        raise ValueError(f"Unexpected timestamp format: {timestamp}")
+    return dt.datetime.fromisoformat(timestamp[:23]).replace(tzinfo=dt.timezone.utc)
+
+
 def results_to_file(
-    results: dict, projectId: str, result_type: str = "integer"
-) -> Tuple[io.StringIO, io.StringIO]:
+    results: dict,
+    projectId: str,
+    result_type: str = "integer",
+    copy_format: str = RESULTS_COPY_FORMAT,
+) -> Tuple[Union[io.StringIO, io.BytesIO], Union[io.StringIO, io.BytesIO]]:
     """
     Writes results to an in-memory file like object
     formatted as a csv using the buffer module (StringIO).
@@ -223,22 +647,79 @@ def results_to_file(
     ----------
     results: dict
         The results as retrieved from the Firebase Realtime Database instance.
+    copy_format: str
+        If set to "binary", the results are written in the binary
+        format of the COPY statement into BytesIO buffers instead.
+        Postgres then does not need to parse timestamps and integers.
     Returns
     -------
     results_file: io.StingIO
         The results in an StringIO buffer.
     """
-    # If csv file is a file object, it should be opened with newline=''
+    return results_of_projects_to_file(
+        {projectId: results}, result_type=result_type, copy_format=copy_format
+    )
+
+
+def results_of_projects_to_file(
+    results_per_project: Dict[str, dict],
+    result_type: str = "integer",
+    copy_format: str = RESULTS_COPY_FORMAT,
+) -> Tuple[Union[io.StringIO, io.BytesIO], Union[io.StringIO, io.BytesIO]]:
+    """Write the results of several projects into the same in-memory files.
+
+    See results_to_file. The results of many projects
+    can then be copied to postgres with a single COPY statement.
+    """
+    if copy_format == "binary":
+        results_file = io.BytesIO()
+        user_group_results_file = io.BytesIO()
+
+        result_column_type = "text" if result_type == "geometry" else "int4"
+        w = BinaryCopyWriter(
+            results_file,
+            ["text"] * 4 + ["timestamp"] * 3 + [result_column_type],
+        )
+        user_group_results_csv = BinaryCopyWriter(user_group_results_file, ["text"] * 4)
+    elif copy_format == "text":
+        # If csv file is a file object, it should be opened with newline=''
+        results_file = io.StringIO("")
+        user_group_results_file = io.StringIO("")
 
-    results_file = io.StringIO("")
-    user_group_results_file = io.StringIO("")
+        w = csv.writer(results_file, delimiter="\t", quotechar="'")
+        user_group_results_csv = csv.writer(
+            user_group_results_file, delimiter="\t", quotechar="'"
+        )
+    else:
+        raise ValueError(f"Unknown copy format: {copy_format}")
 
-    w = csv.writer(results_file, delimiter="\t", quotechar="'")
-    user_group_results_csv = csv.writer(
-        user_group_results_file, delimiter="\t", quotechar="'"
+    # Results of several projects are recorded for the project "batch".
+    metrics_project_id = (
+        next(iter(results_per_project)) if len(results_per_project) == 1 else None
     )
+    with transfer_metrics.stage(metrics_project_id, "write") as metrics:
+        for projectId, results in results_per_project.items():
+            write_results_rows(
+                w, user_group_results_csv, results, projectId, result_type
+            )
+            metrics.rows += count_task_results(results)
+
+        if copy_format == "binary":
+            w.close()
+            user_group_results_csv.close()
+        metrics.bytes = get_file_size(results_file)
 
+    results_file.seek(0)
+    user_group_results_file.seek(0)
+    return results_file, user_group_results_file
+
+
+def write_results_rows(
+    w, user_group_results_csv, results: dict, projectId: str, result_type: str
+) -> None:
+    """Write the results of a project using a csv or a BinaryCopyWriter."""
     logger.info(f"Got {len(results.items())} groups for project {projectId}")
+    fallback_count = 0
     for groupId, users in results.items():
         for userId, result_data in users.items():
 
@@ -261,8 +742,14 @@ def results_to_file(
                 if is_selected
             ]
 
-            start_time = dateutil.parser.parse(result_data["startTime"])
-            end_time = dateutil.parser.parse(result_data["endTime"])
+            try:
+                start_time = parse_timestamp(result_data["startTime"])
+                end_time = parse_timestamp(result_data["endTime"])
+            except (TypeError, ValueError):
+                # Timestamp is not in the format set by the app.
+                start_time = dateutil.parser.parse(result_data["startTime"])
+                end_time = dateutil.parser.parse(result_data["endTime"])
+                fallback_count += 1
             timestamp = end_time
 
             if type(result_data["results"]) is dict:
@@ -322,17 +809,57 @@ def results_to_file(
                     ]
                 )
 
-    results_file.seek(0)
-    user_group_results_file.seek(0)
-    return results_file, user_group_results_file
+    if fallback_count > 0:
+        logger.info(
+            f"Parsed timestamps with dateutil for {fallback_count} results "
+            f"of project {projectId}"
+        )
+
+
+def get_file_size(file: Union[io.StringIO, io.BytesIO]) -> int:
+    """Get the size of an in-memory file in bytes without changing its position.
+
+    For StringIO the size of the UTF-8 encoded text is returned.
+    It is read in chunks to not copy the whole file at once.
+    """
+    position = file.tell()
+    if isinstance(file, io.BytesIO):
+        size = file.seek(0, io.SEEK_END)
+    else:
+        file.seek(0)
+        size = 0
+        while True:
+            chunk = file.read(FILE_SIZE_CHUNK)
+            if not chunk:
+                break
+            size += len(chunk) if chunk.isascii() else len(chunk.encode())
+    file.seek(position)
+    return size
+
+
+def copy_results_file(
+    p_con: auth.postgresDB,
+    results_file: Union[io.StringIO, io.BytesIO],
+    table: str,
+    columns: List[str],
+) -> None:
+    """Copy a file created by results_to_file into a temp table.
+
+    BytesIO buffers hold the binary format of the COPY statement.
+    """
+    if isinstance(results_file, io.BytesIO):
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT binary)"
+        p_con.copy_expert(sql, results_file)
+    else:
+        p_con.copy_from(results_file, table, columns)
 
 
 def save_results_to_postgres(
-    results_file: io.StringIO,
-    project_id: str,
-    filter_mode: bool,
+    results_file: Union[io.StringIO, io.BytesIO],
+    project_id: Optional[str],
     result_temp_table: str = "results_temp",
     result_table: str = "mapping_sessions_results",
+    p_con: Optional[auth.postgresDB] = None,
 ) -> None:
     """
     Saves results to a temporary table in postgres
@@ -340,18 +867,22 @@ def save_results_to_postgres(
     for a more efficient import into the database.
     Parameters
     ----------
-    results_file: io.StringIO
-    filter_mode: boolean
-        If true, try to filter out invalid results.
+    results_file: io.StringIO or io.BytesIO
+    project_id: str
+        Only used for metrics.
+        None if the file holds results of several projects.
     result_temp_table:
         result_temp_table and result_table are different from usual if
         result type is not int
     result_table:
         result_temp_table and result_table are different from usual if
         result type is not int
+    p_con: auth.postgresDB
+        If not set, a new connection is used.
     """
 
-    p_con = auth.postgresDB()
+    if p_con is None:
+        p_con = auth.postgresDB()
     columns = [
         "project_id",
         "group_id",
@@ -362,44 +893,11 @@ def save_results_to_postgres(
         "end_time",
         "result",
     ]
-    p_con.copy_from(results_file, result_temp_table, columns)
+    with transfer_metrics.stage(project_id, "copy") as metrics:
+        metrics.bytes = get_file_size(results_file)
+        copy_results_file(p_con, results_file, result_temp_table, columns)
     results_file.close()
 
-    if filter_mode:
-        logger.warning(f"trying to remove invalid tasks from {project_id}.")
-
-        filter_query = f"""
-            with project_tasks as (
-                select
-                    task_id
-                    ,group_id
-                from tasks
-                where project_id = %(project_id)s
-            ),
-            -- Results for which we can't join a task from the tasks table
-            -- are invalid. For these invalid results the group_id set by the app
-            -- is not correct. Hence, we delete these results from the
-            -- results_temp table.
-            results_to_delete as (
-                select
-                    r.task_id
-                    ,r.group_id
-                    ,r.user_id
-                from {result_temp_table} r
-                left join project_tasks t on
-                    r.task_id = t.task_id and
-                    r.group_id = t.group_id
-                where t.task_id is null or t.group_id is null
-            )
-            delete from {result_temp_table} r1
-            using results_to_delete r2
-            where
-                r1.task_id = r2.task_id and
-                r1.group_id = r2.group_id and
-                r1.user_id = r2.user_id
-        """
-        p_con.query(filter_query, {"project_id": project_id})
-
     # here we can handle different result types, e.g. convert Geojson to
     # native postgis geometry object
     if result_table == "mapping_sessions_results_geometry":
@@ -439,15 +937,16 @@ def save_results_to_postgres(
         DO NOTHING;
         COMMIT;
     """
-    p_con.query(query_insert_mapping_sessions)
+    with transfer_metrics.stage(project_id, "insert"):
+        p_con.query(query_insert_mapping_sessions)
     del p_con
     logger.info("copied results into postgres.")
 
 
 def save_user_group_results_to_postgres(
-    user_group_results_file: io.StringIO,
-    project_id: str,
-    filter_mode: bool,
+    user_group_results_file: Union[io.StringIO, io.BytesIO],
+    project_id: Optional[str],
+    p_con: Optional[auth.postgresDB] = None,
 ) -> None:
     """
     Saves results to a temporary table in postgres
@@ -455,12 +954,16 @@ def save_user_group_results_to_postgres(
     for a more efficient import into the database.
     Parameters
     ----------
-    user_group_results_file: io.StringIO
-    filter_mode: boolean
-        If true, try to filter out invalid results.
+    user_group_results_file: io.StringIO or io.BytesIO
+    project_id: str
+        Only used for metrics.
+        None if the file holds results of several projects.
+    p_con: auth.postgresDB
+        If not set, a new connection is used.
     """
 
-    p_con = auth.postgresDB()
+    if p_con is None:
+        p_con = auth.postgresDB()
     columns = [
         "project_id",
         "group_id",
@@ -468,43 +971,13 @@ def save_user_group_results_to_postgres(
         "user_group_id",
     ]
     user_group_results_file.seek(0)
-    p_con.copy_from(user_group_results_file, "results_user_groups_temp", columns)
+    with transfer_metrics.stage(project_id, "user_groups_copy") as metrics:
+        metrics.bytes = get_file_size(user_group_results_file)
+        copy_results_file(
+            p_con, user_group_results_file, "results_user_groups_temp", columns
+        )
     user_group_results_file.close()
 
-    if filter_mode:
-        logger.warning(f"trying to remove invalid tasks from {project_id}.")
-
-        filter_query = """
-            WITH project_groups AS (
-                SELECT
-                    group_id
-                FROM groups
-                WHERE project_id = %(project_id)s
-            ),
-            -- Results for which we can't join a group from the groups table
-            -- are invalid. For these invalid results the group_id set by the app
-            -- is not correct. Hence, we delete these results from the
-            -- results_user_groups_temp table.
-            user_group_results_to_delete AS (
-                SELECT
-                    R.group_id,
-                    R.user_id
-                FROM results_user_groups_temp R
-                    LEFT join project_groups T on R.group_id = T.group_id
-                    LEFT join users U on R.user_id = U.user_id
-                    LEFT join user_groups UG on R.user_group_id = UG.user_group_id
-                WHERE T.group_id is NULL
-                    OR U.user_id is NULL
-                    OR UG.user_group_id is NULL
-            )
-            DELETE FROM results_user_groups_temp R1
-            USING user_group_results_to_delete R2
-            WHERE
-                R1.group_id = R2.group_id
-                AND R1.user_id = R2.user_id
-        """
-        p_con.query(filter_query, {"project_id": project_id})
-
     query_insert_results = """
         INSERT INTO mapping_sessions_user_groups
             SELECT
@@ -515,24 +988,38 @@ def save_user_group_results_to_postgres(
         ON CONFLICT (mapping_session_id, user_group_id)
         DO NOTHING;
     """
-    p_con.query(query_insert_results)
+    with transfer_metrics.stage(project_id, "user_groups_insert"):
+        p_con.query(query_insert_results)
     del p_con
     logger.info("copied user_groups_results into postgres.")
 
 
-def truncate_temp_results(temp_table: str = "results_temp") -> None:
-    p_con = auth.postgresDB()
+def truncate_temp_results(
+    temp_table: str = "results_temp", p_con: Optional[auth.postgresDB] = None
+) -> None:
+    if p_con is None:
+        p_con = auth.postgresDB()
     query_truncate_temp_results = f"TRUNCATE {temp_table};"
     p_con.query(query_truncate_temp_results)
     del p_con
 
 
-def truncate_temp_user_groups_results() -> None:
-    p_con = auth.postgresDB()
+def truncate_temp_user_groups_results(p_con: Optional[auth.postgresDB] = None) -> None:
+    if p_con is None:
+        p_con = auth.postgresDB()
     p_con.query("TRUNCATE results_user_groups_temp")
     del p_con
 
 
+def count_task_results(results: dict) -> int:
+    """Get the number of task results of a project."""
+    return sum(
+        len(result_data.get("results") or [])
+        for users in results.values()
+        for result_data in users.values()
+    )
+
+
 def get_user_ids_from_results(results: dict) -> List[str]:
     """
     Get all users based on the ids provided in the results
@@ -1,13 +1,17 @@
 """Update users and project information from Firebase in Postgres."""
 
-import concurrent.futures
 import csv
 import datetime as dt
 import io
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from mapswipe_workers import auth
 from mapswipe_workers.definitions import logger
+from mapswipe_workers.firebase.fetch import get_children
+from mapswipe_workers.utils.slack_helper import (
+    get_progress_notifications,
+    send_progress_notification,
+)
 
 
 # TODO: Change firebase/client side to send UTC time instead.
@@ -23,34 +27,35 @@ def convert_firebase_datetime_to_database_format(timestamp):
         return dt.datetime.strptime(timestamp.replace("Z", ""), "%Y-%m-%dT%H:%M:%S")
 
 
-def get_user_attribute_from_firebase(user_ids: List[str], attribute: str):
-    """Use threading to query a user attribute in firebase.
+def get_new_ids(
+    pg_db: auth.postgresDB, ids: List[str], table: str, id_column: str
+) -> List[str]:
+    """Get the ids which do not exist in a table yet.
 
-    Follows a workflow describted in this blogpost:
-    https://www.digitalocean.com/community/tutorials/how-to-use-threadpoolexecutor-in-python-3
+    The anti-join is done in postgres. Only the given ids are sent
+    to postgres, the ids already in the table are not queried.
     """
+    if not ids:
+        return []
+    query = f"""
+        SELECT candidate.id
+        FROM unnest(%(ids)s::varchar[]) AS candidate(id)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {table} t WHERE t.{id_column} = candidate.id
+        )
+    """
+    return [_id for _id, in pg_db.retr_query(query, {"ids": list(set(ids))})]
 
-    def get_user_attribute(_user_id, _attribute):
-        ref = fb_db.reference(f"v2/users/{_user_id}/{_attribute}")
-        return [_user_id, ref.get()]
 
-    fb_db = auth.firebaseDB()
-    user_attribute_dict = {}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-        futures = []
-        for user_id in user_ids:
-            futures.append(
-                executor.submit(
-                    get_user_attribute, _user_id=user_id, _attribute=attribute
-                )
-            )
+def create_session_temp_table(pg_db: auth.postgresDB, table: str) -> None:
+    """Create a session temp table which shadows a shared temp table.
 
-        for future in concurrent.futures.as_completed(futures):
-            user_id, status = future.result()
-            user_attribute_dict[user_id] = status
-
-    logger.info(f"Got attribute '{attribute}' from firebase for {len(user_ids)} users.")
-    return user_attribute_dict
+    Temp tables live in the pg_temp schema which comes first in the search path.
+    Hence, several workers (or containers) can load data using the same
+    table name without clobbering each other's rows.
+    The session temp table is dropped when the connection is closed.
+    """
+    pg_db.query(f"CREATE TEMP TABLE IF NOT EXISTS {table} (LIKE public.{table})")
 
 
 def update_user_data(user_ids: Optional[List[str]] = None) -> None:
@@ -59,14 +64,6 @@ def update_user_data(user_ids: Optional[List[str]] = None) -> None:
     fb_db = auth.firebaseDB()
     pg_db = auth.postgresDB()
 
-    # get all user_ids from postgres
-    query = """SELECT user_id FROM users"""
-    postgres_user_info = pg_db.retr_query(query)
-    postgres_user_ids = []
-    for user_id in postgres_user_info:
-        postgres_user_ids.append(user_id[0])
-    logger.info(f"There are {len(postgres_user_ids)} users in Postgres.")
-
     if not user_ids:
         # get all user_ids from firebase
         firebase_user_ids = list(fb_db.reference("v2/users").get(shallow=True).keys())
@@ -74,21 +71,16 @@ def update_user_data(user_ids: Optional[List[str]] = None) -> None:
     else:
         firebase_user_ids = user_ids
 
-    # Get difference between firebase users_ids and postgres user_ids.
+    # Get firebase users_ids which are not in postgres.
     # These are new users for which data is only available in Firebase so far.
-    new_user_ids = list(set(firebase_user_ids) - set(postgres_user_ids))
+    new_user_ids = get_new_ids(pg_db, firebase_user_ids, "users", "user_id")
 
     if len(new_user_ids) == 0:
         logger.info("There are NO new users in Firebase.")
     else:
         logger.info(f"There are {len(new_user_ids)} new users in Firebase.")
         # get username and created attributes from firebase
-        firebase_usernames_dict = get_user_attribute_from_firebase(
-            new_user_ids, "username"
-        )
-        firebase_created_dict = get_user_attribute_from_firebase(
-            new_user_ids, "created"
-        )
+        firebase_users = get_children("v2/users", new_user_ids)
 
         # write user information to in memory file
         users_file = io.StringIO("")
@@ -97,12 +89,13 @@ def update_user_data(user_ids: Optional[List[str]] = None) -> None:
         for new_user_id in new_user_ids:
             # Get username from dict.
             # Some users might not have a username set in Firebase.
-            username = firebase_usernames_dict.get(new_user_id, None)
+            user = firebase_users.get(new_user_id) or {}
+            username = user.get("username")
 
             # Get created timestamp from dict.
             # Convert timestamp (ISO 8601) from string to a datetime object.
             # Use current timestamp if the value is not set in Firebase
-            timestamp = firebase_created_dict.get(new_user_id, None)
+            timestamp = user.get("created")
             if timestamp:
                 created = dt.datetime.strptime(
                     timestamp.replace("Z", ""), "%Y-%m-%dT%H:%M:%S.%f"
@@ -116,6 +109,7 @@ def update_user_data(user_ids: Optional[List[str]] = None) -> None:
 
         # write users to users_temp table with copy from statement
         columns = ["user_id", "username", "created"]
+        create_session_temp_table(pg_db, "users_temp")
         pg_db.copy_from(users_file, "users_temp", columns)
         users_file.close()
 
@@ -139,14 +133,6 @@ def update_user_group_data(user_group_ids: Optional[List[str]] = None) -> List[s
     """Copies new user_groups from Firebase to Postgres."""
     pg_db = auth.postgresDB()
 
-    # get all user_group_ids from postgres
-    query = """SELECT user_group_id FROM user_groups"""
-    postgres_user_group_info = pg_db.retr_query(query)
-    postgres_user_group_ids = [
-        user_group_id for user_group_id, *_ in postgres_user_group_info
-    ]
-    logger.info(f"There are {len(postgres_user_group_ids)} user groups in Postgres.")
-
     if not user_group_ids:
         fb_db = auth.firebaseDB()
         # get all user_group_ids from firebase
@@ -160,10 +146,10 @@ def update_user_group_data(user_group_ids: Optional[List[str]] = None) -> List[s
         # FIXME: Make sure user_groups_ids are also in firebase?
         firebase_user_group_ids = user_group_ids
 
-    # Get difference between firebase user_groups_ids and postgres user_group_ids.
+    # Get firebase user_groups_ids which are not in postgres.
     # These are new user_groups for which data is only available in Firebase so far.
-    new_user_group_ids = list(
-        set(firebase_user_group_ids) - set(postgres_user_group_ids)
+    new_user_group_ids = get_new_ids(
+        pg_db, firebase_user_group_ids, "user_groups", "user_group_id"
     )
 
     if len(new_user_group_ids) == 0:
@@ -179,6 +165,7 @@ def update_user_group_data(user_group_ids: Optional[List[str]] = None) -> List[s
 
         # write user_groups to user_groups_temp table with copy from statement
         columns = ["user_group_id"]
+        create_session_temp_table(pg_db, "user_groups_temp")
         pg_db.copy_from(user_groups_file, "user_groups_temp", columns)
         user_groups_file.close()
 
@@ -203,12 +190,12 @@ def create_update_user_data(user_ids: Optional[List[str]] = None):
         # Nothing to do here.
         return
 
-    fb_db = auth.firebaseDB()
+    firebase_users = get_children("v2/users", user_ids)
 
     user_file = io.StringIO("")
     u_w = csv.writer(user_file, delimiter="\t", quotechar="'")
     for _id in user_ids:
-        u = fb_db.reference(f"v2/users/{_id}").get()
+        u = firebase_users.get(_id)
         if u is None:  # user doesn't exists in FB
             continue
         username = u.get("username")
@@ -245,14 +232,14 @@ def create_update_user_data(user_ids: Optional[List[str]] = None):
 
 
 def update_user_group_full_data(user_group_ids: List[str]):
-    fb_db = auth.firebaseDB()
+    firebase_user_groups = get_children("v2/userGroups", user_group_ids)
 
     user_group_file = io.StringIO("")
     user_group_membership_file = io.StringIO("")
     ug_w = csv.writer(user_group_file, delimiter="\t", quotechar="'")
     ugm_w = csv.writer(user_group_membership_file, delimiter="\t", quotechar="'")
     for _id in user_group_ids:
-        ug = fb_db.reference(f"v2/userGroups/{_id}").get()
+        ug = firebase_user_groups.get(_id)
         if ug is None:  # userGroup doesn't exists in FB
             continue
         # New/Updated user group
@@ -417,12 +404,12 @@ def create_update_membership_data(
         # Nothing to do here
         return
 
-    fb_db = auth.firebaseDB()
+    firebase_memberships = get_children("v2/userGroupMembershipLogs", membership_ids)
 
     membership_file = io.StringIO("")
     m_w = csv.writer(membership_file, delimiter="\t", quotechar="'")
     for _id in membership_ids:
-        u = fb_db.reference(f"v2/userGroupMembershipLogs/{_id}").get()
+        u = firebase_memberships.get(_id)
         if u is None:  # user doesn't exists in FB
             continue
         user_group_id = u.get("userGroupId")
@@ -470,36 +457,30 @@ def create_update_membership_data(
     del pg_db
 
 
-def get_project_attribute_from_firebase(project_ids: List[str], attribute: str):
-    """Use threading to query a project attribute in firebase.
+def get_project_status_from_firebase(
+    project_ids: Optional[List[str]] = None,
+) -> Dict[str, Optional[str]]:
+    """Get the status of projects from Firebase.
 
-    Follows a workflow describted in this blogpost:
-    https://www.digitalocean.com/community/tutorials/how-to-use-threadpoolexecutor-in-python-3
+    If no project ids are given the status of all projects which are
+    not archived is queried using the status index of v2/projects.
+    Archived projects are excluded by two queries for the statuses
+    before and after "archived" since Firebase can not filter for inequality.
+    The status of a project which does not exist in Firebase is None.
     """
-
-    def get_project_attribute(_project_id, _attribute):
-        ref = fb_db.reference(f"v2/projects/{_project_id}/{_attribute}")
-        return [_project_id, ref.get()]
-
-    fb_db = auth.firebaseDB()
-    project_attribute_dict = {}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-        futures = []
-        for project_id in project_ids:
-            futures.append(
-                executor.submit(
-                    get_project_attribute, _project_id=project_id, _attribute=attribute
-                )
-            )
-
-        for future in concurrent.futures.as_completed(futures):
-            project_id, status = future.result()
-            project_attribute_dict[project_id] = status
-
-    logger.info(
-        f"Got attribute '{attribute}' from firebase for {len(project_ids)} projects."
-    )
-    return project_attribute_dict
+    if project_ids:
+        projects = get_children("v2/projects", project_ids)
+    else:
+        fb_db = auth.firebaseDB()
+        ref = fb_db.reference("v2/projects")
+        projects = {
+            **(ref.order_by_child("status").end_at("archive").get() or {}),
+            **(ref.order_by_child("status").start_at("archived_").get() or {}),
+        }
+    return {
+        project_id: project.get("status") if isinstance(project, dict) else None
+        for project_id, project in projects.items()
+    }
 
 
 def update_project_data(project_ids: list = []):
@@ -521,6 +502,7 @@ def update_project_data(project_ids: list = []):
         """
         project_info = pg_db.retr_query(query, [tuple(project_ids)])
         logger.info("got projects from postgres based on user input")
+        project_status_dict = get_project_status_from_firebase(project_ids)
     else:
         # get project ids for all non-archived projects in postgres
         query = """
@@ -528,41 +510,50 @@ def update_project_data(project_ids: list = []):
             where status != 'archived';
         """
         project_info = pg_db.retr_query(query)
-        project_ids = []
-        for project_id, attribute in project_info:
-            project_ids.append(project_id)
         logger.info(
-            f"Got all ({len(project_ids)}) not-archived projects from postgres."
+            f"Got all ({len(project_info)}) not-archived projects from postgres."
+        )
+        project_status_dict = get_project_status_from_firebase()
+        # Projects which are not archived in postgres but missing in the
+        # query result have been archived or deleted in Firebase.
+        missing_project_ids = [
+            project_id
+            for project_id, _ in project_info
+            if project_id not in project_status_dict
+        ]
+        if missing_project_ids:
+            project_status_dict.update(
+                get_project_status_from_firebase(missing_project_ids)
+            )
+    logger.info(f"Got status of {len(project_status_dict)} projects from firebase.")
+
+    # For each project we check if the status set in firebase
+    # and the status set in postgres are different.
+    # Projects without status in firebase are skipped.
+    changed_status = {
+        project_id: project_status_dict.get(project_id)
+        for project_id, postgres_status in project_info
+        if project_status_dict.get(project_id) not in (None, postgres_status)
+    }
+    if changed_status:
+        # Update the status of all changed projects with a single statement.
+        query_update_projects = """
+            UPDATE projects p
+            SET status = changed.status
+            FROM unnest(%(project_ids)s::varchar[], %(statuses)s::varchar[])
+                AS changed(project_id, status)
+            WHERE p.project_id = changed.project_id;
+        """
+        pg_db.query(
+            query_update_projects,
+            {
+                "project_ids": list(changed_status.keys()),
+                "statuses": list(changed_status.values()),
+            },
+        )
+        logger.info(
+            f"Updated project status in Postgres for projects {list(changed_status)}"
         )
-
-    # get project status from firebase
-    if len(project_ids) > 0:
-        project_status_dict = get_project_attribute_from_firebase(project_ids, "status")
-
-        for project_id, postgres_status in project_info:
-            # for each project we check if the status set in firebase
-            # and the status set in postgres are different
-            # we update status in postgres if value has changed
-            firebase_status = project_status_dict[project_id]
-            if postgres_status == firebase_status or firebase_status is None:
-                # project status did not change or
-                # project status is not available in firebase
-                pass
-            else:
-                # The status of the project has changed.
-                # The project status will be updated in postgres.
-                # Project status will only change for few (<10) projects at once.
-                # Using multiple update operations seems to be okay in this scenario.
-                query_update_project = """
-                    UPDATE projects
-                    SET status=%s
-                    WHERE project_id=%s;
-                """
-                data_update_project = [firebase_status, project_id]
-                pg_db.query(query_update_project, data_update_project)
-                logger.info(
-                    f"Updated project status in Postgres for project {project_id}"
-                )
 
     logger.info("Finished status update projects.")
 
@@ -574,90 +565,130 @@ def get_project_progress(project_id: str) -> int:
     but it is still "good enough" and gives almost correct progress.
     But it is easier to compute than considering the actual number of tasks per group.
 
+    The number of users per group is maintained in the group_progress table
+    by triggers on mapping_sessions. Hence, the mapping sessions are not counted here.
+
     NOTE: the cast to integer in postgres rounds decimals. This means that for 99.5%
     progress, we return 100% here. We should evaluate if this is what we want if/when
     we introduce automated project rotation upon completion (as the reported completion
     would happen 0.5% before actual completion).
     """
+    return get_progress_and_contributor_count([project_id]).get(project_id, (0, 0))[0]
+
+
+def get_contributor_count_from_postgres(project_id: str) -> int:
     pg_db = auth.postgresDB()
     query = """
         select
-          avg(group_progress)::integer as progress
-        from
-        (
-            -- Get all groups for this project and
-            -- add progress for groups that have been worked on already.
-            -- Set progress to 0 if no user has worked on this group.
-            -- For groups that no users worked on
-            -- there are no entries in the results table.
-            select
-              g.group_id
-              ,g.project_id
-              ,case
-                when group_progress is null then 0
-                else group_progress
-              end as group_progress
-            from groups g
-            left join
-                (
-                -- Here we get the progress for all groups
-                -- for which results have been submitted already.
-                -- Progress for a group can be max 100
-                -- even if more users than required submitted results.
-                -- The verification number of a project is used here.
-                select
-                  ms.group_id
-                  ,ms.project_id
-                  ,case
-                    when count(distinct user_id) >= p.verification_number then 100
-                    else 100 * count(distinct user_id) / p.verification_number
-                  end as group_progress
-                from mapping_sessions ms, projects p
-                where ms.project_id = p.project_id
-                group by group_id, ms.project_id, p.verification_number
-            ) bar
-            on bar.group_id = g.group_id and bar.project_id = g.project_id
-            where g.project_id = %s
-        ) foo
-        group by project_id
+          count(*)
+        from project_contributors
+        where
+          project_id = %s
     """
     data = [project_id]
     return pg_db.retr_query(query, data)[0][0]
 
 
-def set_progress_in_firebase(project_id: str):
-    """Update the project progress value in Firebase."""
-    progress = get_project_progress(project_id)
+def get_progress_and_contributor_count(
+    project_ids: List[str],
+) -> Dict[str, Tuple[int, int]]:
+    """Get progress and contributor count of several projects at once.
 
-    fb_db = auth.firebaseDB()
-    project_progress_ref = fb_db.reference(f"v2/projects/{project_id}/progress")
-    project_progress_ref.set(progress)
-    logger.info(f"set progress for project {project_id}: {progress}")
-
-
-def get_contributor_count_from_postgres(project_id: str) -> int:
+    Progress is calculated as described in get_project_progress.
+    Only the groups of the projects and their contributors are read.
+    Projects without groups are not included.
+    """
     pg_db = auth.postgresDB()
     query = """
+        with project_progress as (
+            -- Progress for a group can be max 100
+            -- even if more users than required submitted results.
+            -- The verification number of a project is used here.
+            -- Groups without results have no entry in group_progress.
+            select
+              g.project_id
+              ,avg(
+                case
+                  when gp.user_count is null then 0
+                  when gp.user_count >= p.verification_number then 100
+                  else 100 * gp.user_count / p.verification_number
+                end
+              )::integer as progress
+            from groups g
+            join projects p using (project_id)
+            left join group_progress gp using (project_id, group_id)
+            where g.project_id = any(%(project_ids)s)
+            group by g.project_id
+        ), contributor_count as (
+            select
+              project_id
+              ,count(*) as contributor_count
+            from project_contributors
+            where project_id = any(%(project_ids)s)
+            group by project_id
+        )
         select
-          count(distinct user_id)
-        from mapping_sessions ms
-        where
-          project_id = %s
+          pp.project_id
+          ,pp.progress
+          ,coalesce(cc.contributor_count, 0)
+        from project_progress pp
+        left join contributor_count cc using (project_id)
     """
-    data = [project_id]
-    return pg_db.retr_query(query, data)[0][0]
+    data = {"project_ids": list(project_ids)}
+    return {
+        project_id: (progress, contributor_count)
+        for project_id, progress, contributor_count in pg_db.retr_query(query, data)
+    }
+
+
+def update_progress_in_firebase(project_ids: List[str]) -> None:
+    """Update progress and contributor count of projects in Firebase.
+
+    Both values are computed for all projects with a single query.
+    Values and notification flags of all projects are written
+    with a single multi-location update.
+    Progress notifications are sent for projects with at least 90% progress
+    after their flags have been written.
+    """
+    if not project_ids:
+        return
+    project_stats = get_progress_and_contributor_count(project_ids)
+    if not project_stats:
+        return
 
+    updates = {}
+    for project_id, (progress, contributor_count) in project_stats.items():
+        updates[f"{project_id}/progress"] = progress
+        updates[f"{project_id}/contributorCount"] = contributor_count
 
-def set_contributor_count_in_firebase(project_id: str):
-    """Update the project contributors value in Firebase."""
+    # Name and notification flags are only needed for almost finished projects.
+    almost_finished_project_ids = [
+        project_id
+        for project_id, (progress, _) in project_stats.items()
+        if progress >= 90
+    ]
+    projects = get_children("v2/projects", almost_finished_project_ids)
+    notifications = {}
+    for project_id, project in projects.items():
+        if project is None:
+            continue
+        progress = project_stats[project_id][0]
+        notifications[project_id] = get_progress_notifications(
+            project_id, project, progress
+        )
+        for flag in notifications[project_id]:
+            updates[f"{project_id}/{flag}"] = True
 
-    contributor_count = get_contributor_count_from_postgres(project_id)
     fb_db = auth.firebaseDB()
-    project_progress_ref = fb_db.reference(f"v2/projects/{project_id}/contributorCount")
-    project_progress_ref.set(contributor_count)
-    logger.info(
-        f"set contributorCount attribute for project {project_id}: {contributor_count}"
-    )
+    fb_db.reference("v2/projects").update(updates)
+    logger.info(f"set progress and contributorCount for {len(project_stats)} projects")
+
+    # Notifications are only sent once their flags are saved,
+    # so that a failed update does not send them again on the next run.
+    for project_id, project_notifications in notifications.items():
+        send_progress_notification(
+            project_id, projects[project_id], project_notifications.values()
+        )
 
 
 def set_tileserver_api_key(project_id: str, api_key: str) -> None:
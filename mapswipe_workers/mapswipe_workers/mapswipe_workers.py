@@ -1,8 +1,10 @@
 """Command Line Interface for MapSwipe Workers."""
 
 import ast
+import multiprocessing
+import multiprocessing.connection
 import time
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import click
 import schedule as sched
@@ -18,16 +20,14 @@ from mapswipe_workers.firebase.firebase import Firebase
 from mapswipe_workers.firebase_to_postgres import (
     archive_project,
     delete_project,
+    ingest_results,
     transfer_results,
     update_data,
 )
 from mapswipe_workers.generate_stats import generate_stats
 from mapswipe_workers.utils import team_management, user_management
 from mapswipe_workers.utils.create_directories import create_directories
-from mapswipe_workers.utils.slack_helper import (
-    send_progress_notification,
-    send_slack_message,
-)
+from mapswipe_workers.utils.slack_helper import send_slack_message
 
 
 class PythonLiteralOption(click.Option):
@@ -51,7 +51,24 @@ def cli(verbose):
 
 
 @cli.command("create-projects")
-def run_create_projects():
+@click.option(
+    "--max-workers",
+    type=int,
+    default=1,
+    help="Number of project drafts which are processed in parallel processes.",
+)
+@click.option(
+    "--timeout",
+    type=int,
+    default=3600,
+    help=(
+        "Time in seconds after which the creation of a project is stopped. "
+        "The time is checked between the steps of the project creation "
+        "and not while the project is saved. "
+        "Only applies if project drafts are processed in parallel."
+    ),
+)
+def run_create_projects(max_workers: int = 1, timeout: int = 3600):
     """
     Create projects from submitted project drafts.
 
@@ -67,45 +84,127 @@ def run_create_projects():
         logger.info("There are no project drafts in firebase.")
         return None
 
+    if max_workers > 1:
+        _create_projects_in_parallel(project_drafts, max_workers, timeout)
+        return None
+
     for project_draft_id, project_draft in project_drafts.items():
-        project_draft["projectDraftId"] = project_draft_id
-        project_type = project_draft["projectType"]
-        project_name = project_draft["name"]
+        _create_project(project_draft_id, project_draft)
+
+
+def _create_project(
+    project_draft_id: str, project_draft: dict, timeout: Optional[int] = None
+) -> None:
+    """Create a project from a project draft and report the outcome to Slack.
+
+    If a timeout is given, the project creation is stopped if it did not
+    finish within timeout seconds. The time is checked before each step
+    and not while the project is saved, so that a project is never saved
+    only partially.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    project_draft["projectDraftId"] = project_draft_id
+    project_type = project_draft["projectType"]
+    project_name = project_draft["name"]
+    try:
+        # Create a project object using appropriate class (project type).
+        project = ProjectType(project_type).constructor(project_draft)
+        # TODO: here the project.geometry attribute is overwritten
+        #  this is super confusing since it's not a geojson anymore
+        #  but this is what we set initially,
+        #  e.g. in tile_map_service_grid/project.py
+        #  project.geometry is set to a list of wkt geometries now
+        #  this can't be handled in postgres,
+        #  postgres expects just a string not an array
+        #  validated_geometries should be called during init already
+        #  for the respective project types
+
+        project.geometry = project.validate_geometries()
+        _check_deadline(deadline, timeout)
+        project.create_groups()
+        _check_deadline(deadline, timeout)
+        project.create_tasks()
+        _check_deadline(deadline, timeout)
+        project.calc_required_results()
+        _check_deadline(deadline, timeout)
+        # Save project and its groups and tasks to Firebase and Postgres.
+        project.save_project()
+        send_slack_message(MessageType.SUCCESS, project_name, project.projectId)
+        logger.info("Success: Project Creation ({0})".format(project_name))
+    except CustomError as e:
+        # check if project could be initialized
         try:
-            # Create a project object using appropriate class (project type).
-            project = ProjectType(project_type).constructor(project_draft)
-            # TODO: here the project.geometry attribute is overwritten
-            #  this is super confusing since it's not a geojson anymore
-            #  but this is what we set initially,
-            #  e.g. in tile_map_service_grid/project.py
-            #  project.geometry is set to a list of wkt geometries now
-            #  this can't be handled in postgres,
-            #  postgres expects just a string not an array
-            #  validated_geometries should be called during init already
-            #  for the respective project types
-
-            project.geometry = project.validate_geometries()
-            project.create_groups()
-            project.create_tasks()
-            project.calc_required_results()
-            # Save project and its groups and tasks to Firebase and Postgres.
-            project.save_project()
-            send_slack_message(MessageType.SUCCESS, project_name, project.projectId)
-            logger.info("Success: Project Creation ({0})".format(project_name))
-        except CustomError as e:
-            ref = firebase.fb_db.reference(f"v2/projectDrafts/{project_draft_id}")
-            ref.set({})
+            project_id = project.projectId
+        except UnboundLocalError:
+            project_id = None
 
-            # check if project could be initialized
-            try:
-                project_id = project.projectId
-            except UnboundLocalError:
-                project_id = None
+        _fail_project_draft(project_draft_id, project_name, project_id, str(e))
+        logger.exception("Failed: Project Creation ({0}))".format(project_name))
+        sentry.capture_exception()
 
-            send_slack_message(MessageType.FAIL, project_name, project_id, str(e))
-            logger.exception("Failed: Project Creation ({0}))".format(project_name))
-            sentry.capture_exception()
-        continue
+
+def _check_deadline(deadline: Optional[float], timeout: Optional[int]) -> None:
+    """Raise a CustomError if the deadline of a project creation has passed."""
+    if deadline is not None and time.monotonic() > deadline:
+        raise CustomError(f"Project creation did not finish within {timeout} seconds.")
+
+
+def _fail_project_draft(
+    project_draft_id: str, project_name: str, project_id: Optional[str], reason: str
+) -> None:
+    """Delete a project draft which could not be created and report to Slack."""
+    firebase = Firebase()
+    ref = firebase.fb_db.reference(f"v2/projectDrafts/{project_draft_id}")
+    ref.set({})
+
+    send_slack_message(MessageType.FAIL, project_name, project_id, reason)
+
+
+def _create_projects_in_parallel(
+    project_drafts: dict, max_workers: int, timeout: int
+) -> None:
+    """Create projects from project drafts in up to max_workers processes.
+
+    Each draft is processed in its own process, which stops the project
+    creation if it did not finish within timeout seconds (see _create_project).
+    Processes are not terminated, since this could interrupt saving a project.
+    Processes are spawned instead of forked to not share connections
+    to Firebase and Postgres with the parent process.
+    """
+    context = multiprocessing.get_context("spawn")
+    pending = list(project_drafts.items())
+    running: Dict[str, multiprocessing.Process] = {}
+
+    while pending or running:
+        while pending and len(running) < max_workers:
+            project_draft_id, project_draft = pending.pop(0)
+            process = context.Process(
+                target=_create_project,
+                args=(project_draft_id, project_draft, timeout),
+                name=f"create-project-{project_draft_id}",
+            )
+            process.start()
+            running[project_draft_id] = process
+
+        multiprocessing.connection.wait(
+            [process.sentinel for process in running.values()]
+        )
+
+        for project_draft_id, process in list(running.items()):
+            if process.is_alive():
+                continue
+
+            process.join()
+            del running[project_draft_id]
+            if process.exitcode != 0:
+                # The draft is kept and processed again in the next run.
+                logger.error(
+                    f"Project creation for draft {project_draft_id} "
+                    f"exited with code {process.exitcode}"
+                )
+                sentry.capture_message(
+                    f"Project creation failed for draft {project_draft_id}"
+                )
 
 
 @cli.command("create-user-groups")
@@ -179,25 +278,140 @@ def run_create_user_group_membership_log():
         "(You need the quotes.)"
     ),
 )
-def run_firebase_to_postgres(project_ids: list) -> list:
+@click.option(
+    "--stream",
+    is_flag=True,
+    help=(
+        "Transfer results of a project in pages of groups "
+        "instead of downloading all results at once."
+    ),
+)
+@click.option(
+    "--page-size",
+    type=int,
+    default=500,
+    help="Number of groups per page when results are streamed.",
+)
+@click.option(
+    "--max-workers",
+    type=int,
+    default=1,
+    help=(
+        "Number of projects for which results are transferred in parallel "
+        "threads of this process."
+    ),
+)
+@click.option(
+    "--batch-size",
+    type=int,
+    default=0,
+    help=(
+        "Copy results of projects with less task results than this number "
+        "together in batches of about this number of task results. "
+        "Can not be used together with --max-workers or --stream."
+    ),
+)
+def run_firebase_to_postgres(
+    project_ids: list, stream: bool, page_size: int, max_workers: int, batch_size: int
+) -> list:
     """Update users and transfer results from Firebase to Postgres."""
 
+    if batch_size > 0 and (max_workers > 1 or stream):
+        raise click.UsageError(
+            "--batch-size can not be used together with --max-workers or --stream."
+        )
+
     if len(project_ids) > 0:
-        project_ids_transferred = transfer_results.transfer_results(project_ids)
+        project_ids_transferred = transfer_results.transfer_results(
+            project_ids,
+            stream=stream,
+            page_size=page_size,
+            max_workers=max_workers,
+            batch_size=batch_size,
+        )
     else:
-        project_ids_transferred = transfer_results.transfer_results()
-
-    if len(project_ids_transferred) > 0:
-        for project_id in project_ids_transferred:
-            update_data.set_progress_in_firebase(project_id)
-            update_data.set_contributor_count_in_firebase(project_id)
-            send_progress_notification(project_id)
+        project_ids_transferred = transfer_results.transfer_results(
+            stream=stream,
+            page_size=page_size,
+            max_workers=max_workers,
+            batch_size=batch_size,
+        )
 
+    _update_progress(project_ids_transferred)
     update_data.update_project_data()
 
     return project_ids
 
 
+def _update_progress(project_ids: list) -> None:
+    """Set progress and contributor count of projects with new results."""
+    update_data.update_progress_in_firebase(project_ids)
+
+
+@cli.command("ingest")
+@click.option(
+    "--max-rows",
+    type=int,
+    default=5000,
+    help="Transfer buffered results once this number of task results is reached.",
+)
+@click.option(
+    "--max-age",
+    type=int,
+    default=30,
+    help="Transfer buffered results at the latest after this time in seconds.",
+)
+@click.option(
+    "--time_interval",
+    type=int,
+    default=10,
+    help=(
+        "Time interval in minutes to update project progress, "
+        "to transfer results which have been missed by the listeners "
+        "and to listen to projects which have become active."
+    ),
+)
+@click.pass_context
+def run_ingest(context, max_rows: int, max_age: int, time_interval: int) -> None:
+    """Continuously transfer new results from Firebase to Postgres.
+
+    Listen to new results of active projects in Firebase
+    and transfer them in micro-batches.
+    Results which are in Firebase already are transferred page by page first,
+    so that the listeners do not download them at once.
+    """
+    try:
+        # Also resumes journaled deletes of a previous run.
+        _update_progress(transfer_results.transfer_results(stream=True))
+    except Exception as e:
+        # Remaining results are transferred by the next sweep.
+        sentry.capture_exception(e)
+        logger.exception(e)
+    ingestor = ingest_results.ResultsIngestor(max_rows=max_rows, max_age=max_age)
+
+    def _sweep():
+        ingestor.flush()
+        context.invoke(run_firebase_to_postgres, stream=True)
+        _update_progress(ingestor.take_flushed_project_ids())
+        # Projects which have become active have been swept already.
+        ingestor.sync_listeners()
+
+    sched.every(time_interval).minutes.do(_sweep)
+    ingestor.start()
+    try:
+        while True:
+            try:
+                ingestor.flush_if_due()
+                sched.run_pending()
+            except Exception as e:
+                sentry.capture_exception(e)
+                logger.exception(e)
+            time.sleep(1)
+    finally:
+        ingestor.stop()
+        ingestor.flush()
+
+
 @cli.command("generate-stats")
 @click.option(
     "--project_ids",
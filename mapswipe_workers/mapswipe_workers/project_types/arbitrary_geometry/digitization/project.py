@@ -16,6 +16,8 @@ from mapswipe_workers.project_types.arbitrary_geometry.project import (
 
 
 class DigitizationProject(ArbitraryGeometryProject):
+    result_type = "geometry"
+
     def __init__(self, project_draft):
         super().__init__(project_draft)
         self.drawType = project_draft["drawType"]
@@ -36,18 +38,18 @@ class DigitizationProject(ArbitraryGeometryProject):
         firebase.save_tasks_to_firebase(projectId, tasks, useCompression=False)
 
     @staticmethod
-    def results_to_postgres(results: dict, project_id: str, filter_mode: bool):
+    def results_to_postgres(results: dict, project_id: str, p_con=None):
         """How to move the result data from firebase to postgres."""
         results_file, user_group_results_file = results_to_file(
             results, project_id, result_type="geometry"
         )
-        truncate_temp_results(temp_table="results_geometry_temp")
+        truncate_temp_results(temp_table="results_geometry_temp", p_con=p_con)
         save_results_to_postgres(
             results_file,
             project_id,
-            filter_mode,
             result_temp_table="results_geometry_temp",
             result_table="mapping_sessions_results_geometry",
+            p_con=p_con,
         )
 
         return user_group_results_file
@@ -1,10 +1,10 @@
-import json
+from mapswipe_workers.utils.geojson_stream import iter_features
 
 
 def group_input_geometries(input_geometries_file, group_size, tutorial=False):
     """
     The function to create groups of input geometries using the given size (number of
-    features) per group
+    features) per group. The features are read from the file one by one.
 
     Parameters
     ----------
@@ -23,14 +23,38 @@ def group_input_geometries(input_geometries_file, group_size, tutorial=False):
     """
 
     with open(input_geometries_file, "r") as infile:
-        layer = json.load(infile)
+        return group_features(iter_features(infile), group_size, tutorial)
+
+
+def group_features(features, group_size, tutorial=False):
+    """
+    The function to create groups of features using the given size (number of
+    features) per group. The features are assigned to groups while iterating,
+    so they can be read and validated in the same pass.
+
+    Parameters
+    ----------
+    features : iterable
+        the GeoJSON features
+    group_size : int
+        the maximum number of features per group
+    tutorial: boolean
+        if this function is called to create the grouping within a tutorial
+
+    Returns
+    -------
+    groups : dict
+        the dictionary containing a list of "feature_ids" and a list of
+        "feature_geometries" per group with given group id key
+    """
+
     groups = {}
 
     # we will simply start with min group id = 100
     group_id = 100
     group_id_string = f"g{group_id}"
     feature_count = 0
-    for feature in layer["features"]:
+    for feature in features:
         feature_count += 1
         # feature count starts at 1
         # assuming group size would be 10
@@ -1,3 +1,5 @@
+import json
+import math
 import os
 from abc import abstractmethod
 from dataclasses import dataclass
@@ -9,6 +11,9 @@ from mapswipe_workers.definitions import DATA_PATH, CustomError, logger
 from mapswipe_workers.project_types.arbitrary_geometry import grouping_functions as g
 from mapswipe_workers.project_types.project import BaseGroup, BaseProject
 from mapswipe_workers.project_types.tile_server import BaseTileServer
+from mapswipe_workers.utils.geojson_stream import iter_features, write_features
+
+MAX_INPUT_GEOMETRIES = 100000
 
 
 @dataclass
@@ -69,44 +74,90 @@ class ArbitraryGeometryProject(BaseProject):
         )
         self.inputGeometries = raw_input_file
 
-        # open the raw input file and get layer
-        driver = ogr.GetDriverByName("GeoJSON")
-        datasource = driver.Open(raw_input_file, 0)
+        feature_count = 0
+        # extent of all input geometries as (minX, maxX, minY, maxY)
+        extent = [math.inf, -math.inf, math.inf, -math.inf]
+
+        def valid_features(features):
+            """Check the input features and yield only valid polygons."""
+            nonlocal feature_count
+            for feature in features:
+                feature_count += 1
+                if feature_count > MAX_INPUT_GEOMETRIES:
+                    err = f"Too many Geometries: more than {MAX_INPUT_GEOMETRIES}"
+                    logger.warning(f"{self.projectId} - check_input_geometry - {err}")
+                    raise CustomError(err)
+                if not isinstance(feature, dict):
+                    raise CustomError("Value error in input geometries file")
+
+                geometry = feature.get("geometry")
+                feat_geom = (
+                    ogr.CreateGeometryFromJson(json.dumps(geometry))
+                    if geometry
+                    else None
+                )
+                if feat_geom is None:
+                    logger.warning(
+                        f"{self.projectId}"
+                        f" - check_input_geometries - "
+                        f"deleted feature {feature_count} without geometry"
+                    )
+                    continue
+
+                min_x, max_x, min_y, max_y = feat_geom.GetEnvelope()
+                extent[0] = min(extent[0], min_x)
+                extent[1] = max(extent[1], max_x)
+                extent[2] = min(extent[2], min_y)
+                extent[3] = max(extent[3], max_y)
+
+                if not feat_geom.IsValid():
+                    logger.warning(
+                        f"{self.projectId}"
+                        f" - check_input_geometries - "
+                        f"deleted invalid feature {feature_count}"
+                    )
+
+                # we accept only POLYGON or MULTIPOLYGON geometries
+                elif feat_geom.GetGeometryName() not in ["POLYGON", "MULTIPOLYGON"]:
+                    logger.warning(
+                        f"{self.projectId}"
+                        f" - check_input_geometries - "
+                        f"deleted non polygon feature {feature_count}"
+                    )
+
+                else:
+                    if not feature.get("properties"):
+                        feature["properties"] = {}
+                    yield feature
+
+        # Read, check and group the input features in a single pass
+        # and write the valid features to valid_input_file at the same time.
         try:
-            layer = datasource.GetLayer()
-            LayerDefn = layer.GetLayerDefn()
-        except AttributeError:
+            with open(raw_input_file, "r") as infile, open(
+                valid_input_file, "w"
+            ) as outfile:
+                self.raw_groups = g.group_features(
+                    write_features(valid_features(iter_features(infile)), outfile),
+                    self.groupSize,
+                )
+        except ValueError:
             raise CustomError("Value error in input geometries file")
 
-        # create layer for valid_input_file to store all valid geometries
-        outDriver = ogr.GetDriverByName("GeoJSON")
-        # Remove output geojson if it already exists
-        if os.path.exists(valid_input_file):
-            outDriver.DeleteDataSource(valid_input_file)
-        outDataSource = outDriver.CreateDataSource(valid_input_file)
-        outLayer = outDataSource.CreateLayer(
-            "geometries", geom_type=ogr.wkbMultiPolygon
-        )
-        for i in range(0, LayerDefn.GetFieldCount()):
-            fieldDefn = LayerDefn.GetFieldDefn(i)
-            outLayer.CreateField(fieldDefn)
-        outLayerDefn = outLayer.GetLayerDefn()
-
         # check if raw_input_file layer is empty
-        feature_count = layer.GetFeatureCount()
         if feature_count < 1:
             err = "empty file. No geometries provided"
             # TODO: How to user logger and exceptions?
             logger.warning(f"{self.projectId} - check_input_geometry - {err}")
             raise CustomError(err)
-        elif feature_count > 100000:
-            err = f"Too many Geometries: {feature_count}"
+
+        # check if layer is empty
+        if not self.raw_groups:
+            err = "no geometries left after checking validity and geometry type."
             logger.warning(f"{self.projectId} - check_input_geometry - {err}")
-            raise CustomError(err)
+            raise Exception(err)
 
         # get geometry as wkt
         # get the bounding box/ extent of the layer
-        extent = layer.GetExtent()
         # Create a Polygon from the extent tuple
         ring = ogr.Geometry(ogr.wkbLinearRing)
         ring.AddPoint(extent[0], extent[2])
@@ -118,51 +169,6 @@ class ArbitraryGeometryProject(BaseProject):
         poly.AddGeometry(ring)
         wkt_geometry = poly.ExportToWkt()
 
-        # check if the input geometry is a valid polygon
-        for feature in layer:
-            feat_geom = feature.GetGeometryRef()
-            geom_name = feat_geom.GetGeometryName()
-            fid = feature.GetFID()
-
-            if not feat_geom.IsValid():
-                layer.DeleteFeature(fid)
-                logger.warning(
-                    f"{self.projectId}"
-                    f" - check_input_geometries - "
-                    f"deleted invalid feature {fid}"
-                )
-
-            # we accept only POLYGON or MULTIPOLYGON geometries
-            elif geom_name not in ["POLYGON", "MULTIPOLYGON"]:
-                layer.DeleteFeature(fid)
-                logger.warning(
-                    f"{self.projectId}"
-                    f" - check_input_geometries - "
-                    f"deleted non polygon feature {fid}"
-                )
-
-            else:
-                # Create output Feature
-                outFeature = ogr.Feature(outLayerDefn)
-                # Add field values from input Layer
-                for i in range(0, outLayerDefn.GetFieldCount()):
-                    outFeature.SetField(
-                        outLayerDefn.GetFieldDefn(i).GetNameRef(), feature.GetField(i)
-                    )
-                outFeature.SetGeometry(feat_geom)
-                outLayer.CreateFeature(outFeature)
-                outFeature = None
-
-        # check if layer is empty
-        if layer.GetFeatureCount() < 1:
-            err = "no geometries left after checking validity and geometry type."
-            logger.warning(f"{self.projectId} - check_input_geometry - {err}")
-            raise Exception(err)
-
-        del datasource
-        del outDataSource
-        del layer
-
         self.inputGeometriesFileName = valid_input_file
 
         logger.info(
@@ -174,10 +180,7 @@ class ArbitraryGeometryProject(BaseProject):
         return wkt_geometry
 
     def create_groups(self):
-        self.raw_groups = g.group_input_geometries(
-            self.inputGeometriesFileName, self.groupSize
-        )
-
+        # features are assigned to groups while validating the input geometries
         for group_id, item in self.raw_groups.items():
             self.groups[group_id] = ArbitraryGeometryGroup(
                 projectId=self.projectId,
@@ -224,7 +227,7 @@ class ArbitraryGeometryProject(BaseProject):
 
     @staticmethod
     @abstractmethod
-    def results_to_postgres(results: dict, project_id: str, filter_mode: bool):
+    def results_to_postgres(results: dict, project_id: str, p_con=None):
         """How to move the result data from firebase to postgres."""
         pass
 
@@ -124,12 +124,12 @@ class MediaClassificationProject(BaseProject):
         pass
 
     @staticmethod
-    def results_to_postgres(results: dict, project_id: str, filter_mode: bool):
+    def results_to_postgres(results: dict, project_id: str, p_con=None):
         """How to move the result data from firebase to postgres."""
         results_file, user_group_results_file = results_to_file(results, project_id)
 
-        truncate_temp_results()
-        save_results_to_postgres(results_file, project_id, filter_mode)
+        truncate_temp_results(p_con=p_con)
+        save_results_to_postgres(results_file, project_id, p_con=p_con)
         return user_group_results_file
 
     @staticmethod
@@ -1,10 +1,9 @@
-import csv
 import datetime as dt
 import json
 import os
 from abc import ABC, abstractmethod
 from dataclasses import asdict, dataclass
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
 
 from osgeo import ogr
 
@@ -12,6 +11,8 @@ from mapswipe_workers import auth
 from mapswipe_workers.definitions import DATA_PATH, CustomError, logger, sentry
 from mapswipe_workers.firebase.firebase import Firebase
 from mapswipe_workers.utils import geojson_functions
+from mapswipe_workers.utils.copy_stream import StringIteratorIO, copy_row
+from mapswipe_workers.utils.wkb_functions import wkt_to_ewkb
 
 
 @dataclass
@@ -34,6 +35,9 @@ class BaseGroup:
 
 
 class BaseProject(ABC):
+    # Type of the results, see transfer_results.results_to_file
+    result_type = "integer"
+
     def __init__(self, project_draft):
         # TODO define as abstract base attributes
         self.groups: Dict[str, BaseGroup]
@@ -205,7 +209,7 @@ class BaseProject(ABC):
             VALUES (
               %s  -- created
               ,%s  -- createdBy
-              ,ST_Force2D(ST_GeomFromText(%s, 4326)) -- geometry
+              ,ST_GeomFromEWKB(%s) -- geometry
               ,%s  -- image
               ,%s  -- isFeatured
               ,%s  -- lookFor
@@ -250,7 +254,7 @@ class BaseProject(ABC):
         data_project = [
             self.created,
             self.createdBy,
-            project["geometry"],
+            wkt_to_ewkb(project["geometry"], multi=False),
             project["image"],
             project["isFeatured"],
             project["lookFor"],
@@ -267,9 +271,10 @@ class BaseProject(ABC):
             project["requestingOrganisation"],
         ]
 
-        query_recreate_raw_groups = """
-            DROP TABLE IF EXISTS raw_groups CASCADE;
-            CREATE TABLE raw_groups (
+        # staging tables are only visible to this session
+        # and dropped at the end of the transaction
+        query_create_raw_groups = """
+            CREATE TEMP TABLE raw_groups (
               project_id varchar,
               group_id varchar,
               number_of_tasks int,
@@ -277,7 +282,7 @@ class BaseProject(ABC):
               required_count int,
               progress int,
               project_type_specifics json
-            );
+            ) ON COMMIT DROP;
             """
 
         query_insert_raw_groups = """
@@ -299,18 +304,16 @@ class BaseProject(ABC):
               progress,
               project_type_specifics
             FROM raw_groups;
-            DROP TABLE IF EXISTS raw_groups CASCADE;
             """
 
-        query_recreate_raw_tasks = """
-            DROP TABLE IF EXISTS raw_tasks CASCADE;
-            CREATE TABLE raw_tasks (
+        query_create_raw_tasks = """
+            CREATE TEMP TABLE raw_tasks (
                 project_id varchar,
                 group_id varchar,
                 task_id varchar,
-                geom varchar,
+                geom geometry,
                 project_type_specifics json
-            );
+            ) ON COMMIT DROP;
             """
 
         query_insert_raw_tasks = """
@@ -319,18 +322,11 @@ class BaseProject(ABC):
               project_id,
               group_id,
               task_id,
-              CASE
-                WHEN geom='' THEN NULL
-                ELSE ST_Force2D(ST_Multi(ST_GeomFromText(geom, 4326)))
-              END geom,
+              geom,
               project_type_specifics
             FROM raw_tasks;
-            DROP TABLE IF EXISTS raw_tasks CASCADE;
             """
 
-        groups_txt_filename = self.create_groups_txt_file(groups)
-        tasks_txt_filename = self.create_tasks_txt_file(groupsOfTasks)
-
         groups_columns = [
             "project_id",
             "group_id",
@@ -355,14 +351,19 @@ class BaseProject(ABC):
             p_con = auth.postgresDB()
             p_con._db_cur = p_con._db_connection.cursor()
             p_con._db_cur.execute(query_insert_project, data_project)
-            p_con._db_cur.execute(query_recreate_raw_groups, None)
-            p_con._db_cur.execute(query_recreate_raw_tasks, None)
-            with open(groups_txt_filename, "r") as groups_file:
-                p_con._db_cur.copy_from(
-                    groups_file, "raw_groups", columns=groups_columns
-                )
-            with open(tasks_txt_filename, "r") as tasks_file:
-                p_con._db_cur.copy_from(tasks_file, "raw_tasks", columns=tasks_columns)
+            p_con._db_cur.execute(query_create_raw_groups, None)
+            p_con._db_cur.execute(query_create_raw_tasks, None)
+            # rows are streamed to postgres while they are created
+            p_con._db_cur.copy_from(
+                StringIteratorIO(self.iter_groups_rows(groups)),
+                "raw_groups",
+                columns=groups_columns,
+            )
+            p_con._db_cur.copy_from(
+                StringIteratorIO(self.iter_tasks_rows(groupsOfTasks)),
+                "raw_tasks",
+                columns=tasks_columns,
+            )
             p_con._db_cur.execute(query_insert_raw_groups, None)
             p_con._db_cur.execute(query_insert_raw_tasks, None)
             p_con._db_connection.commit()
@@ -371,9 +372,6 @@ class BaseProject(ABC):
             del p_con
             raise
 
-        os.remove(groups_txt_filename)
-        os.remove(tasks_txt_filename)
-
     def save_to_files(self, project):
         """Save the project extent geometry as a GeoJSON file."""
 
@@ -397,81 +395,51 @@ class BaseProject(ABC):
         except FileNotFoundError:
             pass
 
-    def create_groups_txt_file(self, groups):
+    def iter_groups_rows(self, groups: dict) -> Iterator[str]:
         """
-        Creates a text file containing groups information
-        for a specific project.
-        The text file is temporary and used only by BaseImport module.
+        Yield the groups of the project as rows for COPY into raw_groups.
 
         Parameters
         ----------
-        projectId : int
-            The id of the project
         groups : dict
             The dictionary with the group information
 
-        Returns
-        -------
+        Yields
+        ------
         string
-            Filename
+            A row in the text format of COPY
         """
 
-        if not os.path.isdir("{}/tmp".format(DATA_PATH)):
-            os.mkdir("{}/tmp".format(DATA_PATH))
-
-        # create txt file with header for later
-        # import with copy function into postgres
-        groups_txt_filename = f"{DATA_PATH}/tmp/raw_groups_{self.projectId}.txt"
-        groups_txt_file = open(groups_txt_filename, "w", newline="")
-        fieldnames = (
-            "project_id",
-            "group_id",
-            "number_of_tasks",
-            "finished_count",
-            "required_count",
+        # these common attributes don't need to be written
+        # to the project_type_specifics since they are
+        # already stored in separate columns
+        common_attributes = [
+            "projectId",
+            "groupId",
+            "numberOfTasks",
+            "requiredCount",
+            "finishedCount",
             "progress",
-            "project_type_specifics",
-        )
-        w = csv.DictWriter(
-            groups_txt_file,
-            fieldnames=fieldnames,
-            delimiter="\t",
-            quotechar="'",
-        )
+        ]
 
         for groupId, group in groups.items():
             try:
-                output_dict = {
-                    "project_id": self.projectId,
-                    "group_id": groupId,
-                    "number_of_tasks": group["numberOfTasks"],
-                    "finished_count": group["finishedCount"],
-                    "required_count": group["requiredCount"],
-                    "progress": group["progress"],
-                    "project_type_specifics": dict(),
+                project_type_specifics = {
+                    key: value
+                    for key, value in group.items()
+                    if key not in common_attributes
                 }
-
-                # these common attributes don't need to be written
-                # to the project_type_specifics since they are
-                # already stored in separate columns
-                common_attributes = [
-                    "projectId",
-                    "groupId",
-                    "numberOfTasks",
-                    "requiredCount",
-                    "finishedCount",
-                    "progress",
-                ]
-
-                for key in group.keys():
-                    if key not in common_attributes:
-                        output_dict["project_type_specifics"][key] = group[key]
-                output_dict["project_type_specifics"] = json.dumps(
-                    output_dict["project_type_specifics"]
+                row = copy_row(
+                    [
+                        self.projectId,
+                        groupId,
+                        group["numberOfTasks"],
+                        group["finishedCount"],
+                        group["requiredCount"],
+                        group["progress"],
+                        json.dumps(project_type_specifics),
+                    ]
                 )
-
-                w.writerow(output_dict)
-
             except Exception as e:
                 logger.exception(
                     f"{self.projectId}"
@@ -479,85 +447,64 @@ class BaseProject(ABC):
                     f"groups missed critical information: {e}"
                 )
                 sentry.capture_exception()
+                continue
 
-        groups_txt_file.close()
+            yield row
 
-        return groups_txt_filename
-
-    def create_tasks_txt_file(self, groupsOfTasks):
+    def iter_tasks_rows(self, groupsOfTasks: dict) -> Iterator[str]:
         """
-        Creates a text file containing tasks information
-        for a specific project.
-        It interates over groups and extracts tasks.
-        The text file is temporary and used only by BaseImport module.
+        Yield the tasks of all groups as rows for COPY into raw_tasks.
 
         Parameters
         ----------
-        projectId : int
-            The id of the project
-        tasks : dictionary
+        groupsOfTasks : dictionary
             Dictionary containing tasks of a project
 
-        Returns
-        -------
+        Yields
+        ------
         string
-            Filename
+            A row in the text format of COPY
         """
 
-        if not os.path.isdir("{}/tmp".format(DATA_PATH)):
-            os.mkdir("{}/tmp".format(DATA_PATH))
-
-        # save tasks in txt file
-        tasks_txt_filename = f"{DATA_PATH}/tmp/raw_tasks_{self.projectId}.txt"
-        tasks_txt_file = open(tasks_txt_filename, "w", newline="")
-
-        fieldnames = (
-            "project_id",
-            "group_id",
-            "task_id",
-            "geom",
-            "project_type_specifics",
-        )
-        w = csv.DictWriter(
-            tasks_txt_file,
-            fieldnames=fieldnames,
-            delimiter="\t",
-            quotechar="'",
-        )
+        # these common attributes don't need to be written
+        # to the project_type_specifics since they are
+        # already stored in separate columns
+        common_attributes = [
+            "projectId",
+            "groupId",
+            "taskId",
+            "geometry",
+            "geojson",
+        ]
 
         for groupId, tasks in groupsOfTasks.items():
-            for task in tasks:
-                output_dict = {
-                    "project_id": self.projectId,
-                    "group_id": groupId,
-                    "task_id": task["taskId"],
-                    "geom": task["geometry"],
-                    "project_type_specifics": dict(),
+            geometries = self.get_task_geometries_as_ewkb(tasks)
+            for task, geometry in zip(tasks, geometries):
+                project_type_specifics = {
+                    key: value
+                    for key, value in task.items()
+                    if key not in common_attributes
                 }
+                yield copy_row(
+                    [
+                        self.projectId,
+                        groupId,
+                        task["taskId"],
+                        geometry,
+                        json.dumps(project_type_specifics),
+                    ]
+                )
 
-                # these common attributes don't need to be written
-                # to the project_type_specifics since they are
-                # already stored in separate columns
-                common_attributes = [
-                    "projectId",
-                    "groupId",
-                    "taskId",
-                    "geometry",
-                    "geojson",
-                ]
-
-                for key in task.keys():
-                    if key not in common_attributes:
-                        output_dict["project_type_specifics"][key] = task[key]
-                output_dict["project_type_specifics"] = json.dumps(
-                    output_dict["project_type_specifics"]
-                ).replace(
-                    "'", ""
-                )  # to prevent error: invalid token "'"
-
-                w.writerow(output_dict)
-        tasks_txt_file.close()
-        return tasks_txt_filename
+    def get_task_geometries_as_ewkb(self, tasks: List[dict]) -> List[Optional[str]]:
+        """Get the geometries of tasks as hex encoded 2D multipolygon EWKB.
+
+        Tasks without geometry (empty WKT) get None.
+        """
+        geometries = []
+        for task in tasks:
+            ewkb = wkt_to_ewkb(task["geometry"])
+            geometries.append(ewkb.hex() if ewkb is not None else None)
+        return geometries
 
     def delete_draft_from_firebase(self):
         firebase = Firebase()
@@ -637,7 +584,7 @@ class BaseProject(ABC):
 
     @staticmethod
     @abstractmethod
-    def results_to_postgres(results: dict, project_id: str, filter_mode: bool):
+    def results_to_postgres(results: dict, project_id: str, p_con=None):
         """How to move the result data from firebase to postgres."""
         pass
 
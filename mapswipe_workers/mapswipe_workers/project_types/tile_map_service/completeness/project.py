@@ -1,11 +1,15 @@
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
+
+import numpy as np
 
 from mapswipe_workers.project_types.tile_map_service.project import (
     TileMapServiceBaseProject,
     TileMapServiceBaseTask,
 )
 from mapswipe_workers.project_types.tile_server import BaseTileServer
-from mapswipe_workers.utils.tile_functions import tile_coords_zoom_and_tileserver_to_url
+from mapswipe_workers.utils.tile_functions import (
+    tile_coords_zoom_and_tileserver_to_urls,
+)
 
 
 @dataclass
@@ -27,14 +31,14 @@ class CompletenessProject(TileMapServiceBaseProject):
         super().create_tasks()
         # Add urlB attribute.
         for group_id, group in self.tasks.items():
-            tasks = []
-            for task in group:
-                urlB = tile_coords_zoom_and_tileserver_to_url(
-                    task.taskX,
-                    task.taskY,
-                    self.zoomLevel,
-                    self.tileServerB,
-                )
-                # Cast super task class to completeness task class.
-                tasks.append(CompletenessTask(**asdict(task), urlB=urlB))
-            self.tasks[group_id] = tasks
+            urls_b = tile_coords_zoom_and_tileserver_to_urls(
+                np.array([task.taskX for task in group], dtype=np.int64),
+                np.array([task.taskY for task in group], dtype=np.int64),
+                self.zoomLevel,
+                self.tileServerB,
+            ).tolist()
+            # Cast super task class to completeness task class.
+            self.tasks[group_id] = [
+                CompletenessTask(**vars(task), urlB=url_b)
+                for task, url_b in zip(group, urls_b)
+            ]
@@ -1,6 +1,6 @@
 from abc import abstractmethod
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from mapswipe_workers.firebase.firebase import Firebase
 from mapswipe_workers.firebase_to_postgres.transfer_results import (
@@ -25,7 +25,6 @@ from mapswipe_workers.utils.validate_input import (
 class TileMapServiceBaseTask(BaseTask):
     taskX: int
     taskY: int
-    geometry: str
     url: str
 
 
@@ -98,40 +97,47 @@ class TileMapServiceBaseProject(BaseProject):
         if len(self.groups) == 0:
             raise ValueError("Groups needs to be created before tasks can be created.")
         for group_id, group in self.groups.items():
-            self.tasks[group_id] = []
-            for TileX in range(group.xMin, group.xMax + 1):
-                for TileY in range(group.yMin, group.yMax + 1):
-                    geometry = tile_functions.geometry_from_tile_coords(
-                        TileX,
-                        TileY,
-                        self.zoomLevel,
-                    )
-
-                    url = tile_functions.tile_coords_zoom_and_tileserver_to_url(
-                        TileX,
-                        TileY,
-                        self.zoomLevel,
-                        self.tileServer,
-                    )
-                    self.tasks[group_id].append(
-                        TileMapServiceBaseTask(
-                            projectId=self.projectId,
-                            groupId=group_id,
-                            taskId=f"{self.zoomLevel}-{TileX}-{TileY}",
-                            taskX=TileX,
-                            taskY=TileY,
-                            geometry=geometry,
-                            url=url,
-                        )
-                    )
+            # Tasks of all tiles of a group are computed at once.
+            columns = tile_functions.tasks_from_tile_extent(
+                group.xMin,
+                group.xMax,
+                group.yMin,
+                group.yMax,
+                self.zoomLevel,
+                self.tileServer,
+            )
+            self.tasks[group_id] = [
+                TileMapServiceBaseTask(
+                    projectId=self.projectId,
+                    groupId=group_id,
+                    taskId=task_id,
+                    taskX=task_x,
+                    taskY=task_y,
+                    url=url,
+                )
+                for task_id, task_x, task_y, url in zip(
+                    columns["taskId"],
+                    columns["taskX"],
+                    columns["taskY"],
+                    columns["url"],
+                )
+            ]
             self.groups[group_id].numberOfTasks = len(self.tasks[group_id])
 
+    def get_task_geometries_as_ewkb(self, tasks: List[dict]) -> List[Optional[str]]:
+        """Compute the geometries of tasks from their tile coordinates."""
+        return tile_functions.tile_coords_and_zoom_to_ewkb(
+            [task["taskX"] for task in tasks],
+            [task["taskY"] for task in tasks],
+            self.zoomLevel,
+        )
+
     @staticmethod
-    def results_to_postgres(results: dict, project_id: str, filter_mode: bool):
+    def results_to_postgres(results: dict, project_id: str, p_con=None):
         """How to move the result data from firebase to postgres."""
         results_file, user_group_results_file = results_to_file(results, project_id)
-        truncate_temp_results()
-        save_results_to_postgres(results_file, project_id, filter_mode)
+        truncate_temp_results(p_con=p_con)
+        save_results_to_postgres(results_file, project_id, p_con=p_con)
         return user_group_results_file
 
     @staticmethod
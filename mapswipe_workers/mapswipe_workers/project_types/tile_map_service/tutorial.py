@@ -118,7 +118,6 @@ class TileMapServiceBaseTutorial(BaseTutorial):
                         "url": t.tile_coords_zoom_and_tileserver_to_url(
                             tile_x, tile_y, self.zoomLevel, self.tileServer
                         ),
-                        "geometry": "",  # TODO: does this work?
                     }
                 )
 
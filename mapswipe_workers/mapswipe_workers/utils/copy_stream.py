@@ -0,0 +1,61 @@
+"""Stream rows into postgres with COPY without writing files.
+
+Rows are created by a generator, formatted in the text format of COPY
+and read by psycopg2 through a file-like object in chunks.
+Only a chunk of rows is held in memory at a time.
+"""
+
+import io
+from typing import Any, Iterable, Iterator, Optional
+
+# Characters which have to be escaped in the text format of COPY.
+COPY_ESCAPE = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def copy_row(values: Iterable[Any]) -> str:
+    """Format values as a line in the text format of COPY. None is NULL."""
+    return (
+        "\t".join(
+            "\\N" if value is None else str(value).translate(COPY_ESCAPE)
+            for value in values
+        )
+        + "\n"
+    )
+
+
+class StringIteratorIO(io.TextIOBase):
+    """Read-only file-like object over an iterator of strings."""
+
+    def __init__(self, iterator: Iterator[str]):
+        self._iter = iterator
+        self._buffer = ""
+
+    def readable(self) -> bool:
+        return True
+
+    def _read1(self, n: Optional[int] = None) -> str:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._iter)
+            except StopIteration:
+                break
+        chunk = self._buffer[:n]
+        self._buffer = self._buffer[len(chunk) :]
+        return chunk
+
+    def read(self, n: Optional[int] = None) -> str:
+        chunks = []
+        if n is None or n < 0:
+            while True:
+                chunk = self._read1()
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        else:
+            while n > 0:
+                chunk = self._read1(n)
+                if not chunk:
+                    break
+                n -= len(chunk)
+                chunks.append(chunk)
+        return "".join(chunks)
@@ -0,0 +1,136 @@
+"""Read and write the features of a GeoJSON FeatureCollection incrementally.
+
+The input file is read in chunks and every feature is decoded on its own.
+Only the current feature and a chunk of the file are held in memory at a time.
+"""
+
+import json
+from typing import IO, Any, Iterable, Iterator
+
+CHUNK_SIZE = 65536
+WHITESPACE = " \t\n\r"
+
+_decoder = json.JSONDecoder()
+
+
+class _ChunkReader:
+    """Decode JSON values one after another from a file read in chunks."""
+
+    def __init__(self, file: IO[str], chunk_size: int):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+
+    def _fill(self) -> bool:
+        """Read the next chunk. Returns False at the end of the file."""
+        # Read at least as much as is pending, so that a value spanning many
+        # chunks is not decoded again for every chunk.
+        chunk = self._file.read(max(self._chunk_size, len(self._buffer) - self._pos))
+        if not chunk:
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character or "" at the end."""
+        while True:
+            while (
+                self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE
+            ):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def next(self) -> str:
+        """Skip whitespace and consume the next character."""
+        char = self.peek()
+        self._pos += len(char)
+        return char
+
+    def expect(self, char: str) -> None:
+        found = self.next()
+        if found != char:
+            raise ValueError(f"Expecting '{char}' in GeoJSON, found '{found}'")
+
+    def value(self) -> Any:
+        """Decode the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer might continue in the next chunk.
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_features(file: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the features of a GeoJSON FeatureCollection one by one.
+
+    Other members of the FeatureCollection are decoded and dropped.
+    Raises a ValueError if the file is not valid JSON
+    or has no "features" array.
+    """
+    reader = _ChunkReader(file, chunk_size)
+    reader.expect("{")
+    has_features = False
+    if reader.peek() == "}":
+        reader.next()
+    else:
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            if key == "features":
+                has_features = True
+                reader.expect("[")
+                if reader.peek() == "]":
+                    reader.next()
+                else:
+                    while True:
+                        yield reader.value()
+                        char = reader.next()
+                        if char == "]":
+                            break
+                        if char != ",":
+                            raise ValueError(
+                                f"Expecting ',' in GeoJSON, found '{char}'"
+                            )
+            else:
+                reader.value()
+            char = reader.next()
+            if char == "}":
+                break
+            if char != ",":
+                raise ValueError(f"Expecting ',' in GeoJSON, found '{char}'")
+    if reader.peek():
+        raise ValueError("Extra data after GeoJSON")
+    if not has_features:
+        raise ValueError("GeoJSON has no features")
+
+
+def write_features(
+    features: Iterable[Any], file: IO[str], name: str = "geometries"
+) -> Iterator[Any]:
+    """Write features to a GeoJSON FeatureCollection file while yielding them.
+
+    The FeatureCollection is complete once all features have been consumed.
+    """
+    file.write(
+        f'{{"type": "FeatureCollection", "name": {json.dumps(name)}, "features": ['
+    )
+    for i, feature in enumerate(features):
+        if i:
+            file.write(",")
+        file.write("\n")
+        json.dump(feature, file)
+        yield feature
+    file.write("\n]}\n")
@@ -1,15 +1,23 @@
 import base64
+import concurrent.futures
 import gzip
 import io
 import json
-from typing import Dict, List
+import os
+from itertools import repeat
+from typing import Dict, List, Optional
 
+from mapswipe_workers.config import TASKS_COMPRESSION_LEVEL, TASKS_COMPRESSION_WORKERS
 
-def gzip_str(string_: str) -> bytes:
+# Below this number of groups tasks are compressed in the current process.
+MIN_GROUPS_FOR_POOL = 50
+
+
+def gzip_str(string_: str, compresslevel: int = 9) -> bytes:
     """Produce a complete gzip-compatible binary string."""
     out = io.BytesIO()
 
-    with gzip.GzipFile(fileobj=out, mode="w") as fo:
+    with gzip.GzipFile(fileobj=out, mode="w", compresslevel=compresslevel) as fo:
         fo.write(string_.encode())
 
     bytes_obj = out.getvalue()
@@ -21,13 +29,45 @@ def gunzip_bytes_obj(bytes_obj: bytes) -> str:
     return gzip.decompress(bytes_obj).decode()
 
 
-def compress_tasks(tasks_list: List[Dict]) -> str:
+def compress_tasks(
+    tasks_list: List[Dict], compresslevel: int = TASKS_COMPRESSION_LEVEL
+) -> str:
     """Compress tasks for validate project type using gzip."""
-    json_string_tasks = json.dumps(tasks_list).replace(" ", "").replace("\n", "")
-    compressed_tasks = gzip_str(json_string_tasks)
+    # compact JSON without whitespace as expected by the app
+    json_string_tasks = json.dumps(tasks_list, separators=(",", ":"))
+    compressed_tasks = gzip_str(json_string_tasks, compresslevel)
     # we need to decode back, but only when using Python 3.6
     # when using Python 3.7 it just works
     # Unfortunately the docker image uses Python 3.6
     encoded_tasks = base64.b64encode(compressed_tasks).decode("ascii")
 
     return encoded_tasks
+
+
+def compress_tasks_of_groups(
+    groups_of_tasks: Dict[str, List[Dict]],
+    compresslevel: int = TASKS_COMPRESSION_LEVEL,
+    max_workers: Optional[int] = None,
+) -> Dict[str, str]:
+    """Compress the tasks of each group using a pool of processes.
+
+    Compression is CPU bound, hence processes are used instead of threads.
+    max_workers defaults to TASKS_COMPRESSION_WORKERS or the number of CPUs.
+    """
+    if max_workers is None:
+        max_workers = int(TASKS_COMPRESSION_WORKERS or os.cpu_count() or 1)
+    group_ids = list(groups_of_tasks.keys())
+    tasks_lists = [groups_of_tasks[group_id] for group_id in group_ids]
+
+    if max_workers == 1 or len(group_ids) < MIN_GROUPS_FOR_POOL:
+        compressed = map(compress_tasks, tasks_lists, repeat(compresslevel))
+        return dict(zip(group_ids, compressed))
+
+    # send tasks to the processes in chunks of groups
+    # to reduce the overhead of inter-process communication
+    chunksize = max(1, len(group_ids) // (max_workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        compressed = executor.map(
+            compress_tasks, tasks_lists, repeat(compresslevel), chunksize=chunksize
+        )
+        return dict(zip(group_ids, compressed))
@@ -1,8 +1,7 @@
-from typing import Optional
+from typing import Dict, Iterable, Optional
 
 import slack
 
-from mapswipe_workers import auth
 from mapswipe_workers.config import SLACK_CHANNEL, SLACK_TOKEN
 from mapswipe_workers.definitions import MessageType, logger
 
@@ -81,32 +80,33 @@ def send_slack_message(
         pass
 
 
-def send_progress_notification(project_id: str):
-    """Send progress notification to project managers in Slack."""
-    fb_db = auth.firebaseDB()
-    progress = fb_db.reference(f"v2/projects/{project_id}/progress").get()
+def get_progress_notifications(
+    project_id: str, project: dict, progress: int
+) -> Dict[str, MessageType]:
+    """Get the progress notifications which still need to be sent for a project.
 
-    if not progress:
-        logger.info(f"could not get progress from firebase for project {project_id}")
-    elif progress >= 90:
-        project_name = fb_db.reference(f"v2/projects/{project_id}/name").get()
-        notification_90_sent = fb_db.reference(
-            f"v2/projects/{project_id}/notification_90_sent"
-        ).get()
-        notification_100_sent = fb_db.reference(
-            f"v2/projects/{project_id}/notification_100_sent"
-        ).get()
-        logger.info(
-            f"{project_id} - progress: {progress},"
-            f"notifications: {notification_90_sent} {notification_100_sent}"
-        )
+    The project dict holds name and notification flags of the project
+    as stored in Firebase. Returns the notifications to send
+    by the notification flag to set in Firebase.
+    """
+    notification_90_sent = project.get("notification_90_sent")
+    notification_100_sent = project.get("notification_100_sent")
+    logger.info(
+        f"{project_id} - progress: {progress},"
+        f"notifications: {notification_90_sent} {notification_100_sent}"
+    )
 
-        if progress >= 90 and not notification_90_sent:
-            # send notification and set value in firebase
-            send_slack_message(MessageType.NOTIFICATION_90, project_name, project_id)
-            fb_db.reference(f"v2/projects/{project_id}/notification_90_sent").set(True)
+    notifications = {}
+    if progress >= 90 and not notification_90_sent:
+        notifications["notification_90_sent"] = MessageType.NOTIFICATION_90
+    if progress >= 100 and not notification_100_sent:
+        notifications["notification_100_sent"] = MessageType.NOTIFICATION_100
+    return notifications
 
-        if progress >= 100 and not notification_100_sent:
-            # send notification and set value in firebase
-            send_slack_message(MessageType.NOTIFICATION_100, project_name, project_id)
-            fb_db.reference(f"v2/projects/{project_id}/notification_100_sent").set(True)
+
+def send_progress_notification(
+    project_id: str, project: dict, notifications: Iterable[MessageType]
+):
+    """Send progress notifications to project managers in Slack."""
+    for message_type in notifications:
+        send_slack_message(message_type, project.get("name"), project_id)
@@ -1,7 +1,17 @@
 import math
+from typing import Dict, List, Optional
 
+import numpy as np
 from osgeo import ogr
 
+from mapswipe_workers.utils import wkb_functions
+
+# Placeholders which are substituted into URL templates
+# to find the positions of tile coordinates in the formatted URL.
+URL_X = "\x00x\x00"
+URL_Y = "\x00y\x00"
+URL_QUADKEY = "\x00q\x00"
+
 
 class Point:
     """
@@ -175,3 +185,206 @@ def geometry_from_tile_coords(TileX, TileY, zoom):
 
     wkt_geom = poly.ExportToWkt()
     return wkt_geom
+
+
+# 2D multipolygon with a single ring of 5 points as EWKB (see wkb_functions).
+TILE_EWKB_DTYPE = np.dtype(
+    [
+        ("byte_order", "u1"),
+        ("type", "<u4"),
+        ("srid", "<u4"),
+        ("num_polygons", "<u4"),
+        ("polygon_byte_order", "u1"),
+        ("polygon_type", "<u4"),
+        ("num_rings", "<u4"),
+        ("num_points", "<u4"),
+        ("coordinates", "<f8", (10,)),
+    ]
+)
+
+
+def tile_coords_and_zoom_to_ewkb(tile_x, tile_y, zoom: int) -> List[str]:
+    """Compute the polygon geometries of tiles as hex encoded EWKB.
+
+    Same polygons as geometry_from_tile_coords, but as 2D multipolygons
+    with the full precision of the coordinates.
+    """
+    tile_x = np.asarray(tile_x, dtype=np.int64)
+    tile_y = np.asarray(tile_y, dtype=np.int64)
+    # Coordinates are computed once for each edge of the tiles.
+    x_values = np.unique(np.concatenate([tile_x, tile_x + 1]))
+    y_values = np.unique(np.concatenate([tile_y, tile_y + 1]))
+    lons = np.array(
+        [pixel_coords_zoom_to_lat_lon(x * 256, 0, zoom)[0] for x in x_values.tolist()]
+    )
+    lats = np.array(
+        [pixel_coords_zoom_to_lat_lon(0, y * 256, zoom)[1] for y in y_values.tolist()]
+    )
+    lon_left = lons[np.searchsorted(x_values, tile_x)]
+    lon_right = lons[np.searchsorted(x_values, tile_x + 1)]
+    lat_top = lats[np.searchsorted(y_values, tile_y)]
+    lat_bottom = lats[np.searchsorted(y_values, tile_y + 1)]
+
+    ewkb = np.zeros(len(tile_x), dtype=TILE_EWKB_DTYPE)
+    ewkb["byte_order"] = wkb_functions.WKB_NDR
+    ewkb["type"] = wkb_functions.WKB_MULTIPOLYGON | wkb_functions.EWKB_SRID_FLAG
+    ewkb["srid"] = wkb_functions.SRID
+    ewkb["num_polygons"] = 1
+    ewkb["polygon_byte_order"] = wkb_functions.WKB_NDR
+    ewkb["polygon_type"] = wkb_functions.WKB_POLYGON
+    ewkb["num_rings"] = 1
+    ewkb["num_points"] = 5
+    ewkb["coordinates"] = np.stack(
+        [
+            lon_left,
+            lat_top,
+            lon_right,
+            lat_top,
+            lon_right,
+            lat_bottom,
+            lon_left,
+            lat_bottom,
+            lon_left,
+            lat_top,
+        ],
+        axis=1,
+    )
+    hex_ewkb = ewkb.tobytes().hex()
+    size = 2 * TILE_EWKB_DTYPE.itemsize
+    return [hex_ewkb[i : i + size] for i in range(0, len(hex_ewkb), size)]
+
+
+def fill_url_template(template: str, values: Dict[str, np.ndarray]) -> np.ndarray:
+    """Replace placeholders in a formatted URL by arrays of values."""
+    size = len(next(iter(values.values())))
+    urls = np.full(size, "", dtype=object)
+    parts = [template]
+    for placeholder in values.keys():
+        parts = [
+            piece
+            for part in parts
+            for i, split in enumerate(part.split(placeholder))
+            for piece in ([placeholder, split] if i else [split])
+        ]
+    for part in parts:
+        urls = urls + (values[part] if part in values else part)
+    return urls
+
+
+def format_url_template(url: str, **kwargs) -> Optional[str]:
+    """Format a URL template with placeholders for the tile coordinates.
+
+    Returns None if the template formats the coordinates as numbers
+    (e.g. {x:05d}), which does not work with placeholders.
+    """
+    try:
+        return url.format(**kwargs)
+    except ValueError:
+        return None
+
+
+def tile_coords_and_zoom_to_quadKeys(
+    tile_x: np.ndarray, tile_y: np.ndarray, zoom: int
+) -> np.ndarray:
+    """Create quadkeys for arrays of tile coordinates."""
+    if zoom == 0:
+        return np.full(len(tile_x), "", dtype=object)
+    bits = np.arange(zoom - 1, -1, -1)
+    digits = ((tile_x[:, None] >> bits) & 1) + 2 * ((tile_y[:, None] >> bits) & 1)
+    characters = (digits + ord("0")).astype(np.uint8)
+    return characters.view(f"S{zoom}").ravel().astype(str).astype(object)
+
+
+def tile_coords_zoom_and_tileserver_to_urls(
+    tile_x: np.ndarray, tile_y: np.ndarray, tile_z: int, tile_server: dict
+) -> np.ndarray:
+    """Create URLs for arrays of tile coordinates.
+
+    Same as tile_coords_zoom_and_tileserver_to_url for each tile.
+    The URL template is formatted once with placeholders
+    which are then replaced by the tile coordinates.
+    """
+    name = tile_server["name"]
+    if name not in ("bing", "sinergise") and (
+        "maxar" in name or "{-y}" in tile_server["url"]
+    ):
+        # Google tile y coordinate, see tile_coords_zoom_and_tileserver_to_url
+        google_tile_y = (1 << tile_z) - tile_y - 1
+    else:
+        google_tile_y = tile_y
+    values = {
+        URL_X: tile_x.astype(str).astype(object),
+        URL_Y: google_tile_y.astype(str).astype(object),
+    }
+
+    if name == "bing":
+        template = quadKey_to_Bing_URL(URL_QUADKEY, tile_server["apiKey"])
+        values = {URL_QUADKEY: tile_coords_and_zoom_to_quadKeys(tile_x, tile_y, tile_z)}
+    elif name == "sinergise":
+        template = format_url_template(
+            tile_server["url"],
+            key=tile_server["apiKey"],
+            x=URL_X,
+            y=URL_Y,
+            z=tile_z,
+            layer=tile_server["wmtsLayerName"],
+        )
+    else:
+        template = tile_server["url"]
+        if "maxar" not in name:
+            template = template.replace("{-y}", "{y}")
+        template = format_url_template(
+            template,
+            key=tile_server["apiKey"],
+            x=URL_X,
+            y=URL_Y,
+            z=tile_z,
+        )
+    if template is None:
+        return np.array(
+            [
+                tile_coords_zoom_and_tileserver_to_url(x, y, tile_z, tile_server)
+                for x, y in zip(tile_x.tolist(), tile_y.tolist())
+            ],
+            dtype=object,
+        )
+    return fill_url_template(template, values)
+
+
+def tasks_from_tile_extent(
+    x_min: int,
+    x_max: int,
+    y_min: int,
+    y_max: int,
+    zoom: int,
+    tile_server: dict,
+) -> Dict[str, List]:
+    """Create the tasks for all tiles of an extent in columnar form.
+
+    Returns lists of task ids, tile coordinates and URLs,
+    ordered by x and then by y.
+    Geometries are not included, they are computed from the tile coordinates
+    with tile_coords_and_zoom_to_ewkb when the tasks are saved to Postgres.
+    """
+    tile_x, tile_y = np.meshgrid(
+        np.arange(x_min, x_max + 1, dtype=np.int64),
+        np.arange(y_min, y_max + 1, dtype=np.int64),
+        indexing="ij",
+    )
+    tile_x = tile_x.ravel()
+    tile_y = tile_y.ravel()
+    task_ids = fill_url_template(
+        f"{zoom}-{URL_X}-{URL_Y}",
+        {
+            URL_X: tile_x.astype(str).astype(object),
+            URL_Y: tile_y.astype(str).astype(object),
+        },
+    )
+    return {
+        "taskId": task_ids.tolist(),
+        "taskX": tile_x.tolist(),
+        "taskY": tile_y.tolist(),
+        "url": tile_coords_zoom_and_tileserver_to_urls(
+            tile_x, tile_y, zoom, tile_server
+        ).tolist(),
+    }
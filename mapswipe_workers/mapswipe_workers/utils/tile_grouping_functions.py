@@ -1,5 +1,6 @@
 import math
-from typing import Dict, List
+from collections import defaultdict
+from typing import Dict, Iterator, List
 
 from osgeo import ogr
 
@@ -50,14 +51,25 @@ def get_geometry_from_file(infile: str):
     return extent, geomcol
 
 
+def get_polygons(geomcol) -> Iterator:
+    """Iterate over the geometries of a collection and the parts of multipolygons."""
+    for i in range(0, geomcol.GetGeometryCount()):
+        geometry = geomcol.GetGeometryRef(i)
+        if geometry.GetGeometryName() == "MULTIPOLYGON":
+            yield from geometry
+        else:
+            yield geometry
+
+
 def get_horizontal_slice(extent: List, geomcol, zoom: int):
     """
     The function slices all input geometries vertically
     using a height of max 3 tiles per geometry.
-    The function iterates over all input geometries.
-    For each geometry tile coordinates are calculated.
-    Then this geometry is split into several geometries using the min
-    and max tile coordinates for the geometry.
+    The function iterates over all input polygons
+    and the parts of multipolygons.
+    For each polygon the tile coordinates of its envelope are calculated.
+    Then this polygon is split into several geometries using the rows
+    of the layer extent which lie within its envelope.
 
     Parameters
     ----------
@@ -87,40 +99,56 @@ def get_horizontal_slice(extent: List, geomcol, zoom: int):
     ymin = extent[2]
     ymax = extent[3]
 
-    for i in range(0, geomcol.GetGeometryCount()):
-        polygon_to_slice = geomcol.GetGeometryRef(i)
-        # logging.info('polygon to slice: %s' % polygon_to_slice)'''
-
-        # polygon_to_slice = geomcol.GetGeometryRef(0)
-
-        # get upper left left tile coordinates
-        pixel = t.lat_long_zoom_to_pixel_coords(ymax, xmin, zoom)
+    # The rows of all polygons are aligned to the tiles of the layer extent.
+    # Hence groups of different polygons can only overlap
+    # with groups of the same row (see adjust_overlapping_groups).
+    # get upper left left tile coordinates
+    pixel = t.lat_long_zoom_to_pixel_coords(ymax, xmin, zoom)
+    tile = t.pixel_coords_to_tile_address(pixel.x, pixel.y)
+    TileY_top = tile.y
+
+    # get lower right tile coordinates
+    pixel = t.lat_long_zoom_to_pixel_coords(ymin, xmax, zoom)
+    tile = t.pixel_coords_to_tile_address(pixel.x, pixel.y)
+    TileX_right = tile.x
+    TileY_bottom = tile.y
+    TileHeight = abs(TileY_top - TileY_bottom)
+
+    # get rows
+    rows = int(math.ceil(TileHeight / 3))
+
+    for polygon_to_slice in get_polygons(geomcol):
+        # only slice the rows within the envelope of the polygon
+        polygon_extent = polygon_to_slice.GetEnvelope()
+        pixel = t.lat_long_zoom_to_pixel_coords(
+            polygon_extent[3], polygon_extent[0], zoom
+        )
         tile = t.pixel_coords_to_tile_address(pixel.x, pixel.y)
-        TileX_left = tile.x
-        TileY_top = tile.y
+        polygon_tile_x_left = tile.x
+        polygon_tile_y_top = tile.y
 
-        # get lower right tile coordinates
-        pixel = t.lat_long_zoom_to_pixel_coords(ymin, xmax, zoom)
+        pixel = t.lat_long_zoom_to_pixel_coords(
+            polygon_extent[2], polygon_extent[1], zoom
+        )
         tile = t.pixel_coords_to_tile_address(pixel.x, pixel.y)
+        # slices end at the left edge of the last tile column of the layer
+        polygon_tile_x_right = min(tile.x + 1, TileX_right)
+        polygon_tile_y_bottom = tile.y
 
-        TileX_right = tile.x
-        TileY_bottom = tile.y
-        TileHeight = abs(TileY_top - TileY_bottom)
-
-        TileY = TileY_top
-
-        # get rows
-        rows = int(math.ceil(TileHeight / 3))
+        first_row = max(0, (polygon_tile_y_top - TileY_top) // 3)
+        last_row = min(rows, (polygon_tile_y_bottom - TileY_top) // 3)
 
         ############################################################
 
-        for i in range(0, rows + 1):
+        for row in range(first_row, last_row + 1):
+            TileY = TileY_top + row * 3
+
             # Calculate lat, lon of upper left corner of tile
-            PixelX = TileX_left * 256
+            PixelX = polygon_tile_x_left * 256
             PixelY = TileY * 256
             lon_left, lat_top = t.pixel_coords_zoom_to_lat_lon(PixelX, PixelY, zoom)
 
-            PixelX = TileX_right * 256
+            PixelX = polygon_tile_x_right * 256
             PixelY = (TileY + 3) * 256
             lon_right, lat_bottom = t.pixel_coords_zoom_to_lat_lon(PixelX, PixelY, zoom)
 
@@ -151,8 +179,6 @@ def get_horizontal_slice(extent: List, geomcol, zoom: int):
             else:
                 pass
 
-            TileY = TileY + 3
-
     return slice_infos
 
 
@@ -366,36 +392,50 @@ def merge_groups(group_a: Dict, group_b: Dict, zoom: int):
 
 
 def adjust_overlapping_groups(groups: Dict, zoom: int):
-    """Loop through groups dict and merge overlapping groups."""
+    """Merge overlapping groups in a single pass.
+
+    All groups are created for tile rows of the same grid
+    (see get_horizontal_slice). Hence groups can only overlap
+    with groups of the same row. The groups of each row are sorted by xMin
+    and swept from left to right. A group which starts before the
+    previous group ends is merged into the previous group.
+    Since merged groups are extended to an even width, a merged group
+    is compared with the next group again. Therefore no overlaps remain
+    after a single pass.
+
+    The merged group gets the id of the group which comes first in groups.
+    Returns the groups without overlap and the number of merged groups.
+    """
+    order = {group_id: i for i, group_id in enumerate(groups.keys())}
+    rows = defaultdict(list)
+    for group_id, group in groups.items():
+        rows[(int(group["yMin"]), int(group["yMax"]))].append(group_id)
 
     groups_without_overlap = {}
     overlaps_total = 0
-
-    for group_id in list(groups.keys()):
-
-        # skip if groups has been removed already
-        if group_id not in groups.keys():
-            continue
-
-        overlap_count = 0
-        for group_id_b in list(groups.keys()):
-            # skip if it is the same group
-            if group_id_b == group_id:
-                continue
-
-            if groups_intersect(groups[group_id], groups[group_id_b]):
-                overlap_count += 1
-                new_group = merge_groups(groups[group_id], groups[group_id_b], zoom)
-                del groups[group_id_b]
-                groups_without_overlap[group_id] = new_group
-
-        if overlap_count == 0:
-            groups_without_overlap[group_id] = groups[group_id]
-
-        del groups[group_id]
-        overlaps_total += overlap_count
+    for row_group_ids in rows.values():
+        row_group_ids.sort(key=lambda group_id: int(groups[group_id]["xMin"]))
+        previous_id = None
+        for group_id in row_group_ids:
+            group = groups[group_id]
+            if previous_id is not None and int(group["xMin"]) <= int(
+                groups_without_overlap[previous_id]["xMax"]
+            ):
+                overlaps_total += 1
+                new_group = merge_groups(
+                    groups_without_overlap.pop(previous_id), group, zoom
+                )
+                previous_id = min(previous_id, group_id, key=order.get)
+                groups_without_overlap[previous_id] = new_group
+            else:
+                groups_without_overlap[group_id] = group
+                previous_id = group_id
 
     logger.info(f"overlaps_total: {overlaps_total}")
+    groups_without_overlap = {
+        group_id: groups_without_overlap[group_id]
+        for group_id in sorted(groups_without_overlap, key=order.get)
+    }
     return groups_without_overlap, overlaps_total
 
 
@@ -428,19 +468,7 @@ def extent_to_groups(infile, zoom: int, groupSize):
     raw_groups_dict = get_vertical_slice(horizontal_slice_infos, zoom, groupSize)
 
     # finally remove overlapping groups
-    groups_dict, overlaps_total = adjust_overlapping_groups(raw_groups_dict, zoom)
-
-    # check if there are still overlaps
-    c = 0
-    while overlaps_total > 0:
-        c += 1
-        # avoid that this runs forever
-        if c == 5:
-            break
-
-        groups_dict, overlaps_total = adjust_overlapping_groups(
-            groups_dict.copy(), zoom
-        )
+    groups_dict, _ = adjust_overlapping_groups(raw_groups_dict, zoom)
 
     return groups_dict
 
@@ -0,0 +1,41 @@
+"""Encode geometries as EWKB for postgis.
+
+EWKB is the binary format of postgis: WKB with the SRID of the geometry.
+Postgis reads hex encoded EWKB into geometry columns without parsing text.
+All geometries are encoded in little endian byte order (NDR).
+"""
+
+import struct
+from typing import Optional
+
+from osgeo import ogr
+
+WKB_NDR = 1
+WKB_POLYGON = 3
+WKB_MULTIPOLYGON = 6
+EWKB_SRID_FLAG = 0x20000000
+SRID = 4326
+
+
+def geometry_to_ewkb(
+    geometry: ogr.Geometry, srid: int = SRID, multi: bool = True
+) -> bytes:
+    """Encode a geometry as 2D EWKB.
+
+    If multi is True polygons are converted to multipolygons.
+    """
+    geometry = geometry.Clone()
+    if multi:
+        geometry = ogr.ForceToMultiPolygon(geometry)
+    geometry.FlattenTo2D()
+    wkb = bytes(geometry.ExportToWkb(ogr.wkbNDR))
+    (geometry_type,) = struct.unpack("<I", wkb[1:5])
+    # The SRID follows the geometry type, which is flagged to have an SRID.
+    return wkb[:1] + struct.pack("<II", geometry_type | EWKB_SRID_FLAG, srid) + wkb[5:]
+
+
+def wkt_to_ewkb(wkt: str, srid: int = SRID, multi: bool = True) -> Optional[bytes]:
+    """Encode a WKT geometry as 2D EWKB. Returns None for an empty string."""
+    if not wkt:
+        return None
+    return geometry_to_ewkb(ogr.CreateGeometryFromWkt(wkt), srid, multi)
@@ -0,0 +1,58 @@
+import unittest
+
+from mapswipe_workers import auth
+from mapswipe_workers.firebase_to_postgres import transfer_results
+from tests.integration import base, set_up, tear_down
+
+
+class TestTransferResultsBatch(base.BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        project_type = "tile_map_service_grid"
+        fixture_name = "build_area"
+        self.project_id = set_up.create_test_project(
+            project_type, fixture_name, results=False
+        )
+        # add some results in firebase
+        set_up.set_firebase_test_data(project_type, "users", "user", self.project_id)
+        set_up.set_firebase_test_data(project_type, "user_groups", "user_group", "")
+        set_up.set_firebase_test_data(
+            project_type, "results", fixture_name, self.project_id
+        )
+
+    def tearDown(self):
+        tear_down.delete_test_data(self.project_id)
+
+    def check_transferred_results(self):
+        fb_db = auth.firebaseDB()
+        ref = fb_db.reference(f"v2/results/{self.project_id}")
+        self.assertIsNone(ref.get())
+
+        pg_db = auth.postgresDB()
+        sql_query = (
+            f"SELECT items_count "
+            f"FROM mapping_sessions "
+            f"WHERE project_id = '{self.project_id}' "
+            f"AND user_id = '{self.project_id}'"
+        )
+        result = pg_db.retr_query(sql_query)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0][0], 252)
+
+    def test_transfer_results_batch(self):
+        """Test if results of small projects are transferred in a batch."""
+        transfer_results.transfer_results(
+            project_id_list=[self.project_id], batch_size=1000
+        )
+        self.check_transferred_results()
+
+    def test_transfer_results_larger_than_batch_size(self):
+        """Test if results of larger projects are transferred on their own."""
+        transfer_results.transfer_results(
+            project_id_list=[self.project_id], batch_size=100
+        )
+        self.check_transferred_results()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -51,9 +51,9 @@ class TestTransferInvalidResultsProject(base.BaseTestCase):
         """Test for results that are not valid.
 
         In this test the results contain an additional task.
-        This should raise a Database error due to a foreign key violation.
-        Because results could not be stored in Postgres DB,
-        they should also NOT be deleted in Firebase.
+        The result for this task is removed before results are copied to postgres.
+        All other results should be stored in Postgres DB
+        and deleted in Firebase.
         """
 
         test_dir = os.path.dirname(__file__)
@@ -79,6 +79,32 @@ class TestTransferInvalidResultsProject(base.BaseTestCase):
         )
         self.assertIsNone(ref.get(shallow=True))
 
+    def test_result_for_missing_group(self):
+        """Test for results of a group which does not exist in postgres.
+
+        The results for this group are removed before results are copied
+        to postgres instead of failing with a ForeignKeyViolation in every run.
+        All results are deleted in Firebase.
+        """
+
+        test_dir = os.path.dirname(__file__)
+        file_path = os.path.join(
+            test_dir, "fixtures", "tile_map_service_grid", "results", "build_area.json"
+        )
+
+        with open(file_path) as test_file:
+            test_data = json.load(test_file)
+        test_data["g_missing"] = test_data["g115"]
+
+        fb_db = auth.firebaseDB()
+        ref = fb_db.reference(f"/v2/results/{self.project_id}")
+        ref.set(test_data)
+
+        transfer_results.transfer_results(project_id_list=[self.project_id])
+
+        self.verify_mapping_results_in_postgres()
+        self.assertIsNone(ref.get(shallow=True))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import Mock
+
+from mapswipe_workers import auth
+from mapswipe_workers.firebase_to_postgres import transfer_results
+from tests.integration import base, set_up, tear_down
+
+
+class TestTransferResultsParallel(base.BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        project_type = "tile_map_service_grid"
+        fixture_name = "build_area"
+        self.project_id = set_up.create_test_project(
+            project_type, fixture_name, results=False
+        )
+        # add some results in firebase
+        set_up.set_firebase_test_data(project_type, "users", "user", self.project_id)
+        set_up.set_firebase_test_data(project_type, "user_groups", "user_group", "")
+        set_up.set_firebase_test_data(
+            project_type, "results", fixture_name, self.project_id
+        )
+
+    def tearDown(self):
+        tear_down.delete_test_data(self.project_id)
+
+    def test_session_temp_tables(self):
+        """Test if session temp tables shadow the shared temp tables."""
+        pg_db = auth.postgresDB()
+        transfer_results.create_session_temp_tables(pg_db)
+        pg_db.query("INSERT INTO results_user_groups_temp VALUES ('p', 'g', 'u', 'ug')")
+
+        result = pg_db.retr_query("SELECT count(*) FROM results_user_groups_temp")
+        self.assertEqual(result[0][0], 1)
+        result = pg_db.retr_query(
+            "SELECT count(*) FROM public.results_user_groups_temp"
+        )
+        self.assertEqual(result[0][0], 0)
+        pg_db.query(
+            """
+            DROP TABLE pg_temp.results_temp;
+            DROP TABLE pg_temp.results_geometry_temp;
+            DROP TABLE pg_temp.results_user_groups_temp;
+            """
+        )
+
+    def test_rollback_after_failed_transfer(self):
+        """Test if a failed transfer leaves the worker connection usable."""
+        pg_db = auth.postgresDB()
+        transfer_results.create_session_temp_tables(pg_db)
+
+        def results_to_postgres(results, project_id, p_con=None):
+            p_con.query("SELECT 1/0")
+
+        project = Mock()
+        project.results_to_postgres.side_effect = results_to_postgres
+        fb_db = auth.firebaseDB()
+        ref = fb_db.reference(f"v2/results/{self.project_id}")
+        transfer_results.transfer_results_for_project(
+            self.project_id, ref.get(), project, p_con=pg_db
+        )
+
+        self.assertEqual(pg_db.retr_query("SELECT 1"), [(1,)])
+        self.assertIsNotNone(ref.get(shallow=True))
+
+    def test_transfer_results_parallel(self):
+        """Test if results are transferred using parallel workers."""
+        transfer_results.transfer_results(
+            project_id_list=[self.project_id], max_workers=2
+        )
+
+        fb_db = auth.firebaseDB()
+        ref = fb_db.reference(f"v2/results/{self.project_id}")
+        self.assertIsNone(ref.get())
+
+        pg_db = auth.postgresDB()
+        sql_query = (
+            f"SELECT items_count "
+            f"FROM mapping_sessions "
+            f"WHERE project_id = '{self.project_id}' "
+            f"AND user_id = '{self.project_id}'"
+        )
+        result = pg_db.retr_query(sql_query)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0][0], 252)
+
+
+if __name__ == "__main__":
+    unittest.main()
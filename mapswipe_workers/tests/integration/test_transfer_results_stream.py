@@ -0,0 +1,61 @@
+import unittest
+
+from mapswipe_workers import auth
+from mapswipe_workers.firebase_to_postgres import transfer_results
+from tests.integration import base, set_up, tear_down
+
+
+class TestTransferResultsStream(base.BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        project_type = "tile_map_service_grid"
+        fixture_name = "build_area_heidelberg"
+        self.project_id = set_up.create_test_project(
+            project_type, fixture_name, results=False
+        )
+        # add some results in firebase
+        set_up.set_firebase_test_data(project_type, "users", "user", self.project_id)
+        set_up.set_firebase_test_data(project_type, "user_groups", "user_group", "")
+        set_up.set_firebase_test_data(
+            project_type, "results", fixture_name, self.project_id
+        )
+
+    def tearDown(self):
+        tear_down.delete_test_data(self.project_id)
+
+    def verify_mapping_results_in_postgres(self):
+        pg_db = auth.postgresDB()
+        sql_query = (
+            f"SELECT count(*), sum(items_count) "
+            f"FROM mapping_sessions "
+            f"WHERE project_id = '{self.project_id}' "
+            f"AND user_id = '{self.project_id}'"
+        )
+        result = pg_db.retr_query(sql_query)
+        # we expect 21 groups
+        self.assertEqual(result[0][0], 21)
+        self.assertEqual(result[0][1], 4938)
+
+    def test_get_results_pages(self):
+        """Test if all groups are returned in pages of the given size."""
+        pages = list(transfer_results.get_results_pages(self.project_id, 5))
+        self.assertEqual([len(page) for page in pages], [5, 5, 5, 5, 1])
+
+        group_ids = [group_id for page in pages for group_id in page.keys()]
+        self.assertEqual(len(set(group_ids)), 21)
+
+    def test_transfer_results_stream(self):
+        """Test if results are transferred and deleted page by page."""
+        transfer_results.transfer_results(
+            project_id_list=[self.project_id], stream=True, page_size=5
+        )
+
+        fb_db = auth.firebaseDB()
+        ref = fb_db.reference(f"v2/results/{self.project_id}")
+        self.assertIsNone(ref.get())
+
+        self.verify_mapping_results_in_postgres()
+
+
+if __name__ == "__main__":
+    unittest.main()
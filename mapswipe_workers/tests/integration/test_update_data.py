@@ -2,9 +2,12 @@ import os
 import tempfile
 import unittest
 
+from mapswipe_workers import auth
 from mapswipe_workers.firebase_to_postgres.update_data import (
     get_contributor_count_from_postgres,
+    get_progress_and_contributor_count,
     get_project_progress,
+    update_progress_in_firebase,
 )
 from tests.integration import base, set_up, tear_down
 
@@ -32,6 +35,52 @@ class TestUpdateData(base.BaseTestCase):
         progress = get_project_progress(self.project_id)
         self.assertEqual(progress, round(100 / 60))
 
+    def test_group_progress_after_deleting_sessions(self):
+        """Test that the group_progress table follows mapping_sessions."""
+        pg_db = auth.postgresDB()
+        pg_db.query(
+            """
+            DELETE FROM mapping_sessions_results msr
+            USING mapping_sessions ms
+            WHERE ms.mapping_session_id = msr.mapping_session_id
+                AND ms.project_id = %(project_id)s;
+            DELETE FROM mapping_sessions WHERE project_id = %(project_id)s;
+            """,
+            {"project_id": self.project_id},
+        )
+        self.assertEqual(get_project_progress(self.project_id), 0)
+        self.assertEqual(get_contributor_count_from_postgres(self.project_id), 0)
+        for table in ["group_progress", "project_contributors"]:
+            result = pg_db.retr_query(
+                f"SELECT * FROM {table} WHERE project_id = %s", [self.project_id]
+            )
+            self.assertEqual(result, [])
+
+    def test_get_progress_and_contributor_count(self):
+        project_stats = get_progress_and_contributor_count(
+            [self.project_id, "not-existing"]
+        )
+        self.assertEqual(
+            project_stats,
+            {
+                self.project_id: (
+                    get_project_progress(self.project_id),
+                    get_contributor_count_from_postgres(self.project_id),
+                )
+            },
+        )
+
+    def test_get_project_progress_without_groups(self):
+        self.assertEqual(get_project_progress("not-existing"), 0)
+
+    def test_update_progress_in_firebase(self):
+        update_progress_in_firebase([self.project_id])
+        fb_db = auth.firebaseDB()
+        project = fb_db.reference(f"v2/projects/{self.project_id}").get()
+        self.assertEqual(project["progress"], round(100 / 60))
+        self.assertEqual(project["contributorCount"], 1)
+        self.assertNotIn("notification_90_sent", project)
+
 
 if __name__ == "__main__":
     unittest.main()
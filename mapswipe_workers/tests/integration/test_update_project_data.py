@@ -1,6 +1,8 @@
 import unittest
 
+from mapswipe_workers import auth
 from mapswipe_workers.firebase_to_postgres import update_data
+from tests.integration import set_up, tear_down
 
 
 class TestUpdateProjectData(unittest.TestCase):
@@ -22,5 +24,36 @@ class TestUpdateProjectData(unittest.TestCase):
         # self.assertIsNotNone(result)
 
 
+class TestUpdateProjectStatus(unittest.TestCase):
+    def setUp(self):
+        self.project_id = set_up.create_test_project(
+            "tile_map_service_grid", "build_area"
+        )
+
+    def tearDown(self):
+        tear_down.delete_test_data(self.project_id)
+
+    def get_postgres_status(self):
+        pg_db = auth.postgresDB()
+        query = "SELECT status FROM projects WHERE project_id = %s"
+        return pg_db.retr_query(query, [self.project_id])[0][0]
+
+    def set_firebase_status(self, status):
+        fb_db = auth.firebaseDB()
+        fb_db.reference(f"v2/projects/{self.project_id}/status").set(status)
+
+    def test_changed_status(self):
+        """Test that changed status of not-archived projects is updated."""
+        for status in ["finished", "active", "archived"]:
+            self.set_firebase_status(status)
+            update_data.update_project_data()
+            self.assertEqual(self.get_postgres_status(), status)
+
+    def test_changed_status_with_project_ids(self):
+        self.set_firebase_status("inactive")
+        update_data.update_project_data([self.project_id])
+        self.assertEqual(self.get_postgres_status(), "inactive")
+
+
 if __name__ == "__main__":
     unittest.main()
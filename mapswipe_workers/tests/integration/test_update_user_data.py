@@ -52,6 +52,26 @@ class TestUpdateUserData(unittest.TestCase):
         result = pg_db.retr_query(sql_query, {"user_ids": self.user_ids})
         self.assertEqual(len(result), self.num_users)
 
+    def test_get_new_ids(self):
+        """Test that only ids which are not in postgres are returned."""
+        update_data.update_user_data(self.user_ids[:5])
+        pg_db = auth.postgresDB()
+        new_user_ids = update_data.get_new_ids(
+            pg_db, self.user_ids + self.user_ids[:1], "users", "user_id"
+        )
+        self.assertEqual(sorted(new_user_ids), sorted(self.user_ids[5:]))
+        self.assertEqual(update_data.get_new_ids(pg_db, [], "users", "user_id"), [])
+
+    def test_session_temp_table(self):
+        """Test that users are not staged in the shared users_temp table."""
+        pg_db = auth.postgresDB()
+        pg_db.query("INSERT INTO users_temp (user_id) VALUES ('other_worker')")
+        update_data.update_user_data(self.user_ids)
+
+        result = pg_db.retr_query("SELECT user_id FROM public.users_temp")
+        self.assertEqual(result, [("other_worker",)])
+        pg_db.query("TRUNCATE users_temp")
+
 
 if __name__ == "__main__":
     unittest.main()
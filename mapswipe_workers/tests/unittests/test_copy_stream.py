@@ -0,0 +1,35 @@
+import json
+import unittest
+
+from mapswipe_workers.utils.copy_stream import StringIteratorIO, copy_row
+
+
+class TestCopyStream(unittest.TestCase):
+    def test_copy_row(self):
+        row = copy_row(["project", 1, None, json.dumps({"name": "a\tb\\c\nd"})])
+        self.assertEqual(row, 'project\t1\t\\N\t{"name": "a\\\\tb\\\\\\\\c\\\\nd"}\n')
+
+    def test_copy_row_escapes_control_characters(self):
+        row = copy_row(["a\tb", "c\nd", "e\\f", "g\rh"])
+        self.assertEqual(row, "a\\tb\tc\\nd\te\\\\f\tg\\rh\n")
+
+    def test_read_in_chunks(self):
+        rows = [copy_row([f"g{i}", i, "x" * i]) for i in range(100)]
+        f = StringIteratorIO(iter(rows))
+        chunks = []
+        while True:
+            chunk = f.read(64)
+            if not chunk:
+                break
+            self.assertLessEqual(len(chunk), 64)
+            chunks.append(chunk)
+        self.assertEqual("".join(chunks), "".join(rows))
+
+    def test_read_all(self):
+        rows = [copy_row([f"g{i}"]) for i in range(10)]
+        self.assertEqual(StringIteratorIO(iter(rows)).read(), "".join(rows))
+        self.assertEqual(StringIteratorIO(iter([])).read(8192), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from mapswipe_workers import mapswipe_workers
+
+
+@patch("mapswipe_workers.mapswipe_workers.send_slack_message")
+@patch("mapswipe_workers.mapswipe_workers._fail_project_draft")
+@patch("mapswipe_workers.mapswipe_workers.ProjectType")
+class TestCreateProject(unittest.TestCase):
+    def setUp(self):
+        self.project_draft = {"projectType": 1, "name": "test"}
+        self.project = MagicMock(projectId="project")
+
+    def test_create_project(self, project_type, fail_project_draft, _):
+        project_type.return_value.constructor.return_value = self.project
+        mapswipe_workers._create_project("draft", self.project_draft, timeout=60)
+
+        self.project.save_project.assert_called_once()
+        fail_project_draft.assert_not_called()
+
+    @patch("mapswipe_workers.mapswipe_workers.time.monotonic")
+    def test_create_project_timeout(
+        self, monotonic, project_type, fail_project_draft, _
+    ):
+        """Test that a project is not saved after the deadline has passed."""
+        project_type.return_value.constructor.return_value = self.project
+        # Start, after validating geometries and after creating groups.
+        monotonic.side_effect = [0, 30, 90]
+        mapswipe_workers._create_project("draft", self.project_draft, timeout=60)
+
+        self.project.create_groups.assert_called_once()
+        self.project.create_tasks.assert_not_called()
+        self.project.save_project.assert_not_called()
+        fail_project_draft.assert_called_once_with(
+            "draft",
+            "test",
+            "project",
+            "Project creation did not finish within 60 seconds.",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from firebase_admin import exceptions
+
+from mapswipe_workers.firebase import delete
+
+
+class TestFirebaseDelete(unittest.TestCase):
+    def setUp(self):
+        self.keys = [f"g{i}/user_{i}" for i in range(10)]
+
+    def test_split_keys_by_count(self):
+        chunks = list(delete.split_keys(self.keys, max_chunk_keys=4))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+        self.assertEqual(sum(chunks, []), self.keys)
+
+    def test_split_keys_by_size(self):
+        key_bytes = delete.estimate_payload_size(self.keys[0])
+        chunks = list(delete.split_keys(self.keys, max_chunk_bytes=3 * key_bytes))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 3, 1])
+
+    def test_delete_keys(self):
+        ref = MagicMock()
+        delete.delete_keys(ref, self.keys, max_chunk_keys=3)
+        deleted = [
+            key for call in ref.update.call_args_list for key in call.args[0].keys()
+        ]
+        self.assertEqual(sorted(deleted), sorted(self.keys))
+        for call in ref.update.call_args_list:
+            self.assertTrue(all(value is None for value in call.args[0].values()))
+
+    def test_split_chunk_which_is_too_large(self):
+        ref = MagicMock()
+
+        def update(data):
+            if len(data) > 2:
+                raise exceptions.InvalidArgumentError("too large")
+
+        ref.update.side_effect = update
+        delete.delete_keys(ref, self.keys)
+        deleted = [
+            key
+            for call in ref.update.call_args_list
+            if len(call.args[0]) <= 2
+            for key in call.args[0].keys()
+        ]
+        self.assertEqual(sorted(deleted), sorted(self.keys))
+
+    @patch("mapswipe_workers.firebase.delete.time.sleep")
+    def test_retry_transient_errors(self, sleep):
+        ref = MagicMock()
+        ref.update.side_effect = [exceptions.UnavailableError("unavailable"), None]
+        delete.delete_keys(ref, self.keys)
+        self.assertEqual(ref.update.call_count, 2)
+        sleep.assert_called_once()
+
+    @patch("mapswipe_workers.firebase.delete.time.sleep")
+    def test_raise_after_retries(self, sleep):
+        ref = MagicMock()
+        ref.update.side_effect = exceptions.UnavailableError("unavailable")
+        with self.assertRaises(exceptions.UnavailableError):
+            delete.delete_keys(ref, self.keys)
+        self.assertEqual(ref.update.call_count, delete.MAX_RETRIES + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from aiohttp import ClientResponseError, web
+from aiohttp.test_utils import TestServer
+from firebase_admin import db
+
+from mapswipe_workers.firebase import fetch
+
+
+class TestFirebaseFetch(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            "user_1": {"username": "one", "created": "2023-01-01T00:00:00.000Z"},
+            "user/2": {"username": "two"},
+        }
+        self.requests = []
+        self.failures = 0
+
+    async def handle(self, request):
+        self.requests.append(request)
+        if self.failures:
+            self.failures -= 1
+            return web.Response(status=503)
+        key = request.match_info["key"]
+        return web.json_response(self.data.get(key))
+
+    def fetch_children(self, keys, **kwargs):
+        async def run():
+            app = web.Application()
+            app.router.add_get("/v2/users/{key}.json", self.handle)
+            async with TestServer(app) as server:
+                client = fetch.RestClient(
+                    base_url=str(server.make_url("")).rstrip("/"),
+                    params={"ns": "test"},
+                    credential=MagicMock(),
+                )
+                return await fetch.fetch_children(client, "/v2/users", keys, **kwargs)
+
+        return asyncio.run(run())
+
+    def test_fetch_children(self):
+        children = self.fetch_children(["user_1", "user/2", "user_3"])
+        self.assertEqual(
+            children,
+            {
+                "user_1": self.data["user_1"],
+                "user/2": self.data["user/2"],
+                "user_3": None,
+            },
+        )
+        self.assertEqual(len(self.requests), 3)
+        for request in self.requests:
+            self.assertEqual(request.query["ns"], "test")
+
+    def test_retry_transient_errors(self):
+        self.failures = 1
+        children = self.fetch_children(["user_1"], retry_delay=0)
+        self.assertEqual(children, {"user_1": self.data["user_1"]})
+        self.assertEqual(len(self.requests), 2)
+
+    def test_raise_after_retries(self):
+        self.failures = 3
+        with self.assertRaises(ClientResponseError):
+            self.fetch_children(["user_1"], max_retries=2, retry_delay=0)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_get_rest_client(self):
+        # Checks the private attributes of the installed firebase_admin.
+        credential = MagicMock()
+        client = db._Client(credential, "https://test.firebaseio.com", 60, {"ns": "t"})
+        ref = db.Reference(client=client, path="/v2/users")
+        self.assertEqual(
+            fetch.get_rest_client(ref),
+            fetch.RestClient("https://test.firebaseio.com", {"ns": "t"}, credential),
+        )
+
+    def test_get_rest_client_of_unknown_version(self):
+        with self.assertRaises(RuntimeError):
+            fetch.get_rest_client(SimpleNamespace(path="/v2/users"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from firebase_admin import exceptions
+
+from mapswipe_workers.firebase import upload
+from mapswipe_workers.firebase.firebase import Firebase
+
+
+class TestFirebaseUpload(unittest.TestCase):
+    def setUp(self):
+        self.updates = {
+            f"v2/tasks/project/g{i}": [{"taskId": f"18-{i}-{j}"} for j in range(3)]
+            for i in range(10)
+        }
+
+    def uploaded(self, ref):
+        return {
+            key: value
+            for call in ref.update.call_args_list
+            for key, value in call.args[0].items()
+        }
+
+    def test_split_updates_by_count(self):
+        batches = list(upload.split_updates(self.updates, max_batch_keys=4))
+        self.assertEqual([len(batch) for batch in batches], [4, 4, 2])
+
+    def test_split_updates_by_size(self):
+        key, value = next(iter(self.updates.items()))
+        value_bytes = upload.estimate_payload_size(key, value)
+        batches = list(
+            upload.split_updates(self.updates, max_batch_bytes=3 * value_bytes)
+        )
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 3, 1])
+
+    def test_large_value_in_own_batch(self):
+        self.updates["v2/tasks/project/g5"] = "x" * 1000
+        batches = list(upload.split_updates(self.updates, max_batch_bytes=500))
+        self.assertIn({"v2/tasks/project/g5": "x" * 1000}, batches)
+
+    def test_upload_children(self):
+        ref = MagicMock()
+        upload.upload_children(ref, self.updates, max_batch_keys=3)
+        self.assertEqual(ref.update.call_count, 4)
+        self.assertEqual(self.uploaded(ref), self.updates)
+
+    def test_split_batch_which_is_too_large(self):
+        ref = MagicMock()
+
+        def update(data):
+            if len(data) > 2:
+                raise exceptions.InvalidArgumentError("too large")
+
+        ref.update.side_effect = update
+        upload.upload_children(ref, self.updates)
+        uploaded = {
+            key: value
+            for call in ref.update.call_args_list
+            if len(call.args[0]) <= 2
+            for key, value in call.args[0].items()
+        }
+        self.assertEqual(uploaded, self.updates)
+
+    @patch("mapswipe_workers.firebase.upload.time.sleep")
+    def test_retry_failed_batch(self, sleep):
+        ref = MagicMock()
+        calls = []
+
+        def update(data):
+            calls.append(data)
+            if "v2/tasks/project/g0" in data and len(calls) == 1:
+                raise exceptions.UnavailableError("unavailable")
+
+        ref.update.side_effect = update
+        upload.upload_children(ref, self.updates, max_workers=1, max_batch_keys=5)
+        # only the failed batch is sent again
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(calls[0], calls[1])
+        sleep.assert_called_once()
+
+    @patch("mapswipe_workers.firebase.upload.time.sleep")
+    def test_raise_after_retries(self, sleep):
+        ref = MagicMock()
+        ref.update.side_effect = exceptions.UnavailableError("unavailable")
+        with self.assertRaises(exceptions.UnavailableError):
+            upload.upload_children(ref, self.updates)
+        self.assertEqual(ref.update.call_count, upload.MAX_RETRIES + 1)
+
+    @patch("mapswipe_workers.firebase.firebase.auth.firebaseDB")
+    def test_save_groups_removes_stale_groups(self, firebase_db):
+        """Test that groups of an earlier run are not kept."""
+        data = {"v2": {"groups": {"project": {"g0": {"groupId": "g0"}}}}}
+
+        def update(updates):
+            for path, value in updates.items():
+                *parents, key = path.split("/")
+                node = data
+                for parent in parents:
+                    node = node.setdefault(parent, {})
+                if value:
+                    node[key] = value
+                else:
+                    node.pop(key, None)
+
+        firebase_db.return_value.reference.return_value.update.side_effect = update
+        groups = {f"g{i}": {"groupId": f"g{i}"} for i in range(1, 4)}
+        Firebase().save_groups_to_firebase("project", groups)
+        self.assertEqual(data["v2"]["groups"]["project"], groups)
+
+
+if __name__ == "__main__":
+    unittest.main()
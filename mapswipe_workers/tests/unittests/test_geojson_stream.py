@@ -0,0 +1,72 @@
+import io
+import json
+import os
+import unittest
+
+from mapswipe_workers.utils.geojson_stream import iter_features, write_features
+
+
+class TestGeojsonStream(unittest.TestCase):
+    def setUp(self):
+        test_dir = os.path.dirname(os.path.abspath(__file__))
+        with open(
+            os.path.join(test_dir, "..", "fixtures", "feature_collection.json")
+        ) as f:
+            self.feature_collection_string = f.read()
+        self.feature_collection = json.loads(self.feature_collection_string)
+        self.features = [
+            {
+                "type": "Feature",
+                "properties": {"id": i, "name": f"building ä {i}", "height": 1.5},
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [
+                        [[8.1 + i, 49.2], [8.2 + i, 49.2], [8.1 + i, 49.3123456789]]
+                    ],
+                },
+            }
+            for i in range(50)
+        ]
+
+    def test_iter_features(self):
+        features = list(iter_features(io.StringIO(self.feature_collection_string)))
+        self.assertEqual(features, self.feature_collection["features"])
+
+    def test_iter_features_in_small_chunks(self):
+        string = json.dumps(
+            {"type": "FeatureCollection", "features": self.features, "bbox": [1, 2]},
+            indent=2,
+        )
+        for chunk_size in (1, 7, 64, 100000):
+            features = list(iter_features(io.StringIO(string), chunk_size=chunk_size))
+            self.assertEqual(features, self.features)
+
+    def test_iter_features_without_features(self):
+        for string in ("{}", '{"type": "FeatureCollection"}'):
+            with self.assertRaises(ValueError):
+                list(iter_features(io.StringIO(string)))
+        features = iter_features(io.StringIO('{"features": []}'))
+        self.assertEqual(list(features), [])
+
+    def test_iter_features_broken_json(self):
+        string = json.dumps({"type": "FeatureCollection", "features": self.features})
+        for broken_string in (string[:-10], string + "}", string.replace(",", ";")):
+            with self.assertRaises(ValueError):
+                list(iter_features(io.StringIO(broken_string), chunk_size=64))
+
+    def test_write_features(self):
+        f = io.StringIO()
+        features = list(write_features(iter(self.features), f))
+        self.assertEqual(features, self.features)
+        feature_collection = json.loads(f.getvalue())
+        self.assertEqual(feature_collection["type"], "FeatureCollection")
+        self.assertEqual(feature_collection["features"], self.features)
+
+    def test_write_no_features(self):
+        f = io.StringIO()
+        self.assertEqual(list(write_features(iter([]), f)), [])
+        self.assertEqual(json.loads(f.getvalue())["features"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
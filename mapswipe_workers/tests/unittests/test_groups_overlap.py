@@ -17,6 +17,26 @@ class TestGroupsOverlap(unittest.TestCase):
         groups_with_overlaps = t.extent_to_groups(project_extent_file, zoom, 100)
         self.assertEqual(len(groups_with_overlaps), 92)
 
+    def test_adjust_overlapping_groups(self):
+        def group(x_min, x_max, row):
+            return {"xMin": x_min, "xMax": x_max, "yMin": row * 3, "yMax": row * 3 + 2}
+
+        groups = {
+            "g101": group(10, 50, 0),
+            "g102": group(0, 39, 0),
+            # overlaps only after g101 and g102 have been merged
+            # and extended to an even width
+            "g103": group(51, 90, 0),
+            "g104": group(92, 131, 0),
+            "g105": group(20, 59, 1),
+        }
+        groups_without_overlap, overlaps_total = t.adjust_overlapping_groups(groups, 18)
+        self.assertEqual(overlaps_total, 2)
+        self.assertEqual(list(groups_without_overlap.keys()), ["g101", "g104", "g105"])
+        self.assertEqual(groups_without_overlap["g101"]["xMin"], 0)
+        self.assertEqual(groups_without_overlap["g101"]["xMax"], 91)
+        self.assertEqual(groups_without_overlap["g104"]["xMin"], 92)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,56 @@
+import base64
+import json
+import unittest
+
+from mapswipe_workers.utils import gzip_str
+
+
+def decompress_tasks(encoded_tasks: str) -> str:
+    return gzip_str.gunzip_bytes_obj(base64.b64decode(encoded_tasks))
+
+
+class TestGzipStr(unittest.TestCase):
+    def setUp(self):
+        self.groups_of_tasks = {
+            f"g{i}": [
+                {
+                    "taskId": f"{i}{j}",
+                    "geojson": {
+                        "type": "Polygon",
+                        "coordinates": [[[8.1, 49.2], [8.2, 49.2], [8.1, 49.3]]],
+                    },
+                }
+                for j in range(10)
+            ]
+            for i in range(60)
+        }
+
+    def test_compress_tasks(self):
+        tasks = self.groups_of_tasks["g0"]
+        json_string = decompress_tasks(gzip_str.compress_tasks(tasks))
+        # same JSON as created before by removing whitespace
+        self.assertEqual(
+            json_string, json.dumps(tasks).replace(" ", "").replace("\n", "")
+        )
+        self.assertEqual(json.loads(json_string), tasks)
+
+    def test_compress_level(self):
+        tasks = self.groups_of_tasks["g0"]
+        encoded_tasks = gzip_str.compress_tasks(tasks, compresslevel=1)
+        self.assertEqual(json.loads(decompress_tasks(encoded_tasks)), tasks)
+
+    def test_compress_tasks_of_groups(self):
+        for max_workers in (1, 2):
+            compressed = gzip_str.compress_tasks_of_groups(
+                self.groups_of_tasks, max_workers=max_workers
+            )
+            self.assertEqual(list(compressed.keys()), list(self.groups_of_tasks))
+            for group_id, encoded_tasks in compressed.items():
+                self.assertEqual(
+                    json.loads(decompress_tasks(encoded_tasks)),
+                    self.groups_of_tasks[group_id],
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from mapswipe_workers.firebase_to_postgres import ingest_results
+
+
+def create_event(event_type, path, data):
+    event = MagicMock()
+    event.event_type = event_type
+    event.path = path
+    event.data = data
+    return event
+
+
+class TestIngestResults(unittest.TestCase):
+    def setUp(self):
+        self.result_data = {
+            "startTime": "2021-03-04T05:06:07.089Z",
+            "endTime": "2021-03-04T05:07:07.089Z",
+            "results": {"t1": 1, "t2": 0},
+        }
+        self.ingestor = ingest_results.ResultsIngestor(max_rows=3, max_age=60)
+
+    def test_initial_put_event_is_skipped(self):
+        self.ingestor.on_event(
+            "p1",
+            create_event(
+                "put",
+                "/",
+                {"g1": {"u1": self.result_data, "u2": self.result_data}},
+            ),
+        )
+        results, row_count = self.ingestor.buffer.take()
+        self.assertEqual(results, {})
+        self.assertEqual(row_count, 0)
+
+    def test_put_event_of_group(self):
+        self.ingestor.on_event(
+            "p1",
+            create_event(
+                "put", "/g1", {"u1": self.result_data, "u2": self.result_data}
+            ),
+        )
+        results, row_count = self.ingestor.buffer.take()
+        self.assertEqual(
+            results, {"p1": {"g1": {"u1": self.result_data, "u2": self.result_data}}}
+        )
+        self.assertEqual(row_count, 4)
+
+    def test_all_results_deleted(self):
+        self.ingestor.on_event("p1", create_event("put", "/g1/u1", self.result_data))
+        self.ingestor.on_event("p2", create_event("put", "/g1/u1", self.result_data))
+        self.ingestor.on_event("p1", create_event("put", "/", None))
+        results, row_count = self.ingestor.buffer.take()
+        self.assertEqual(results, {"p2": {"g1": {"u1": self.result_data}}})
+        self.assertEqual(row_count, 2)
+
+    def test_put_and_patch_events(self):
+        self.ingestor.on_event("p1", create_event("put", "/g1/u1", self.result_data))
+        self.assertFalse(self.ingestor.buffer.is_due(max_rows=3, max_age=60))
+        self.ingestor.on_event(
+            "p1", create_event("patch", "/", {"g2/u1": self.result_data})
+        )
+        self.assertTrue(self.ingestor.buffer.is_due(max_rows=3, max_age=60))
+        results, row_count = self.ingestor.buffer.take()
+        self.assertEqual(
+            results,
+            {"p1": {"g1": {"u1": self.result_data}, "g2": {"u1": self.result_data}}},
+        )
+        self.assertEqual(row_count, 4)
+        self.assertFalse(self.ingestor.buffer.is_due(max_rows=3, max_age=60))
+
+    def test_deleted_results_are_removed(self):
+        self.ingestor.on_event("p1", create_event("put", "/g1/u1", self.result_data))
+        self.ingestor.on_event("p1", create_event("put", "/g2/u1", self.result_data))
+        self.ingestor.on_event("p1", create_event("patch", "/", {"g1/u1": None}))
+        results, row_count = self.ingestor.buffer.take()
+        self.assertEqual(results, {"p1": {"g2": {"u1": self.result_data}}})
+        self.assertEqual(row_count, 2)
+
+    def test_partial_writes_are_ignored(self):
+        self.ingestor.on_event("p1", create_event("put", "/g1/u1/endTime", "2021"))
+        self.ingestor.on_event("p1", create_event("keep-alive", None, None))
+        results, row_count = self.ingestor.buffer.take()
+        self.assertEqual(results, {})
+        self.assertEqual(row_count, 0)
+
+    def test_buffer_is_due_by_age(self):
+        self.ingestor.on_event("p1", create_event("put", "/g1/u1", self.result_data))
+        self.assertFalse(self.ingestor.buffer.is_due(max_rows=3, max_age=60))
+        self.assertTrue(self.ingestor.buffer.is_due(max_rows=3, max_age=0))
+
+    @patch("mapswipe_workers.firebase_to_postgres.ingest_results.auth")
+    @patch(
+        "mapswipe_workers.firebase_to_postgres.ingest_results.get_active_project_ids"
+    )
+    def test_sync_listeners(self, get_active_project_ids, auth):
+        reference = auth.firebaseDB.return_value.reference
+        get_active_project_ids.return_value = ["p1", "p2"]
+        self.ingestor.start()
+        self.assertEqual(
+            [c.args for c in reference.call_args_list],
+            [("v2/results/p1",), ("v2/results/p2",)],
+        )
+        self.assertEqual(set(self.ingestor.registrations.keys()), {"p1", "p2"})
+
+        # events are passed on with the project id of the listener
+        on_event = reference.return_value.listen.call_args.args[0]
+        on_event(create_event("put", "/g1/u1", self.result_data))
+        self.assertEqual(list(self.ingestor.buffer.take()[0].keys()), ["p2"])
+
+        registration_p1 = self.ingestor.registrations["p1"]
+        get_active_project_ids.return_value = ["p2", "p3"]
+        reference.reset_mock()
+        self.ingestor.sync_listeners()
+        reference.assert_called_once_with("v2/results/p3")
+        registration_p1.close.assert_called_once()
+        self.assertEqual(set(self.ingestor.registrations.keys()), {"p2", "p3"})
+
+        self.ingestor.stop()
+        self.assertEqual(self.ingestor.registrations, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
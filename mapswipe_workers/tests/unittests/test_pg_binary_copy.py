@@ -0,0 +1,47 @@
+import datetime as dt
+import io
+import struct
+import unittest
+
+from mapswipe_workers.utils import pg_binary_copy
+
+
+class TestPgBinaryCopy(unittest.TestCase):
+    def test_encode_timestamp(self):
+        value = dt.datetime(2000, 1, 1, 0, 0, 1, 500, tzinfo=dt.timezone.utc)
+        self.assertEqual(
+            pg_binary_copy.encode_timestamp(value), struct.pack("!iq", 8, 1000500)
+        )
+        value = dt.datetime(1999, 12, 31, 23, 59, 59)
+        self.assertEqual(
+            pg_binary_copy.encode_timestamp(value), struct.pack("!iq", 8, -1000000)
+        )
+
+    def test_encode_int4(self):
+        self.assertEqual(pg_binary_copy.encode_int4(2), struct.pack("!ii", 4, 2))
+        self.assertEqual(pg_binary_copy.encode_int4("-3"), struct.pack("!ii", 4, -3))
+        for value in (1.7, 1.0, "1.7", True, None, [1]):
+            with self.assertRaises(ValueError):
+                pg_binary_copy.encode_int4(value)
+
+    def test_writer(self):
+        file = io.BytesIO()
+        w = pg_binary_copy.BinaryCopyWriter(file, ["text", "int4", "text"])
+        w.writerow(["g1", 2, None])
+        w.close()
+
+        expected = (
+            b"PGCOPY\n\xff\r\n\x00"
+            + struct.pack("!ii", 0, 0)
+            + struct.pack("!h", 3)
+            + struct.pack("!i", 2)
+            + b"g1"
+            + struct.pack("!ii", 4, 2)
+            + struct.pack("!i", -1)
+            + struct.pack("!h", -1)
+        )
+        self.assertEqual(file.getvalue(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import json
 import os
 import unittest
+from dataclasses import asdict
 from unittest.mock import patch
 
 from mapswipe_workers.project_types import FootprintProject
@@ -65,6 +66,36 @@ class TestCreateFootprintProject(unittest.TestCase):
         self.assertEqual(len(self.project.tasks["g100"]), 1)
         self.assertTrue("POLYGON" in self.project.tasks["g100"][0].geometry)
 
+    def test_iter_tasks_rows_keeps_quotes(self):
+        with patch(
+            "mapswipe_workers.project_types.arbitrary_geometry.footprint.project.ohsome"
+        ) as mock_get:
+            with open(
+                os.path.join(
+                    os.path.dirname(os.path.abspath(__file__)),
+                    "..",
+                    "fixtures",
+                    "feature_collection.json",
+                ),
+                "r",
+            ) as file:
+                mock_get.return_value = json.load(file)
+
+            self.project.validate_geometries()
+        self.project.create_groups()
+        self.project.create_tasks()
+
+        task = self.project.tasks["g100"][0]
+        task.properties = {"name": "Saint Mary's", "note": 'a "b"\\c'}
+        tasks = {"g100": [asdict(task)]}
+        rows = list(self.project.iter_tasks_rows(tasks))
+
+        self.assertEqual(len(rows), 1)
+        columns = rows[0].rstrip("\n").split("\t")
+        # COPY text format escapes backslashes, quotes are passed on unchanged
+        project_type_specifics = json.loads(columns[4].replace("\\\\", "\\"))
+        self.assertEqual(project_type_specifics["properties"], task.properties)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import call, patch
+
+from mapswipe_workers.definitions import MessageType
+from mapswipe_workers.utils.slack_helper import (
+    get_progress_notifications,
+    send_progress_notification,
+)
+
+
+class TestGetProgressNotifications(unittest.TestCase):
+    def setUp(self):
+        self.project = {"name": "test project"}
+
+    def test_below_90(self):
+        notifications = get_progress_notifications("project", self.project, 89)
+        self.assertEqual(notifications, {})
+
+    def test_90(self):
+        notifications = get_progress_notifications("project", self.project, 95)
+        self.assertEqual(
+            notifications, {"notification_90_sent": MessageType.NOTIFICATION_90}
+        )
+
+    def test_100(self):
+        self.project["notification_90_sent"] = True
+        notifications = get_progress_notifications("project", self.project, 100)
+        self.assertEqual(
+            notifications, {"notification_100_sent": MessageType.NOTIFICATION_100}
+        )
+
+    def test_already_sent(self):
+        self.project["notification_90_sent"] = True
+        self.project["notification_100_sent"] = True
+        notifications = get_progress_notifications("project", self.project, 100)
+        self.assertEqual(notifications, {})
+
+
+@patch("mapswipe_workers.utils.slack_helper.send_slack_message")
+class TestSendProgressNotification(unittest.TestCase):
+    def test_send(self, send_slack_message):
+        send_progress_notification(
+            "project",
+            {"name": "test project"},
+            [MessageType.NOTIFICATION_90, MessageType.NOTIFICATION_100],
+        )
+        send_slack_message.assert_has_calls(
+            [
+                call(MessageType.NOTIFICATION_90, "test project", "project"),
+                call(MessageType.NOTIFICATION_100, "test project", "project"),
+            ]
+        )
+
+    def test_nothing_to_send(self, send_slack_message):
+        send_progress_notification("project", {"name": "test project"}, [])
+        send_slack_message.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
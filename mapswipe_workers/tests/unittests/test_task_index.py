@@ -0,0 +1,161 @@
+import unittest
+from unittest.mock import patch
+
+from mapswipe_workers.firebase_to_postgres import task_index
+
+
+class TestTaskIndex(unittest.TestCase):
+    def setUp(self):
+        self.task_index = {
+            "g1": frozenset(["t1", "t2"]),
+            "g2": frozenset(["0", "1"]),
+        }
+        self.results = {
+            "g1": {
+                "user_a": {
+                    "startTime": "2021-03-04T05:06:07.089Z",
+                    "endTime": "2021-03-04T05:07:07.089Z",
+                    "results": {"t1": 1, "t2": 0, "t3": 1},
+                },
+            },
+            "g2": {
+                "user_a": {
+                    "startTime": "2021-03-04T05:06:07.089Z",
+                    "endTime": "2021-03-04T05:07:07.089Z",
+                    "results": [None, 1, 2],
+                },
+            },
+            "g3": {
+                "user_a": {
+                    "startTime": "2021-03-04T05:06:07.089Z",
+                    "endTime": "2021-03-04T05:07:07.089Z",
+                    "results": {"t1": 1},
+                },
+            },
+        }
+
+    def test_filter_invalid_results(self):
+        valid_results, invalid_count = task_index.filter_invalid_results(
+            "project", self.results, self.task_index
+        )
+        self.assertEqual(invalid_count, 3)
+        self.assertEqual(list(valid_results.keys()), ["g1", "g2"])
+        self.assertEqual(valid_results["g1"]["user_a"]["results"], {"t1": 1, "t2": 0})
+        self.assertEqual(valid_results["g2"]["user_a"]["results"], [None, 1, None])
+        self.assertEqual(
+            valid_results["g1"]["user_a"]["startTime"], "2021-03-04T05:06:07.089Z"
+        )
+        # the original results are not modified
+        self.assertEqual(len(self.results["g1"]["user_a"]["results"]), 3)
+
+    def test_filter_without_groups(self):
+        """Results are removed if the project has no groups in postgres."""
+        valid_results, invalid_count = task_index.filter_invalid_results(
+            "project", self.results, {}
+        )
+        self.assertEqual(valid_results, {})
+        self.assertEqual(invalid_count, 7)
+
+    def test_filter_no_results(self):
+        for results in (None, {}):
+            valid_results, invalid_count = task_index.filter_invalid_results(
+                "project", results, {}
+            )
+            self.assertIs(valid_results, results)
+            self.assertEqual(invalid_count, 0)
+
+    def test_filter_users_and_user_groups(self):
+        self.results["g1"]["user_b"] = {
+            "startTime": "2021-03-04T05:06:07.089Z",
+            "endTime": "2021-03-04T05:07:07.089Z",
+            "results": {"t1": 1},
+            "userGroups": {"ug_a": True, "ug_b": True},
+        }
+        self.results["g1"]["user_c"] = {
+            "startTime": "2021-03-04T05:06:07.089Z",
+            "endTime": "2021-03-04T05:07:07.089Z",
+            "results": {"t1": 0, "t2": 0},
+        }
+        valid_results, invalid_count = task_index.filter_invalid_results(
+            "project",
+            self.results,
+            self.task_index,
+            user_ids={"user_a", "user_b"},
+            user_group_ids={"ug_a"},
+        )
+        self.assertEqual(list(valid_results["g1"].keys()), ["user_a", "user_b"])
+        self.assertEqual(valid_results["g1"]["user_b"]["userGroups"], {"ug_a": True})
+        self.assertEqual(valid_results["g1"]["user_b"]["results"], {"t1": 1})
+        # results of user_c, task t3, task 2 of g2 and group g3 are invalid
+        self.assertEqual(invalid_count, 5)
+        self.assertEqual(len(self.results["g1"]["user_b"]["userGroups"]), 2)
+
+    @patch(
+        "mapswipe_workers.firebase_to_postgres.task_index.get_task_index_from_postgres"
+    )
+    def test_filter_loads_groups_of_results(self, mock_get_task_index):
+        mock_get_task_index.side_effect = lambda project_id, group_ids: {
+            group_id: self.task_index[group_id]
+            for group_id in group_ids
+            if group_id in self.task_index
+        }
+        with patch.object(task_index, "task_index_cache", task_index.TaskIndexCache()):
+            valid_results, invalid_count = task_index.filter_invalid_results(
+                "project", self.results
+            )
+        mock_get_task_index.assert_called_once_with("project", ["g1", "g2", "g3"])
+        self.assertEqual(list(valid_results.keys()), ["g1", "g2"])
+        self.assertEqual(invalid_count, 3)
+
+    @patch(
+        "mapswipe_workers.firebase_to_postgres.task_index.get_task_index_from_postgres"
+    )
+    def test_cache_loads_only_missing_groups(self, mock_get_task_index):
+        mock_get_task_index.side_effect = lambda project_id, group_ids: {
+            group_id: frozenset([f"{group_id}-t1"])
+            for group_id in group_ids
+            if group_id != "missing"
+        }
+        cache = task_index.TaskIndexCache()
+        self.assertEqual(
+            cache.get("a", ["g1", "g2"]),
+            {"g1": frozenset(["g1-t1"]), "g2": frozenset(["g2-t1"])},
+        )
+        self.assertEqual(cache.get("a", ["g2"]), {"g2": frozenset(["g2-t1"])})
+        self.assertEqual(mock_get_task_index.call_count, 1)
+
+        self.assertEqual(list(cache.get("a", ["g1", "g3"]).keys()), ["g1", "g3"])
+        mock_get_task_index.assert_called_with("a", ["g3"])
+        self.assertEqual(cache.task_count, 3)
+
+        # groups which are not in postgres are not cached
+        self.assertEqual(cache.get("a", ["missing"]), {})
+        self.assertEqual(cache.get("a", ["missing"]), {})
+        self.assertEqual(mock_get_task_index.call_count, 4)
+        self.assertEqual(len(cache.indexes["a"][0]), 3)
+
+    @patch(
+        "mapswipe_workers.firebase_to_postgres.task_index.get_task_index_from_postgres"
+    )
+    def test_cache_eviction(self, mock_get_task_index):
+        mock_get_task_index.side_effect = lambda project_id, group_ids: {
+            "g1": frozenset([f"{project_id}-{i}" for i in range(3)])
+        }
+        cache = task_index.TaskIndexCache(max_tasks=6)
+        cache.get("a", ["g1"])
+        cache.get("b", ["g1"])
+        cache.get("a", ["g1"])
+        cache.get("c", ["g1"])
+        self.assertEqual(list(cache.indexes.keys()), ["a", "c"])
+        self.assertEqual(cache.task_count, 6)
+        self.assertEqual(mock_get_task_index.call_count, 3)
+
+        # an index larger than the cache is not kept
+        cache = task_index.TaskIndexCache(max_tasks=2)
+        cache.get("a", ["g1"])
+        self.assertEqual(len(cache.indexes), 0)
+        self.assertEqual(cache.task_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
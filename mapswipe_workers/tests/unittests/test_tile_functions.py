@@ -0,0 +1,83 @@
+import struct
+import unittest
+
+import numpy as np
+from osgeo import ogr
+
+from mapswipe_workers.utils import tile_functions
+
+
+class TestTileFunctions(unittest.TestCase):
+    def setUp(self):
+        self.tile_servers = [
+            {"name": "bing", "apiKey": "key", "url": ""},
+            {
+                "name": "sinergise",
+                "apiKey": "key",
+                "url": "https://sinergise/{layer}/{z}/{x}/{y}?key={key}",
+                "wmtsLayerName": "layer",
+            },
+            {
+                "name": "maxar_premium",
+                "apiKey": "key",
+                "url": "https://maxar/{z}/{x}/{y}",
+            },
+            {"name": "custom", "apiKey": None, "url": "https://custom/{z}/{x}/{-y}"},
+            {"name": "esri", "apiKey": None, "url": "https://esri/{z}/{y}/{x}"},
+            {"name": "custom", "apiKey": None, "url": "https://custom/{z}/{x:06d}/{y}"},
+        ]
+
+    def test_tile_coords_and_zoom_to_ewkb(self):
+        """Test that EWKB is the 2D multipolygon of geometry_from_tile_coords."""
+        tile_x = np.arange(137283, 137290).repeat(3)
+        tile_y = np.tile(np.arange(89603, 89606), 7)
+        geometries = tile_functions.tile_coords_and_zoom_to_ewkb(tile_x, tile_y, 18)
+        for x, y, ewkb in zip(tile_x.tolist(), tile_y.tolist(), geometries):
+            ewkb = bytes.fromhex(ewkb)
+            # byte order, multipolygon with SRID 4326, 1 polygon,
+            # byte order, polygon, 1 ring of 5 points
+            self.assertEqual(
+                struct.unpack("<BIIIBIII", ewkb[:26]),
+                (1, 0x20000006, 4326, 1, 1, 3, 1, 5),
+            )
+            ring = ogr.CreateGeometryFromWkt(
+                tile_functions.geometry_from_tile_coords(x, y, 18)
+            ).GetGeometryRef(0)
+            expected = [value for i in range(5) for value in ring.GetPoint_2D(i)]
+            np.testing.assert_allclose(
+                struct.unpack("<10d", ewkb[26:]), expected, rtol=0, atol=1e-12
+            )
+
+    def test_tile_coords_zoom_and_tileserver_to_urls(self):
+        tile_x = np.arange(137283, 137290).repeat(3)
+        tile_y = np.tile(np.arange(89603, 89606), 7)
+        for tile_server in self.tile_servers:
+            urls = tile_functions.tile_coords_zoom_and_tileserver_to_urls(
+                tile_x, tile_y, 18, tile_server
+            ).tolist()
+            expected = [
+                tile_functions.tile_coords_zoom_and_tileserver_to_url(
+                    x, y, 18, tile_server
+                )
+                for x, y in zip(tile_x.tolist(), tile_y.tolist())
+            ]
+            self.assertEqual(urls, expected)
+
+    def test_tasks_from_tile_extent(self):
+        tasks = tile_functions.tasks_from_tile_extent(
+            10, 11, 20, 22, 18, self.tile_servers[0]
+        )
+        self.assertEqual(
+            tasks["taskId"],
+            ["18-10-20", "18-10-21", "18-10-22", "18-11-20", "18-11-21", "18-11-22"],
+        )
+        self.assertEqual(tasks["taskX"], [10, 10, 10, 11, 11, 11])
+        self.assertEqual(tasks["taskY"], [20, 21, 22, 20, 21, 22])
+        self.assertNotIn("geometry", tasks)
+        for column in tasks.values():
+            self.assertEqual(len(column), 6)
+        self.assertIs(type(tasks["taskX"][0]), int)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,3 +28,19 @@ class TestTileGroupingFunctions(unittest.TestCase):
             test_groups = json.load(json_file)
 
         self.assertEqual(len(test_groups), len(created_groups))
+
+    def test_horizontal_slices_are_aligned(self):
+        """Slices of distant polygons are aligned to the rows of the layer."""
+        test_dir = os.path.dirname(os.path.abspath(__file__))
+        extent, geomcol = tile_grouping_functions.get_geometry_from_file(
+            os.path.join(test_dir, "fixtures/completeness/distant_polygons.geojson")
+        )
+        slice_infos = tile_grouping_functions.get_horizontal_slice(extent, geomcol, 18)
+
+        tile_y_top = min(slice_infos["tile_y_top"])
+        self.assertGreater(slice_infos["slice_collection"].GetGeometryCount(), 0)
+        for y_top, y_bottom in zip(
+            slice_infos["tile_y_top"], slice_infos["tile_y_bottom"]
+        ):
+            self.assertEqual((y_top - tile_y_top) % 3, 0)
+            self.assertEqual(y_bottom - y_top, 3)
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from firebase_admin import exceptions
+
+from mapswipe_workers.firebase_to_postgres import transfer_journal, transfer_results
+
+
+class TestTransferJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.tmp_dir.name, "transfer_journal")
+        patcher = patch.object(transfer_journal, "JOURNAL_PATH", self.journal_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_get_result_keys(self):
+        results = {"g1": {"user_a": {}, "user_b": {}}, "g2": {"user_a": {}}}
+        self.assertEqual(
+            transfer_journal.get_result_keys(results),
+            ["g1/user_a", "g1/user_b", "g2/user_a"],
+        )
+
+    def test_record_and_clear(self):
+        transfer_journal.record_result_keys("project", ["g1/user_a"])
+        transfer_journal.record_result_keys("project", ["g2/user_a"])
+        self.assertEqual(
+            transfer_journal.get_journaled_keys("project"),
+            ["g1/user_a", "g2/user_a"],
+        )
+        self.assertEqual(
+            transfer_journal.get_pending_journals(),
+            {"project": ["g1/user_a", "g2/user_a"]},
+        )
+
+        transfer_journal.clear_journal("project")
+        self.assertEqual(transfer_journal.get_journaled_keys("project"), [])
+        self.assertEqual(transfer_journal.get_pending_journals(), {})
+
+    def test_incomplete_line_is_ignored(self):
+        os.makedirs(self.journal_path)
+        with open(transfer_journal.get_journal_file("project"), "w") as f:
+            f.write("g1/user_a\ng2/us")
+        self.assertEqual(transfer_journal.get_journaled_keys("project"), ["g1/user_a"])
+
+    @patch.object(transfer_journal, "filter_committed_keys")
+    def test_resume_journaled_deletes(self, filter_committed_keys):
+        # g2/user_a has not been committed to postgres
+        filter_committed_keys.return_value = ["g1/user_a"]
+        transfer_journal.record_result_keys("project", ["g1/user_a", "g2/user_a"])
+        with patch.object(
+            transfer_results, "delete_result_keys_from_firebase"
+        ) as delete_keys:
+            transfer_results.resume_journaled_deletes()
+        filter_committed_keys.assert_called_once_with(
+            "project", ["g1/user_a", "g2/user_a"]
+        )
+        delete_keys.assert_called_once_with("project", ["g1/user_a"])
+        self.assertEqual(transfer_journal.get_pending_journals(), {})
+
+    @patch.object(transfer_journal, "filter_committed_keys")
+    def test_resume_journaled_deletes_fails(self, filter_committed_keys):
+        filter_committed_keys.side_effect = lambda project_id, keys: keys
+        transfer_journal.record_result_keys("project_a", ["g1/user_a"])
+        transfer_journal.record_result_keys("project_b", ["g1/user_a"])
+        with patch.object(
+            transfer_results, "delete_result_keys_from_firebase"
+        ) as delete_keys:
+            delete_keys.side_effect = [
+                exceptions.UnavailableError("unavailable"),
+                None,
+            ]
+            transfer_results.resume_journaled_deletes()
+        self.assertEqual(delete_keys.call_count, 2)
+        # the journal is kept for the next run
+        self.assertEqual(
+            transfer_journal.get_pending_journals(), {"project_a": ["g1/user_a"]}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
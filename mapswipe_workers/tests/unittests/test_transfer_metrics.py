@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from mapswipe_workers.firebase_to_postgres.transfer_metrics import TransferMetrics
+
+
+class TestTransferMetrics(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.metrics_file = os.path.join(self.tmp_dir.name, "metrics", "test.prom")
+        self.metrics = TransferMetrics(self.metrics_file)
+
+    def test_stage(self):
+        self.metrics.start_cycle()
+        with self.metrics.stage("project", "write") as metrics:
+            metrics.rows = 10
+            metrics.bytes = 100
+        with self.metrics.stage("project", "write") as metrics:
+            metrics.rows = 5
+        with self.metrics.stage(None, "copy"):
+            pass
+
+        write = self.metrics.cycle[("project", "write")]
+        self.assertEqual(write.rows, 15)
+        self.assertEqual(write.bytes, 100)
+        self.assertGreaterEqual(write.duration, 0)
+        self.assertIn(("batch", "copy"), self.metrics.cycle)
+
+    def test_stage_is_recorded_on_exception(self):
+        self.metrics.start_cycle()
+        with self.assertRaises(ValueError):
+            with self.metrics.stage("project", "fetch"):
+                raise ValueError
+        self.assertIn(("project", "fetch"), self.metrics.cycle)
+
+    def test_end_cycle_writes_prometheus_file(self):
+        self.metrics.start_cycle()
+        with self.metrics.stage("project", "write") as metrics:
+            metrics.rows = 10
+        with self.assertLogs("mapswipe", level="INFO") as logs:
+            self.metrics.end_cycle()
+        self.assertIn("Transfer cycle: 1 projects, 10 results", logs.output[0])
+
+        with open(self.metrics_file) as f:
+            text = f.read()
+        self.assertIn(
+            'mapswipe_transfer_stage_rows{project_id="project",stage="write"} 10',
+            text,
+        )
+        self.assertIn('mapswipe_transfer_stage_rows_total{stage="write"} 10', text)
+        self.assertIn("mapswipe_transfer_cycles_total 1", text)
+
+        # Totals are kept over cycles, stages of a cycle are not.
+        self.metrics.start_cycle()
+        self.metrics.end_cycle()
+        with open(self.metrics_file) as f:
+            text = f.read()
+        self.assertNotIn('project_id="project"', text)
+        self.assertIn('mapswipe_transfer_stage_rows_total{stage="write"} 10', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import unittest
+from unittest.mock import patch
+
+import dateutil.parser
+from click.testing import CliRunner
+
+from mapswipe_workers import mapswipe_workers
+from mapswipe_workers.firebase_to_postgres.transfer_results import (
+    firebase_key_order,
+    get_file_size,
+    parse_timestamp,
+    transfer_results,
+)
+
+
+class TestTransferResults(unittest.TestCase):
+    def test_firebase_key_order(self):
+        keys = ["g2", "g10", "10", "2", "-1", "a", "2147483648", "007"]
+        self.assertEqual(
+            sorted(keys, key=firebase_key_order),
+            ["-1", "2", "10", "007", "2147483648", "a", "g10", "g2"],
+        )
+
+    def test_parse_timestamp(self):
+        timestamp = "2021-03-04T05:06:07.089Z"
+        self.assertEqual(parse_timestamp(timestamp), dateutil.parser.parse(timestamp))
+
+        for timestamp in [
+            "2021-03-04T05:06:07Z",
+            "2021-03-04 05:06:07.089Z",
+            "2021-03-04T05:06:07.089+01:00",
+            "2021-13-04T05:06:07.089Z",
+        ]:
+            with self.assertRaises(ValueError):
+                parse_timestamp(timestamp)
+
+    @patch("mapswipe_workers.firebase_to_postgres.transfer_results.FILE_SIZE_CHUNK", 3)
+    def test_get_file_size(self):
+        text = "project\tgroup\tuser_ä\tt1\n" * 3
+        file = io.StringIO(text)
+        file.seek(5)
+        self.assertEqual(get_file_size(file), len(text.encode()))
+        self.assertEqual(file.tell(), 5)
+        self.assertEqual(get_file_size(io.BytesIO(b"abc")), 3)
+
+    @patch(
+        "mapswipe_workers.firebase_to_postgres.transfer_results"
+        ".resume_journaled_deletes"
+    )
+    def test_batch_size_with_workers_or_stream(self, resume_journaled_deletes):
+        for kwargs in [{"max_workers": 2}, {"stream": True}]:
+            with self.assertRaises(ValueError):
+                transfer_results(["project"], batch_size=100, **kwargs)
+        resume_journaled_deletes.assert_not_called()
+
+        runner = CliRunner()
+        for option in [["--max-workers", "2"], ["--stream"]]:
+            result = runner.invoke(
+                mapswipe_workers.run_firebase_to_postgres,
+                ["--batch-size", "100", *option],
+            )
+            self.assertEqual(result.exit_code, 2)
+            self.assertIn("--batch-size", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from mapswipe_workers.firebase_to_postgres import update_data
+
+MODULE = "mapswipe_workers.firebase_to_postgres.update_data"
+
+
+@patch("mapswipe_workers.utils.slack_helper.send_slack_message")
+@patch(f"{MODULE}.auth")
+@patch(f"{MODULE}.get_children")
+@patch(f"{MODULE}.get_progress_and_contributor_count")
+class TestUpdateProgressInFirebase(unittest.TestCase):
+    def set_up_mocks(self, get_progress_and_contributor_count, get_children, auth):
+        get_progress_and_contributor_count.return_value = {"p1": (95, 3), "p2": (10, 1)}
+        get_children.return_value = {"p1": {"name": "project 1"}}
+        self.reference = MagicMock()
+        auth.firebaseDB.return_value.reference.return_value = self.reference
+
+    def test_flags_are_saved_before_sending(
+        self, get_progress_and_contributor_count, get_children, auth, send
+    ):
+        self.set_up_mocks(get_progress_and_contributor_count, get_children, auth)
+        send.side_effect = lambda *args: self.reference.update.assert_called_once()
+
+        update_data.update_progress_in_firebase(["p1", "p2"])
+
+        get_children.assert_called_once_with("v2/projects", ["p1"])
+        self.reference.update.assert_called_once_with(
+            {
+                "p1/progress": 95,
+                "p1/contributorCount": 3,
+                "p2/progress": 10,
+                "p2/contributorCount": 1,
+                "p1/notification_90_sent": True,
+            }
+        )
+        send.assert_called_once()
+
+    def test_no_notification_if_update_fails(
+        self, get_progress_and_contributor_count, get_children, auth, send
+    ):
+        self.set_up_mocks(get_progress_and_contributor_count, get_children, auth)
+        self.reference.update.side_effect = RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            update_data.update_progress_in_firebase(["p1", "p2"])
+        send.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
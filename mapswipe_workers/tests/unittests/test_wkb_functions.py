@@ -0,0 +1,39 @@
+import struct
+import unittest
+
+from osgeo import ogr
+
+from mapswipe_workers.utils import wkb_functions
+
+
+class TestWkbFunctions(unittest.TestCase):
+    def setUp(self):
+        self.wkt = "POLYGON ((8.1 49.2 0,8.2 49.2 0,8.2 49.3 0,8.1 49.2 0))"
+
+    def test_wkt_to_ewkb(self):
+        ewkb = wkb_functions.wkt_to_ewkb(self.wkt)
+        self.assertEqual(
+            struct.unpack("<BII", ewkb[:9]),
+            (1, wkb_functions.WKB_MULTIPOLYGON | wkb_functions.EWKB_SRID_FLAG, 4326),
+        )
+        # without SRID the remaining EWKB is the WKB of the 2D multipolygon
+        expected = ogr.ForceToMultiPolygon(ogr.CreateGeometryFromWkt(self.wkt))
+        expected.FlattenTo2D()
+        wkb = ogr.CreateGeometryFromWkb(
+            ewkb[:1] + struct.pack("<I", wkb_functions.WKB_MULTIPOLYGON) + ewkb[9:]
+        )
+        self.assertTrue(wkb.Equals(expected))
+
+    def test_wkt_to_ewkb_without_multi(self):
+        ewkb = wkb_functions.wkt_to_ewkb(self.wkt, multi=False)
+        self.assertEqual(
+            struct.unpack("<BII", ewkb[:9]),
+            (1, wkb_functions.WKB_POLYGON | wkb_functions.EWKB_SRID_FLAG, 4326),
+        )
+
+    def test_empty_wkt(self):
+        self.assertIsNone(wkb_functions.wkt_to_ewkb(""))
+
+
+if __name__ == "__main__":
+    unittest.main()
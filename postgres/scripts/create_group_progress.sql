@@ -0,0 +1,98 @@
+-- Add tables with the number of users per group and sessions per contributor
+-- which are maintained by triggers on mapping_sessions.
+-- See group_progress in initdb.sql.
+-- The tables are filled with the existing mapping sessions.
+-- Mapping sessions are locked meanwhile, stop the workers before running this.
+BEGIN;
+
+-- Number of users who submitted results per group.
+-- Maintained by the triggers on mapping_sessions below
+-- to avoid counting all mapping sessions of a project for its progress.
+CREATE TABLE IF NOT EXISTS group_progress (
+    project_id varchar,
+    group_id varchar,
+    user_count int not null,
+    PRIMARY KEY (project_id, group_id)
+);
+
+-- Number of mapping sessions per user and project.
+-- Used to get the number of contributors of a project.
+CREATE TABLE IF NOT EXISTS project_contributors (
+    project_id varchar,
+    user_id varchar,
+    session_count int not null,
+    PRIMARY KEY (project_id, user_id)
+);
+
+CREATE OR REPLACE FUNCTION mapping_sessions_insert_progress() RETURNS trigger
+    LANGUAGE plpgsql AS
+$$
+BEGIN
+    INSERT INTO group_progress
+        SELECT project_id, group_id, count(*)
+        FROM new_mapping_sessions
+        GROUP BY project_id, group_id
+    ON CONFLICT (project_id, group_id) DO UPDATE
+    SET user_count = group_progress.user_count + excluded.user_count;
+    INSERT INTO project_contributors
+        SELECT project_id, user_id, count(*)
+        FROM new_mapping_sessions
+        GROUP BY project_id, user_id
+    ON CONFLICT (project_id, user_id) DO UPDATE
+    SET session_count = project_contributors.session_count + excluded.session_count;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION mapping_sessions_delete_progress() RETURNS trigger
+    LANGUAGE plpgsql AS
+$$
+BEGIN
+    UPDATE group_progress gp
+    SET user_count = gp.user_count - removed.user_count
+    FROM (
+        SELECT project_id, group_id, count(*) as user_count
+        FROM old_mapping_sessions
+        GROUP BY project_id, group_id
+    ) removed
+    WHERE gp.project_id = removed.project_id AND gp.group_id = removed.group_id;
+    DELETE FROM group_progress gp
+    USING old_mapping_sessions removed
+    WHERE gp.project_id = removed.project_id AND gp.group_id = removed.group_id
+        AND gp.user_count <= 0;
+    UPDATE project_contributors pc
+    SET session_count = pc.session_count - removed.session_count
+    FROM (
+        SELECT project_id, user_id, count(*) as session_count
+        FROM old_mapping_sessions
+        GROUP BY project_id, user_id
+    ) removed
+    WHERE pc.project_id = removed.project_id AND pc.user_id = removed.user_id;
+    DELETE FROM project_contributors pc
+    USING old_mapping_sessions removed
+    WHERE pc.project_id = removed.project_id AND pc.user_id = removed.user_id
+        AND pc.session_count <= 0;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER insert_mapping_sessions_progress AFTER INSERT ON mapping_sessions
+    REFERENCING NEW TABLE AS new_mapping_sessions
+    FOR EACH STATEMENT EXECUTE PROCEDURE mapping_sessions_insert_progress();
+
+CREATE TRIGGER delete_mapping_sessions_progress AFTER DELETE ON mapping_sessions
+    REFERENCING OLD TABLE AS old_mapping_sessions
+    FOR EACH STATEMENT EXECUTE PROCEDURE mapping_sessions_delete_progress();
+
+LOCK TABLE mapping_sessions IN SHARE MODE;
+
+INSERT INTO group_progress
+    SELECT project_id, group_id, count(*)
+    FROM mapping_sessions
+    GROUP BY project_id, group_id;
+
+INSERT INTO project_contributors
+    SELECT project_id, user_id, count(*)
+    FROM mapping_sessions
+    GROUP BY project_id, user_id;
+COMMIT;